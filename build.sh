@@ -19,3 +19,6 @@ python manage.py create_sample_projects
 
 # Generate slugs for projects
 python manage.py generate_project_slugs
+
+# Precompute related blog posts
+python manage.py rebuild_related_posts
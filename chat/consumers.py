@@ -1,38 +1,112 @@
 import json
+from urllib.parse import parse_qs
+
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth.models import AnonymousUser
 
+from .history import message_frame, room_history
+from .models import ChatMessage, next_message_id
+from .outbox import Outbox
+from .persistence import message_writer
+from .rooms import (
+    CONVERSATION_PREFIX,
+    STAFF_ROOM,
+    can_join,
+    conversation_room,
+    group_name,
+    is_staff,
+)
+
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.room_group_name = 'global_chat'
+        user = self.scope.get('user')
+        room = self.scope['url_route']['kwargs'].get('room')
+        if room is None:
+            # ws/chat/: the visitor's own conversation with staff
+            room = conversation_room(self.scope)
+        elif not can_join(user, room):
+            await self.close(code=4403)
+            return
+
+        self.room = room
+        self.room_group_name = group_name(room)
+        # The staff inbox only relays copies, it has no history of its own
+        self.has_history = room != STAFF_ROOM
+        if self.has_history:
+            await room_history.join(room)
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
         await self.accept()
+        # Group messages reach the socket through a bounded, batching queue
+        self.outbox = Outbox(self.send_frame, self.close)
+        # Tell the client which room it is in, so it can rejoin after a reconnect
+        await self.send_frame({'type': 'room', 'room': room})
+        if self.has_history:
+            # Only what the client missed since the last message it saw (?after=<id>)
+            messages, truncated = await room_history.since(room, self.history_cursor())
+            await self.send_frame({
+                'type': 'history',
+                'room': room,
+                'messages': messages,
+                'truncated': truncated,
+            })
+
+    async def send_frame(self, frame):
+        await self.send(text_data=json.dumps(frame))
+
+    def history_cursor(self):
+        values = parse_qs(self.scope.get('query_string', b'').decode()).get('after')
+        try:
+            return int(values[0]) if values else None
+        except ValueError:
+            return None
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        if hasattr(self, 'room_group_name'):
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
+            if self.has_history:
+                room_history.leave(self.room)
+        if hasattr(self, 'outbox'):
+            self.outbox.close()
 
     async def receive(self, text_data):
         data = json.loads(text_data)
+        if data.get('type') == 'ack':
+            # The client has read this many messages (see chat.outbox)
+            self.outbox.ack(int(data.get('received', 0)))
+            return
         message = data['message']
         user = self.scope['user']
-        username = user.username if user and not isinstance(user, AnonymousUser) else 'Anonymous'
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'chat_message',
-                'message': message,
-                'username': username
-            }
-        )
+        is_authenticated = user and not isinstance(user, AnonymousUser)
+        username = user.username if is_authenticated else 'Anonymous'
+        # The id is the clients' history cursor, known before the row is written
+        seq = next_message_id()
+        # Stored in batches by the write-behind queue, off the event loop
+        await message_writer.put(ChatMessage(
+            user=user if is_authenticated else None,
+            username=username,
+            room=self.room,
+            seq=seq,
+            message=message,
+        ))
+        event = {
+            'type': 'chat_message',
+            'id': seq,
+            'room': self.room,
+            'message': message,
+            'username': username
+        }
+        await self.channel_layer.group_send(self.room_group_name, event)
+        if self.room.startswith(CONVERSATION_PREFIX) and not is_staff(user):
+            # Copy visitor messages to the staff inbox
+            await self.channel_layer.group_send(group_name(STAFF_ROOM), event)
 
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps({
-            'message': event['message'],
-            'username': event['username']
-        }))
+        self.outbox.put(message_frame(
+            event['room'], event['id'], event['username'], event['message']
+        ))
@@ -0,0 +1,191 @@
+"""
+Recent room history for reconnecting clients.
+
+Each process keeps the last CHAT_HISTORY_SIZE messages of every room it
+has sockets in, in a ring buffer filled by one listener channel per
+process that joins the room's group. A client (re)connects with the id of
+the last message it saw and is sent only what it missed:
+
+- cursor within the buffer: served from memory;
+- cursor older than the buffer: the evicted part comes from the database
+  (``chat_message_room_seq_idx``), the rest from memory;
+- no cursor: the buffer's contents.
+
+At most CHAT_HISTORY_BACKFILL_LIMIT messages are sent; the frame says
+whether older ones were left out.
+
+Ids from different workers are only as ordered as their clocks, so a
+message from a worker running behind can carry a lower id than one the
+client has already seen. Reconnects are therefore also sent the
+CHAT_HISTORY_SKEW_MS before the cursor, and clients drop the ids they
+already have.
+
+The database is otherwise read once, when a room's buffer is created. A
+buffer outlives its last socket by CHAT_HISTORY_IDLE_SECONDS, so a widget
+that reconnects after a drop is served from memory.
+"""
+import asyncio
+import bisect
+from collections import deque
+from operator import itemgetter
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .models import ChatMessage
+from .rooms import group_name
+
+
+def message_frame(room, seq, username, message):
+    return {'id': seq, 'room': room, 'message': message, 'username': username}
+
+
+class RoomBuffer:
+    def __init__(self, size):
+        self.messages = deque()
+        self.size = size
+        # Every message with an id above ``floor`` is in the buffer
+        self.floor = 0
+        self.sockets = 0
+        self.loaded = None
+        self.expiry = None
+
+    def append(self, frame):
+        if frame['id'] <= self.floor:
+            return
+        if not self.messages or frame['id'] > self.messages[-1]['id']:
+            self.messages.append(frame)
+        else:
+            # Another worker's message that arrived late: keep the buffer ordered
+            position = bisect.bisect_left(self.messages, frame['id'], key=itemgetter('id'))
+            if self.messages[position]['id'] == frame['id']:
+                return
+            self.messages.insert(position, frame)
+        if len(self.messages) > self.size:
+            self.floor = self.messages.popleft()['id']
+
+    def seed(self, rows, floor):
+        """Put stored messages (oldest first) in front of those received meanwhile"""
+        received = self.messages
+        self.messages = deque(rows)
+        self.floor = floor
+        for frame in received:
+            self.append(frame)
+
+    def after(self, cursor):
+        return [frame for frame in self.messages if frame['id'] > cursor]
+
+
+class RoomHistory:
+    def __init__(self, size=None, backfill_limit=None, idle_seconds=None, skew_ms=None):
+        self.size = size or getattr(settings, 'CHAT_HISTORY_SIZE', 100)
+        self.backfill_limit = backfill_limit or getattr(settings, 'CHAT_HISTORY_BACKFILL_LIMIT', 500)
+        self.idle_seconds = idle_seconds or getattr(settings, 'CHAT_HISTORY_IDLE_SECONDS', 300)
+        if skew_ms is None:
+            skew_ms = getattr(settings, 'CHAT_HISTORY_SKEW_MS', 2000)
+        # Message ids carry milliseconds above 10 bits of worker tag (chat.models)
+        self.skew = skew_ms << 10
+        self._rooms = {}
+        self._loop = None
+        self._layer = None
+        self._channel = None
+        self._listener = None
+
+    async def join(self, room):
+        """Register a socket in ``room``, loading its buffer on first use"""
+        self._ensure_running()
+        buffer = self._rooms.get(room)
+        if buffer is None:
+            buffer = self._rooms[room] = RoomBuffer(self.size)
+            buffer.loaded = asyncio.ensure_future(self._load(room, buffer))
+        buffer.sockets += 1
+        if buffer.expiry is not None:
+            buffer.expiry.cancel()
+            buffer.expiry = None
+        try:
+            await asyncio.shield(buffer.loaded)
+        except Exception:
+            buffer.sockets -= 1
+            raise
+
+    def leave(self, room):
+        buffer = self._rooms.get(room)
+        if buffer is None or self._loop is not asyncio.get_running_loop():
+            return
+        buffer.sockets -= 1
+        if not buffer.sockets:
+            buffer.expiry = self._loop.call_later(self.idle_seconds, self._drop, room)
+
+    async def since(self, room, cursor=None, limit=None):
+        """
+        Return ``(messages, truncated)``: the room's messages after ``cursor``
+        less the skew window, oldest first, at most ``limit`` (default:
+        CHAT_HISTORY_BACKFILL_LIMIT) of the newest.
+        """
+        limit = limit or self.backfill_limit
+        buffer = self._rooms[room]
+        if cursor is None:
+            return list(buffer.messages)[-limit:], False
+        cursor = max(cursor - self.skew, 0)
+        messages = buffer.after(cursor)
+        if cursor < buffer.floor:
+            # Cursor older than the buffer: fetch the part it no longer holds
+            if len(messages) >= limit:
+                return messages[-limit:], True
+            messages = await self._fetch(room, limit - len(messages) + 1, cursor, buffer.floor) + messages
+        return messages[-limit:], len(messages) > limit
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (tests, server restart)
+            self._loop = loop
+            self._rooms = {}
+            self._layer = get_channel_layer()
+            self._channel = None
+            self._listener = None
+
+    async def _load(self, room, buffer):
+        try:
+            if self._channel is None:
+                self._channel = await self._layer.new_channel()
+                self._listener = asyncio.ensure_future(self._listen())
+            await self._layer.group_add(group_name(room), self._channel)
+            rows = await self._fetch(room, self.size + 1)
+            # With one row too many, the oldest marks where the buffer starts
+            floor = rows.pop(0)['id'] if len(rows) > self.size else 0
+            buffer.seed(rows, floor)
+        except Exception:
+            # Let the next socket try again
+            self._rooms.pop(room, None)
+            raise
+
+    async def _listen(self):
+        while True:
+            event = await self._layer.receive(self._channel)
+            buffer = self._rooms.get(event.get('room'))
+            if event.get('type') == 'chat_message' and buffer is not None:
+                buffer.append(message_frame(
+                    event['room'], event['id'], event['username'], event['message']
+                ))
+
+    def _drop(self, room):
+        buffer = self._rooms.get(room)
+        if buffer is not None and not buffer.sockets:
+            del self._rooms[room]
+            asyncio.ensure_future(self._layer.group_discard(group_name(room), self._channel))
+
+    @database_sync_to_async
+    def _fetch(self, room, limit, after=None, up_to=None):
+        """Newest ``limit`` stored messages of ``room`` in (after, up_to], oldest first"""
+        queryset = ChatMessage.objects.filter(room=room)
+        if after is not None:
+            queryset = queryset.filter(seq__gt=after)
+        if up_to is not None:
+            queryset = queryset.filter(seq__lte=up_to)
+        rows = queryset.order_by('-seq').values_list('seq', 'username', 'message')[:limit]
+        return [message_frame(room, *row) for row in reversed(list(rows))]
+
+
+room_history = RoomHistory()
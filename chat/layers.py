@@ -0,0 +1,323 @@
+"SQLite-backed channel layer shared by every ASGI worker process on the host"
+import asyncio
+import os
+import pickle
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+
+class SQLiteChannelLayer(BaseChannelLayer):
+    """
+    Channel layer that passes messages through a local SQLite file in WAL mode.
+
+    Like core.cache_backends.SQLiteCache it lets several workers cooperate
+    without an external service: a message sent by one process to a group
+    reaches sockets held by the others. Sending is one INSERT; a group send
+    is one transaction for the whole group.
+
+    Channels created by new_channel() carry this process's prefix, and a
+    single poller per process pops every message for all of them in one
+    DELETE ... RETURNING, then hands them to local queues. It polls again
+    at once while there is traffic and backs off to ``poll_interval`` when
+    idle, which bounds the added latency. Other channels (e.g. worker
+    channels) are polled per receive() call.
+
+    Messages expire after ``expiry`` seconds; a channel with an expired
+    message has stopped reading and is dropped from its groups, as in the
+    in-memory layer. Memberships expire after ``group_expiry``. A channel
+    holding ``capacity`` messages raises ChannelFull on send and is skipped
+    by group sends.
+    """
+
+    extensions = ["groups", "flush"]
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    BATCH_SIZE = 500  # messages popped per poll
+    CLEANUP_INTERVAL = 5  # seconds
+
+    def __init__(
+        self,
+        location,
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        poll_interval=0.02,
+        **kwargs,
+    ):
+        super().__init__(expiry=expiry, capacity=capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(channel_capacity or {})
+        self.location = str(location)
+        self.group_expiry = group_expiry
+        self.poll_interval = poll_interval
+        self.client_prefix = uuid.uuid4().hex[:12]
+        self._executor = None
+        self._conn = None
+        self._pid = None
+        self._local_queues = {}
+        self._receiving = {}  # channel -> coroutines waiting in receive()
+        self._poller = None
+        self._last_cleanup = 0.0
+        self._last_local_cleanup = time.monotonic()
+
+    # --- Connection handling (runs on the layer's own thread) ---
+
+    def _connection(self):
+        # Connections must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.location, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS channel_message ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, "
+                "target TEXT NOT NULL, expires REAL NOT NULL, body BLOB NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS channel_message_target ON channel_message (target, id)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS channel_message_channel ON channel_message (channel)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS channel_group ("
+                "name TEXT NOT NULL, channel TEXT NOT NULL, expires REAL NOT NULL, "
+                "PRIMARY KEY (name, channel)) WITHOUT ROWID"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    async def _run(self, func, *args):
+        """Run ``func(conn, *args)`` on the layer's thread, off the event loop"""
+        if self._executor is None or self._pid not in (None, os.getpid()):
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="sqlite-channel-layer")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: func(self._connection(), *args)
+        )
+
+    # --- Channel layer API ---
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        assert "__asgi_channel__" not in message
+        body = pickle.dumps(message, self.pickle_protocol)
+        sent = await self._run(self._insert, channel, body, self.get_capacity(channel))
+        if not sent:
+            raise ChannelFull(channel)
+
+    def _insert(self, conn, channel, body, capacity):
+        now = time.time()
+        cursor = conn.execute(
+            "INSERT INTO channel_message (channel, target, expires, body) "
+            "SELECT ?, ?, ?, ? WHERE "
+            "(SELECT COUNT(*) FROM channel_message WHERE channel = ? AND expires > ?) < ?",
+            (channel, self._target(channel), now + self.expiry, body, channel, now, capacity),
+        )
+        return cursor.rowcount == 1
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        if "!" not in channel:
+            return await self._receive_shared(channel)
+        if self._target(channel) != self._process_target():
+            raise ValueError(f"{channel} does not belong to this process")
+
+        loop = asyncio.get_running_loop()
+        if self._poller is None or self._poller.done() or self._poller.get_loop() is not loop:
+            self._poller = loop.create_task(self._poll())
+        queue = self._local_queues.setdefault(channel, asyncio.Queue())
+        self._receiving[channel] = self._receiving.get(channel, 0) + 1
+        try:
+            while True:
+                expires, message = await queue.get()
+                if expires > time.time():
+                    return message
+        finally:
+            self._receiving[channel] -= 1
+            if not self._receiving[channel]:
+                del self._receiving[channel]
+
+    async def new_channel(self, prefix="specific"):
+        return f"{prefix}.{self.client_prefix}!{uuid.uuid4().hex}"
+
+    def _process_target(self):
+        return f"{self.client_prefix}!"
+
+    @staticmethod
+    def _target(channel):
+        """Who pops the channel's messages: the owning process for specific channels"""
+        if "!" in channel:
+            return channel[: channel.index("!")].rsplit(".", 1)[-1] + "!"
+        return channel
+
+    async def _receive_shared(self, channel):
+        delay = 0.001
+        while True:
+            body = await self._run(self._pop_one, channel)
+            if body is not None:
+                return pickle.loads(body)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.poll_interval)
+
+    def _pop_one(self, conn, channel):
+        row = conn.execute(
+            "DELETE FROM channel_message WHERE id = ("
+            "SELECT id FROM channel_message WHERE target = ? AND expires > ? ORDER BY id LIMIT 1"
+            ") RETURNING body",
+            (channel, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    async def _poll(self):
+        """Deliver messages for every specific channel of this process"""
+        target = self._process_target()
+        delay = 0.001
+        while True:
+            rows = await self._run(self._pop_batch, target)
+            for channel, expires, body in rows:
+                # Buffer even if nobody is inside receive() right now
+                queue = self._local_queues.setdefault(channel, asyncio.Queue())
+                queue.put_nowait((expires, pickle.loads(body)))
+            if rows:
+                delay = 0.001
+                # Let the receivers run before the next pop
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.poll_interval)
+            if time.monotonic() - self._last_local_cleanup > self.CLEANUP_INTERVAL:
+                await self._clean_local_queues()
+
+    async def _clean_local_queues(self):
+        """Drop expired buffered messages; their channels stopped reading, so leave all groups"""
+        self._last_local_cleanup = time.monotonic()
+        now = time.time()
+        gone = []
+        for channel, queue in list(self._local_queues.items()):
+            if channel in self._receiving:
+                continue
+            expired = False
+            while not queue.empty() and queue._queue[0][0] <= now:
+                queue.get_nowait()
+                expired = True
+            if queue.empty():
+                del self._local_queues[channel]
+            if expired:
+                gone.append(channel)
+        if gone:
+            await self._run(self._leave_groups, gone)
+
+    def _leave_groups(self, conn, channels):
+        conn.executemany("DELETE FROM channel_group WHERE channel = ?", [(c,) for c in channels])
+
+    def _pop_batch(self, conn, target):
+        now = time.time()
+        if now - self._last_cleanup > self.CLEANUP_INTERVAL:
+            self._cleanup(conn, now)
+        rows = conn.execute(
+            "DELETE FROM channel_message WHERE id IN ("
+            "SELECT id FROM channel_message WHERE target = ? ORDER BY id LIMIT ?"
+            ") RETURNING id, channel, expires, body",
+            (target, self.BATCH_SIZE),
+        ).fetchall()
+        rows.sort()
+        return [(channel, expires, body) for _, channel, expires, body in rows if expires > now]
+
+    def _cleanup(self, conn, now):
+        self._last_cleanup = now
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A channel that let a message expire is gone; drop it from its groups
+            conn.execute(
+                "DELETE FROM channel_group WHERE channel IN "
+                "(SELECT channel FROM channel_message WHERE expires <= ?)",
+                (now,),
+            )
+            conn.execute("DELETE FROM channel_message WHERE expires <= ?", (now,))
+            conn.execute("DELETE FROM channel_group WHERE expires <= ?", (now,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- Groups extension ---
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self._run(self._group_add, group, channel)
+
+    def _group_add(self, conn, group, channel):
+        conn.execute(
+            "INSERT OR REPLACE INTO channel_group (name, channel, expires) VALUES (?, ?, ?)",
+            (group, channel, time.time() + self.group_expiry),
+        )
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self._run(self._group_discard, group, channel)
+
+    def _group_discard(self, conn, group, channel):
+        conn.execute(
+            "DELETE FROM channel_group WHERE name = ? AND channel = ?", (group, channel)
+        )
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_group_name(group)
+        body = pickle.dumps(message, self.pickle_protocol)
+        await self._run(self._group_send, group, body)
+
+    def _group_send(self, conn, group, body):
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            members = conn.execute(
+                "SELECT g.channel, (SELECT COUNT(*) FROM channel_message m "
+                "WHERE m.channel = g.channel AND m.expires > ?) "
+                "FROM channel_group g WHERE g.name = ? AND g.expires > ?",
+                (now, group, now),
+            ).fetchall()
+            # Full channels are skipped, as in the other layers
+            conn.executemany(
+                "INSERT INTO channel_message (channel, target, expires, body) VALUES (?, ?, ?, ?)",
+                [
+                    (channel, self._target(channel), now + self.expiry, body)
+                    for channel, queued in members
+                    if queued < self.get_capacity(channel)
+                ],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- Flush extension ---
+
+    async def flush(self):
+        await self._run(self._flush)
+        self._local_queues.clear()
+
+    def _flush(self, conn):
+        conn.execute("DELETE FROM channel_message")
+        conn.execute("DELETE FROM channel_group")
+
+    async def close(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        if self._executor is not None:
+            await self._run(lambda conn: conn.close())
+            self._conn = None
+            self._executor.shutdown(wait=False)
+            self._executor = None
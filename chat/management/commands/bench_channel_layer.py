@@ -0,0 +1,142 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from channels.layers import InMemoryChannelLayer
+from django.core.management.base import BaseCommand
+
+from chat.layers import SQLiteChannelLayer
+
+GROUP = "bench"
+
+
+async def _point_to_point(layer, messages):
+    channel = await layer.new_channel()
+
+    async def receive_all():
+        for _ in range(messages):
+            await layer.receive(channel)
+
+    started = time.perf_counter()
+    receiver = asyncio.ensure_future(receive_all())
+    for i in range(messages):
+        await layer.send(channel, {"type": "bench", "n": i})
+        if i % 50 == 0:
+            # Stay under the channel capacity
+            await asyncio.sleep(0)
+    await receiver
+    return messages / (time.perf_counter() - started)
+
+
+async def _fan_out(layer, messages, group_size):
+    channels = [await layer.new_channel() for _ in range(group_size)]
+    for channel in channels:
+        await layer.group_add(GROUP, channel)
+    sends = max(1, messages // group_size)
+
+    async def receive_all(channel):
+        for _ in range(sends):
+            await layer.receive(channel)
+
+    started = time.perf_counter()
+    receivers = asyncio.gather(*(receive_all(channel) for channel in channels))
+    for i in range(sends):
+        await layer.group_send(GROUP, {"type": "bench", "n": i})
+        await asyncio.sleep(0)
+    await receivers
+    return sends * group_size / (time.perf_counter() - started)
+
+
+def _worker(location, channels, sends, ready, done):
+    """Hold ``channels`` sockets' worth of channels in another process"""
+    async def run():
+        layer = SQLiteChannelLayer(location)
+        names = [await layer.new_channel() for _ in range(channels)]
+        for name in names:
+            await layer.group_add(GROUP, name)
+        ready.put(channels)
+
+        async def receive_all(name):
+            for _ in range(sends):
+                await layer.receive(name)
+
+        await asyncio.gather(*(receive_all(name) for name in names))
+        done.put(time.time())
+        await layer.close()
+
+    asyncio.run(run())
+
+
+class Command(BaseCommand):
+    help = 'Measure channel layer throughput: in-memory against the shared SQLite layer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=5000,
+                            help='Messages delivered per measurement (default: 5000)')
+        parser.add_argument('--group-size', type=int, default=50,
+                            help='Channels in the fan-out group (default: 50)')
+        parser.add_argument('--processes', type=int, default=2,
+                            help='Receiving processes for the cross-process run, 0 to skip (default: 2)')
+
+    def handle(self, *args, **options):
+        messages = options['messages']
+        group_size = options['group_size']
+        with tempfile.TemporaryDirectory() as directory:
+            location = os.path.join(directory, 'channels.sqlite3')
+            layers = [
+                ('in-memory', lambda: InMemoryChannelLayer(capacity=1000)),
+                ('sqlite', lambda: SQLiteChannelLayer(location, capacity=1000)),
+            ]
+            self.stdout.write(f'📨 {messages} messages, fan-out to {group_size} channels')
+            for name, factory in layers:
+                rates = asyncio.run(self._measure(factory, messages, group_size))
+                self.stdout.write(
+                    f'  {name:<10} send/receive {rates[0]:>9,.0f} msg/s   '
+                    f'group fan-out {rates[1]:>9,.0f} deliveries/s'
+                )
+            if options['processes']:
+                rate = self._cross_process(location, messages, group_size, options['processes'])
+                self.stdout.write(
+                    f'  sqlite     fan-out across {options["processes"]} processes '
+                    f'{rate:>9,.0f} deliveries/s'
+                )
+        self.stdout.write(self.style.SUCCESS('✅ Channel layer benchmark complete'))
+
+    async def _measure(self, factory, messages, group_size):
+        layer = factory()
+        try:
+            return (
+                await _point_to_point(layer, messages),
+                await _fan_out(layer, messages, group_size),
+            )
+        finally:
+            if hasattr(layer, 'close'):
+                await layer.close()
+
+    def _cross_process(self, location, messages, group_size, processes):
+        per_process = max(1, group_size // processes)
+        sends = max(1, messages // (per_process * processes))
+        ready, done = multiprocessing.Queue(), multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_worker, args=(location, per_process, sends, ready, done))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for _ in workers:
+            ready.get()
+
+        async def send_all():
+            layer = SQLiteChannelLayer(location, capacity=1000)
+            for i in range(sends):
+                await layer.group_send(GROUP, {"type": "bench", "n": i})
+            await layer.close()
+
+        started = time.time()
+        asyncio.run(send_all())
+        finished = max(done.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+        return sends * per_process * processes / (finished - started)
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import tempfile
+import time
+
+from channels.layers import DEFAULT_CHANNEL_LAYER, channel_layers
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from chat.layers import SQLiteChannelLayer
+from chat.persistence import message_writer
+
+
+def _rss():
+    """Resident memory of this process, in bytes"""
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Peak rather than current, but still comparable before/after
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentiles(values):
+    if len(values) < 2:
+        value = values[0] if values else 0.0
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+class Client:
+    """One simulated browser: a socket and what it received"""
+
+    def __init__(self, application, path):
+        self.communicator = WebsocketCommunicator(application, path)
+        self.room = None
+        self.latencies = []
+        self.frames = 0
+
+    async def connect(self):
+        started = time.perf_counter()
+        connected, _ = await self.communicator.connect(timeout=30)
+        if not connected:
+            raise CommandError(f'Connection to {self.communicator.scope["path"]} was refused')
+        self.room = (await self.communicator.receive_json_from(timeout=30))['room']
+        # Ready once the room history has arrived
+        await self.communicator.receive_json_from(timeout=30)
+        return time.perf_counter() - started
+
+    async def send(self):
+        await self.communicator.send_json_to({'message': repr(time.perf_counter())})
+
+    async def read(self):
+        while True:
+            frame = await self.communicator.receive_json_from(timeout=3600)
+            received = time.perf_counter()
+            self.frames += 1
+            if frame.get('type') == 'batch':
+                messages = frame['messages']
+            elif 'message' in frame:
+                messages = [frame]
+            else:
+                continue
+            for message in messages:
+                self.latencies.append(received - float(message['message']))
+            # Acknowledge like the widget, or the outbox downgrades us (chat.outbox)
+            await self.communicator.send_json_to({'type': 'ack', 'received': len(self.latencies)})
+
+
+class Command(BaseCommand):
+    help = 'Load-test the chat websocket stack in-process: connections, latency and throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=1000,
+                            help='Concurrent websocket connections (default: 1000)')
+        parser.add_argument('--rooms', type=int, default=10,
+                            help='Shared rooms to spread connections over; 0 gives every '
+                                 'connection its own conversation via ws/chat/ (default: 10)')
+        parser.add_argument('--rate', type=float, default=100.0,
+                            help='Messages sent per second across all connections (default: 100)')
+        parser.add_argument('--duration', type=float, default=10.0,
+                            help='Seconds to send for (default: 10)')
+        parser.add_argument('--connect-concurrency', type=int, default=100,
+                            help='Connections opened at the same time (default: 100)')
+        parser.add_argument('--sqlite-layer', action='store_true',
+                            help='Use the SQLite channel layer production runs, '
+                                 'instead of CHANNEL_LAYERS')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed for picking senders')
+        parser.add_argument('--output',
+                            help='Also write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['connections'] < 1 or options['rate'] <= 0 or options['duration'] <= 0:
+            raise CommandError('--connections, --rate and --duration must be positive')
+
+        # Messages are stored as usual, so run against a fresh test database
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        directory = tempfile.TemporaryDirectory()
+        if options['sqlite_layer']:
+            channel_layers.set(
+                DEFAULT_CHANNEL_LAYER,
+                SQLiteChannelLayer(os.path.join(directory.name, 'channels.sqlite3')),
+            )
+        try:
+            results = asyncio.run(self.run(options))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            directory.cleanup()
+
+        self.print_results(results)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+            self.stdout.write(f'Results written to {options["output"]}')
+        self.stdout.write(self.style.SUCCESS('✅ Chat load test complete'))
+
+    async def run(self, options):
+        from webbuilder.asgi import application
+
+        rooms = options['rooms']
+        paths = [
+            f'/ws/chat/conv-bench-{i % rooms}/' if rooms else '/ws/chat/'
+            for i in range(options['connections'])
+        ]
+        clients = [Client(application, path) for path in paths]
+
+        self.stdout.write(f'🔌 Opening {len(clients)} connections...')
+        memory_before = _rss()
+        gate = asyncio.Semaphore(options['connect_concurrency'])
+
+        async def connect(client):
+            async with gate:
+                return await client.connect()
+
+        started = time.perf_counter()
+        connect_times = await asyncio.gather(*(connect(client) for client in clients))
+        connect_wall = time.perf_counter() - started
+        memory_per_connection = (_rss() - memory_before) / len(clients)
+
+        room_sizes = {}
+        for client in clients:
+            room_sizes[client.room] = room_sizes.get(client.room, 0) + 1
+        readers = [asyncio.ensure_future(client.read()) for client in clients]
+
+        self.stdout.write(
+            f'📨 Sending {options["rate"]:g} msg/s for {options["duration"]:g}s...'
+        )
+        started = time.perf_counter()
+        sent, expected = await self.drive(clients, room_sizes, options)
+        await self.drain(clients, expected)
+        elapsed = time.perf_counter() - started
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+
+        for client in clients:
+            await client.communicator.disconnect(timeout=10)
+        await message_writer.flush()
+
+        latencies = [latency * 1000 for client in clients for latency in client.latencies]
+        delivered = len(latencies)
+        return {
+            'connections': len(clients),
+            'rooms': len(room_sizes),
+            'connect_ms': {
+                **{key: round(value * 1000, 2) for key, value in _percentiles(connect_times).items()},
+                'total': round(connect_wall * 1000, 1),
+            },
+            'memory_per_connection_kb': round(memory_per_connection / 1024, 1),
+            'sent': sent,
+            'sent_per_second': round(sent / options['duration'], 1),
+            'delivered': delivered,
+            'expected': expected,
+            'delivered_per_second': round(delivered / elapsed, 1),
+            'frames': sum(client.frames for client in clients),
+            'latency_ms': {key: round(value, 2) for key, value in _percentiles(latencies).items()},
+        }
+
+    async def drive(self, clients, room_sizes, options):
+        """Send at the requested rate from random connections; returns (sent, expected deliveries)"""
+        picker = random.Random(options['seed'])
+        interval = 0.01
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        sent = expected = 0
+        while True:
+            elapsed = loop.time() - started
+            if elapsed >= options['duration']:
+                break
+            # Catch up to the schedule, so a slow tick does not lower the rate
+            due = int(elapsed * options['rate']) + 1 - sent
+            for _ in range(due):
+                client = picker.choice(clients)
+                await client.send()
+                expected += room_sizes[client.room]
+                sent += 1
+            await asyncio.sleep(interval)
+        return sent, expected
+
+    async def drain(self, clients, expected, patience=2.0):
+        """Wait for the messages still in flight, until none arrive for ``patience`` seconds"""
+        delivered, idle = -1, 0.0
+        while idle < patience:
+            now = sum(len(client.latencies) for client in clients)
+            if now >= expected:
+                return
+            idle = idle + 0.1 if now == delivered else 0.0
+            delivered = now
+            await asyncio.sleep(0.1)
+
+    def print_results(self, r):
+        self.stdout.write(self.style.HTTP_INFO(f'\n{r["connections"]} connections in {r["rooms"]} rooms'))
+        connect = r['connect_ms']
+        self.stdout.write(
+            f'  connect       p50 {connect["p50"]:.1f} ms  p95 {connect["p95"]:.1f} ms  '
+            f'p99 {connect["p99"]:.1f} ms  (all in {connect["total"] / 1000:.1f} s)'
+        )
+        self.stdout.write(
+            f'  memory        {r["memory_per_connection_kb"]:.1f} KB per connection '
+            f'(server and test client)'
+        )
+        self.stdout.write(
+            f'  throughput    {r["sent_per_second"]:,.0f} msg/s sent, '
+            f'{r["delivered_per_second"]:,.0f} msg/s delivered in {r["frames"]:,} frames '
+            f'({r["delivered"]:,} of {r["expected"]:,})'
+        )
+        latency = r['latency_ms']
+        self.stdout.write(
+            f'  delivery      p50 {latency["p50"]:.1f} ms  p95 {latency["p95"]:.1f} ms  '
+            f'p99 {latency["p99"]:.1f} ms'
+        )
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_usernames(apps, schema_editor):
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    ChatMessage.objects.update(
+        username=models.Subquery(User.objects.filter(pk=models.OuterRef('user_id')).values('username')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='username',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='chatmessage',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chat_messages', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(copy_usernames, migrations.RunPython.noop),
+    ]
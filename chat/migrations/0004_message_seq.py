@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:34
+
+import chat.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def number_existing_messages(apps, schema_editor):
+    # Older messages sort before any new id, in their original order
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+    ChatMessage.objects.update(seq=models.F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_message_rooms'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chatmessage',
+            name='chat_message_room_idx',
+        ),
+        migrations.AddField(
+            model_name='chatmessage',
+            name='seq',
+            field=models.BigIntegerField(default=chat.models.next_message_id),
+        ),
+        migrations.RunPython(number_existing_messages, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['room', '-seq'], name='chat_message_room_seq_idx'),
+        ),
+    ]
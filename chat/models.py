@@ -1,12 +1,82 @@
+import logging
+import os
+import threading
+import time
+
+from django.core.cache import cache
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
+_id_lock = threading.Lock()
+_last_id = 0
+_worker = None  # (pid, tag) of this process
+
+WORKER_TAG_KEY = 'chat:worker_tag'
+
+
+def worker_tag():
+    """
+    This process's 10-bit tag in message ids, allocated once per process
+    from a counter in the shared cache, so no two of the (at most 1024)
+    running workers share one. Process ids cannot be used: their low bits
+    collide. Falls back to the process id if the cache is unavailable.
+    """
+    global _worker
+    pid = os.getpid()
+    if _worker is None or _worker[0] != pid:
+        # Also re-allocated in a forked child, which must not inherit the parent's tag
+        try:
+            cache.add(WORKER_TAG_KEY, 0, timeout=None)
+            tag = cache.incr(WORKER_TAG_KEY)
+        except Exception:
+            logger.warning("Could not allocate a chat worker tag; using the process id", exc_info=True)
+            tag = pid
+        _worker = (pid, tag & 0x3FF)
+    return _worker[1]
+
+
+def message_id(milliseconds, tag):
+    """Message id of a time in milliseconds since the epoch, from worker ``tag``"""
+    return milliseconds << 10 | tag
+
+
+def next_message_id():
+    """
+    Time-ordered message id, known before the message is stored: milliseconds
+    since the epoch followed by the 10-bit worker tag, so workers do not
+    collide. Ids keep increasing within a process (running ahead of the clock
+    in bursts) and stay below 2**53, so browsers read them exactly. Across
+    workers they are only as ordered as the clocks (see CHAT_HISTORY_SKEW_MS).
+    """
+    global _last_id
+    with _id_lock:
+        tag = worker_tag()
+        _last_id = max(message_id(time.time_ns() // 1_000_000, tag), (_last_id | 0x3FF) + 1 | tag)
+        return _last_id
+
+
 class ChatMessage(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_messages')
+    # Anonymous visitors have no user; ``username`` is the name shown in chat
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chat_messages', null=True, blank=True)
+    username = models.CharField(max_length=150, blank=True)
+    # Room id (see chat.rooms); blank for messages from the old global chat
+    room = models.CharField(max_length=64, blank=True, default='')
+    # Clients' history cursor (chat.history); assigned when the message is received
+    seq = models.BigIntegerField(default=next_message_id)
     message = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the message is received, not when the write-behind queue flushes it
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Room history after a cursor, newest first
+            models.Index(fields=['room', '-seq'], name='chat_message_room_seq_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username}: {self.message[:30]}..."
+        return f"{self.username or self.user}: {self.message[:30]}..."
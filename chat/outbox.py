@@ -0,0 +1,120 @@
+"""
+Per-connection outbound queue for chat sockets.
+
+Group messages are not written to the socket one by one as they arrive.
+Each connection puts them in its Outbox; a pump sends them, one frame at
+a time while traffic is light and, when several are waiting, as a single
+``{"type": "batch", "messages": [...]}`` frame at most every
+CHAT_OUTBOX_TICK_MS.
+
+Whether a client keeps up cannot be read from the socket: daphne writes
+frames to the transport buffer and returns at once, however far behind
+the browser is. Clients therefore acknowledge what they have read with
+``{"type": "ack", "received": <messages received on this socket>}``.
+A client with CHAT_OUTBOX_HIGH_WATER messages queued or sent but not
+acknowledged is downgraded: the queue is discarded and further messages
+are only counted. Once it has acknowledged everything sent before, it is
+sent one ``{"type": "lagged"}`` frame and resynchronises from the room
+history with its cursor (chat.history). A client that has not caught up
+CHAT_SLOW_CONSUMER_SECONDS after being downgraded is disconnected, so one
+stalled browser never costs more than the high-water mark.
+"""
+import asyncio
+import logging
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Close code sent to clients that stopped reading
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+
+class Outbox:
+    def __init__(self, send, close, tick_ms=None, high_water=None, slow_seconds=None):
+        """``send(frame)`` writes one JSON frame; ``close(code)`` drops the connection"""
+        self._send = send
+        self._close = close
+        self.tick = (tick_ms or getattr(settings, 'CHAT_OUTBOX_TICK_MS', 50)) / 1000
+        self.high_water = high_water or getattr(settings, 'CHAT_OUTBOX_HIGH_WATER', 500)
+        self.slow_seconds = slow_seconds or getattr(settings, 'CHAT_SLOW_CONSUMER_SECONDS', 10)
+        self._frames = deque()
+        self._ready = asyncio.Event()
+        self._pump = None
+        self.sent = 0  # messages handed to the socket
+        self.acked = 0  # messages the client says it has received
+        self.missed = 0  # messages discarded since the client was downgraded
+        self._deadline = None
+
+    @property
+    def downgraded(self):
+        return self._deadline is not None
+
+    @property
+    def unacked(self):
+        return self.sent - self.acked
+
+    def put(self, frame):
+        """Queue a frame for the client; never waits"""
+        if self.downgraded:
+            self.missed += 1
+            return
+        self._frames.append(frame)
+        if len(self._frames) + self.unacked >= self.high_water:
+            self._downgrade()
+        self._wake()
+
+    def ack(self, received):
+        """Record the client's count of messages received on this socket"""
+        self.acked = max(self.acked, min(received, self.sent))
+        if self.downgraded and not self.unacked:
+            self._wake()
+
+    def close(self):
+        if self._pump is not None:
+            self._pump.cancel()
+            self._pump = None
+        if self._deadline is not None:
+            self._deadline.cancel()
+            self._deadline = None
+
+    def _wake(self):
+        self._ready.set()
+        if self._pump is None:
+            self._pump = asyncio.ensure_future(self._run())
+
+    def _downgrade(self):
+        self.missed = len(self._frames)
+        self._frames.clear()
+        self._deadline = asyncio.get_running_loop().call_later(
+            self.slow_seconds, self._disconnect
+        )
+
+    def _disconnect(self):
+        logger.info("Disconnecting a chat client that stopped reading")
+        self.close()
+        asyncio.ensure_future(self._close(SLOW_CONSUMER_CLOSE_CODE))
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self.downgraded:
+                if self.unacked:
+                    # Still reading what was sent before: wait for the next ack
+                    continue
+                await self._send({'type': 'lagged', 'missed': self.missed})
+                self._deadline.cancel()
+                self._deadline = None
+                self.missed = 0
+            elif len(self._frames) == 1:
+                self.sent += 1
+                await self._send(self._frames.popleft())
+            elif self._frames:
+                frames = list(self._frames)
+                self._frames.clear()
+                self.sent += len(frames)
+                await self._send({'type': 'batch', 'messages': frames})
+            # Whatever arrives meanwhile goes out together on the next tick
+            await asyncio.sleep(self.tick)
@@ -0,0 +1,141 @@
+"""
+Write-behind persistence for chat messages.
+
+Consumers hand messages to the process-wide ``message_writer`` and return
+immediately. A background task collects them and stores each batch with a
+single bulk_create once CHAT_WRITE_BATCH_SIZE messages are waiting or
+CHAT_WRITE_INTERVAL_MS has passed since the first of them arrived, so the
+event loop never waits on the database per message.
+
+The queue holds at most CHAT_WRITE_MAX_PENDING messages; beyond that,
+senders wait for the next flush. Whatever is still queued when the
+process stops is written by the ASGI lifespan shutdown or, failing that,
+at interpreter exit.
+"""
+import asyncio
+import atexit
+import logging
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from .models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+
+class ChatMessageWriter:
+    def __init__(self, batch_size=None, interval_ms=None, max_pending=None):
+        self.batch_size = batch_size or getattr(settings, "CHAT_WRITE_BATCH_SIZE", 50)
+        self.interval = (interval_ms or getattr(settings, "CHAT_WRITE_INTERVAL_MS", 250)) / 1000
+        self.max_pending = max_pending or getattr(settings, "CHAT_WRITE_MAX_PENDING", 5000)
+        self._queue = None
+        self._flush_requested = None
+        self._task = None
+        self._loop = None
+
+    async def put(self, message):
+        """Queue an unsaved ChatMessage; waits only if the queue is full"""
+        self._ensure_running()
+        await self._queue.put(message)
+
+    async def flush(self):
+        """Write everything queued so far now, without waiting for the interval"""
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return
+        self._flush_requested.set()
+        try:
+            await self._queue.join()
+        finally:
+            self._flush_requested.clear()
+
+    async def close(self):
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (tests, server restart)
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._flush_requested = asyncio.Event()
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0 or self._flush_requested.is_set():
+                    break
+                # Wait for more messages, the interval, or a flush() call
+                getter = asyncio.ensure_future(self._queue.get())
+                flushing = asyncio.ensure_future(self._flush_requested.wait())
+                done, _ = await asyncio.wait(
+                    {getter, flushing}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                flushing.cancel()
+                if getter not in done:
+                    getter.cancel()
+                    break
+                batch.append(getter.result())
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch):
+        try:
+            await database_sync_to_async(ChatMessage.objects.bulk_create)(batch)
+        except Exception:
+            # Losing a batch must not stop the writer
+            logger.exception("Could not store %d chat messages", len(batch))
+
+    def drain_sync(self):
+        """Store whatever is still queued, synchronously (no event loop running)"""
+        if self._queue is None:
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        if batch:
+            ChatMessage.objects.bulk_create(batch, batch_size=self.batch_size)
+
+
+message_writer = ChatMessageWriter()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        message_writer.drain_sync()
+    except Exception:
+        logger.exception("Could not store queued chat messages at exit")
+
+
+async def lifespan(scope, receive, send):
+    """ASGI lifespan handler: flush queued messages on server shutdown"""
+    while True:
+        event = await receive()
+        if event["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif event["type"] == "lifespan.shutdown":
+            await message_writer.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
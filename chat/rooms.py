@@ -0,0 +1,63 @@
+"""
+Chat rooms.
+
+Every message goes to one room's group, so broadcasting costs as many
+sends as the room has sockets, however busy the rest of the site is.
+
+- ``conv-<id>``: a visitor's conversation with staff. The id is derived
+  from the user or session (or random), so it cannot be guessed; knowing
+  it is what lets a browser rejoin after a reconnect.
+- ``staff``: staff-only inbox; every visitor message in a conversation is
+  copied there, tagged with its room.
+- Topic rooms listed in CHAT_TOPIC_ROOMS are open to everyone.
+"""
+import re
+import secrets
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+
+ROOM_RE = re.compile(r"[a-z0-9-]{1,64}")
+CONVERSATION_PREFIX = "conv-"
+STAFF_ROOM = "staff"
+
+
+def group_name(room):
+    return f"chat.{room}"
+
+
+def is_staff(user):
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+def topic_rooms():
+    return set(getattr(settings, "CHAT_TOPIC_ROOMS", ()))
+
+
+def conversation_room(scope):
+    """Return the conversation room of the connecting visitor"""
+    user = scope.get("user")
+    session = scope.get("session")
+    if user is not None and user.is_authenticated:
+        return user_conversation_room(user.pk)
+    if session is not None and session.session_key:
+        return _conversation(f"session:{session.session_key}")
+    # No stable identity; the client keeps the id it is sent
+    return CONVERSATION_PREFIX + secrets.token_hex(8)
+
+
+def user_conversation_room(user_pk):
+    """Return the conversation room of the signed-in user ``user_pk``"""
+    return _conversation(f"user:{user_pk}")
+
+
+def _conversation(identity):
+    return CONVERSATION_PREFIX + salted_hmac("chat.rooms", identity).hexdigest()[:16]
+
+
+def can_join(user, room):
+    if not ROOM_RE.fullmatch(room):
+        return False
+    if is_staff(user):
+        return True
+    return room.startswith(CONVERSATION_PREFIX) or room in topic_rooms()
@@ -2,5 +2,8 @@ from django.urls import re_path
 from . import consumers
 
 websocket_urlpatterns = [
+    # The visitor's own conversation with staff
     re_path(r'ws/chat/$', consumers.ChatConsumer.as_asgi()),
+    # A given room: a conversation id, "staff" or a topic room (see chat.rooms)
+    re_path(r'ws/chat/(?P<room>[a-z0-9-]{1,64})/$', consumers.ChatConsumer.as_asgi()),
 ]
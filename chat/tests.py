@@ -0,0 +1,324 @@
+import asyncio
+import os
+import tempfile
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TransactionTestCase
+
+from .history import room_history
+from .layers import SQLiteChannelLayer
+from . import models
+from .models import ChatMessage, next_message_id
+from .outbox import SLOW_CONSUMER_CLOSE_CODE, Outbox
+from .persistence import ChatMessageWriter, message_writer
+from .routing import websocket_urlpatterns
+
+application = URLRouter(websocket_urlpatterns)
+
+
+class ChatMessageWriterTests(TransactionTestCase):
+    def test_messages_are_written_in_batches(self):
+        writer = ChatMessageWriter(batch_size=3, interval_ms=10_000)
+
+        async def run():
+            for i in range(7):
+                await writer.put(ChatMessage(username="a", message=f"m{i}"))
+            # Two full batches go out at once; the last one waits for the interval
+            for _ in range(200):
+                if await ChatMessage.objects.acount() == 6:
+                    break
+                await asyncio.sleep(0.01)
+            stored_early = await ChatMessage.objects.acount()
+            await writer.close()
+            return stored_early
+
+        self.assertEqual(async_to_sync(run)(), 6)
+        self.assertEqual(
+            list(ChatMessage.objects.order_by("pk").values_list("message", flat=True)),
+            [f"m{i}" for i in range(7)],
+        )
+
+    def test_leftovers_are_drained_without_a_loop(self):
+        writer = ChatMessageWriter(batch_size=10, interval_ms=10_000)
+
+        async def queue_only():
+            writer._ensure_running()
+            writer._task.cancel()
+            for i in range(3):
+                writer._queue.put_nowait(ChatMessage(username="a", message=f"m{i}"))
+
+        async_to_sync(queue_only)()
+        writer.drain_sync()
+        self.assertEqual(ChatMessage.objects.count(), 3)
+
+
+class MessageIdTests(SimpleTestCase):
+    def setUp(self):
+        cache.delete(models.WORKER_TAG_KEY)
+        self.addCleanup(setattr, models, "_worker", models._worker)
+        self.addCleanup(setattr, models, "_last_id", models._last_id)
+
+    def test_workers_get_distinct_tags(self):
+        tags = set()
+        # Process ids whose low 10 bits are the same
+        for pid in (7, 7 + 1024, 7 + 2048):
+            with mock.patch("chat.models.os.getpid", return_value=pid):
+                tags.add(next_message_id() & 0x3FF)
+        self.assertEqual(len(tags), 3)
+
+    def test_ids_increase_within_a_worker(self):
+        ids = [next_message_id() for _ in range(2000)]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual({i & 0x3FF for i in ids}, {models.worker_tag()})
+
+
+class ChatConsumerTests(TransactionTestCase):
+    async def join(self, path, user):
+        communicator = WebsocketCommunicator(application, path)
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        if not connected:
+            return None
+        welcome = await communicator.receive_json_from()
+        communicator.room = welcome["room"]
+        if communicator.room != "staff":
+            communicator.history = await communicator.receive_json_from()
+        return communicator
+
+    def test_messages_stay_in_their_room(self):
+        visitor = User.objects.create_user("visitor", password="x")
+        staff = User.objects.create_user("agent", password="x", is_staff=True)
+
+        async def run():
+            own = await self.join("/ws/chat/", visitor)
+            stranger = await self.join("/ws/chat/", AnonymousUser())
+            self.assertNotEqual(own.room, stranger.room)
+            agent = await self.join(f"/ws/chat/{own.room}/", staff)
+            inbox = await self.join("/ws/chat/staff/", staff)
+
+            await own.send_json_to({"message": "hello"})
+            expected = await agent.receive_json_from()
+            self.assertEqual(
+                expected,
+                {"id": expected["id"], "room": own.room, "message": "hello", "username": "visitor"},
+            )
+            self.assertEqual(await inbox.receive_json_from(), expected)
+            self.assertEqual(await own.receive_json_from(), expected)
+            self.assertTrue(await stranger.receive_nothing())
+
+            await agent.send_json_to({"message": "hi, how can we help?"})
+            self.assertEqual((await own.receive_json_from())["username"], "agent")
+            # Staff replies do not echo into the inbox
+            self.assertTrue(await inbox.receive_nothing())
+
+            # Visitors cannot enter the staff inbox or unknown rooms
+            self.assertIsNone(await self.join("/ws/chat/staff/", visitor))
+            self.assertIsNone(await self.join("/ws/chat/secret/", visitor))
+            topic = await self.join("/ws/chat/general/", AnonymousUser())
+            self.assertEqual(topic.room, "general")
+
+            await message_writer.flush()
+            for communicator in (own, stranger, agent, inbox, topic):
+                await communicator.disconnect()
+            return own.room
+
+        room = async_to_sync(run)()
+        self.assertEqual(
+            list(ChatMessage.objects.order_by("pk").values_list("room", "username", "message")),
+            [(room, "visitor", "hello"), (room, "agent", "hi, how can we help?")],
+        )
+
+    def test_reconnect_is_sent_only_missed_messages(self):
+        ChatMessage.objects.bulk_create(
+            ChatMessage(room="general", username="old", message=f"m{i}", seq=i)
+            for i in range(1, 6)
+        )
+        user = AnonymousUser()
+        self.addCleanup(setattr, room_history, "size", room_history.size)
+        self.addCleanup(setattr, room_history, "skew", room_history.skew)
+        room_history.size = 3
+        room_history.skew = 0
+
+        async def run():
+            first = await self.join("/ws/chat/general/", user)
+            # A new client gets the buffer, loaded from the database once
+            self.assertEqual([m["id"] for m in first.history["messages"]], [3, 4, 5])
+            await first.send_json_to({"message": "m6"})
+            latest = (await first.receive_json_from())["id"]
+
+            with mock.patch.object(room_history, "_fetch", wraps=room_history._fetch) as fetch:
+                recent = await self.join("/ws/chat/general/?after=4", user)
+                self.assertEqual(fetch.call_count, 0)
+                # The cursor is older than the buffer: the rest comes from the database
+                behind = await self.join("/ws/chat/general/?after=1", user)
+                self.assertEqual(fetch.call_count, 1)
+
+            await message_writer.flush()
+            for communicator in (first, recent, behind):
+                await communicator.disconnect()
+            return latest, recent.history, behind.history
+
+        latest, recent, behind = async_to_sync(run)()
+        self.assertEqual([m["id"] for m in recent["messages"]], [5, latest])
+        self.assertEqual([m["id"] for m in behind["messages"]], [2, 3, 4, 5, latest])
+        self.assertEqual(behind["messages"][-1]["message"], "m6")
+        self.assertFalse(behind["truncated"])
+
+    def test_reconnect_is_resent_the_skew_window(self):
+        # A worker whose clock runs 1 s behind stored "late" after the
+        # client's cursor was assigned, but with a lower id
+        second = 1000 << 10
+        start = 1_700_000_000_000 << 10
+        ChatMessage.objects.bulk_create(
+            ChatMessage(room="general", username="old", message=message, seq=start + offset)
+            for message, offset in [("old", 0), ("late", 9 * second), ("seen", 10 * second)]
+        )
+        self.addCleanup(setattr, room_history, "skew", room_history.skew)
+        room_history.skew = 2 * second
+
+        async def run():
+            client = await self.join(f"/ws/chat/general/?after={start + 10 * second}", AnonymousUser())
+            await client.disconnect()
+            return client.history
+
+        history = async_to_sync(run)()
+        # The client drops "seen", which it already has, by id
+        self.assertEqual([m["message"] for m in history["messages"]], ["late", "seen"])
+
+
+class SQLiteChannelLayerTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, "channels.sqlite3")
+
+    def layer(self, **kwargs):
+        return SQLiteChannelLayer(self.location, poll_interval=0.005, **kwargs)
+
+    def test_group_send_reaches_other_processes(self):
+        async def run():
+            # Two layers on one file behave like two worker processes
+            sender, worker = self.layer(), self.layer()
+            first, second = await worker.new_channel(), await worker.new_channel()
+            await sender.group_add("chat.room", first)
+            await sender.group_add("chat.room", second)
+            await sender.group_send("chat.room", {"type": "chat.message", "text": "hi"})
+            received = await asyncio.wait_for(
+                asyncio.gather(worker.receive(first), worker.receive(second)), 2
+            )
+            await sender.group_discard("chat.room", second)
+            await sender.group_send("chat.room", {"type": "chat.message", "text": "again"})
+            again = await asyncio.wait_for(worker.receive(first), 2)
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(worker.receive(second), 0.1)
+            await sender.close()
+            await worker.close()
+            return received, again
+
+        received, again = async_to_sync(run)()
+        self.assertEqual([m["text"] for m in received], ["hi", "hi"])
+        self.assertEqual(again["text"], "again")
+
+    def test_capacity_and_expiry(self):
+        async def run():
+            layer = self.layer(capacity=2, expiry=0.2)
+            channel = await layer.new_channel()
+            await layer.group_add("g", channel)
+            await layer.send(channel, {"type": "m", "n": 1})
+            await layer.send(channel, {"type": "m", "n": 2})
+            with self.assertRaises(ChannelFull):
+                await layer.send(channel, {"type": "m", "n": 3})
+            # Full channels are skipped by group sends
+            await layer.group_send("g", {"type": "m", "n": 4})
+            first = await layer.receive(channel)
+            second = await layer.receive(channel)
+
+            await layer.send(channel, {"type": "m", "n": 5})
+            await asyncio.sleep(0.3)
+            # Expired unread, wherever it waits (file or local buffer)
+            layer._last_cleanup = 0
+            await layer._run(layer._pop_batch, layer._process_target())
+            await layer._clean_local_queues()
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(layer.receive(channel), 0.1)
+            members = await layer._run(
+                lambda conn: conn.execute("SELECT COUNT(*) FROM channel_group").fetchone()[0]
+            )
+            await layer.close()
+            return [first["n"], second["n"]], members
+
+        delivered, members = async_to_sync(run)()
+        self.assertEqual(delivered, [1, 2])
+        # The channel let a message expire, so it left its group
+        self.assertEqual(members, 0)
+
+
+class OutboxTests(SimpleTestCase):
+    def test_bursts_are_coalesced_into_batches(self):
+        sent = []
+
+        async def run():
+            async def send(frame):
+                sent.append(frame)
+
+            outbox = Outbox(send, None, tick_ms=50)
+            outbox.put({"id": 1})
+            await asyncio.sleep(0.01)
+            for i in range(2, 6):
+                outbox.put({"id": i})
+            await asyncio.sleep(0.1)
+            outbox.close()
+
+        async_to_sync(run)()
+        # The first message goes out at once, the burst in one frame on the next tick
+        self.assertEqual(sent, [{"id": 1}, {"type": "batch", "messages": [{"id": i} for i in range(2, 6)]}])
+
+    def test_clients_that_stop_acknowledging_are_downgraded_then_disconnected(self):
+        sent, closed = [], []
+
+        async def run():
+            # Like daphne: send returns at once, however far behind the client is
+            async def send(frame):
+                sent.append(frame)
+
+            async def close(code):
+                closed.append(code)
+
+            outbox = Outbox(send, close, tick_ms=1, high_water=10, slow_seconds=0.2)
+            # A client that acknowledges what it reads is never held back
+            for i in range(30):
+                outbox.put({"id": i})
+                await asyncio.sleep(0.005)
+                outbox.ack(outbox.sent)
+            self.assertFalse(outbox.downgraded)
+
+            # It stops reading: nothing blocks, but the unacknowledged count grows
+            for i in range(30, 45):
+                outbox.put({"id": i})
+                await asyncio.sleep(0.005)
+            self.assertTrue(outbox.downgraded)
+            self.assertEqual(outbox.unacked + outbox.missed, 15)
+            self.assertEqual(len(outbox._frames), 0)
+            missed = outbox.missed
+            # Catching up in time: told to resync once, then back to normal
+            outbox.ack(outbox.sent)
+            await asyncio.sleep(0.02)
+            self.assertFalse(outbox.downgraded)
+            self.assertEqual(sent[-1], {"type": "lagged", "missed": missed})
+
+            # Stalled for good this time
+            for i in range(45, 60):
+                outbox.put({"id": i})
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(0.3)
+            outbox.close()
+
+        async_to_sync(run)()
+        self.assertEqual(closed, [SLOW_CONSUMER_CLOSE_CODE])
+        self.assertEqual(sum(1 for frame in sent if frame.get("type") == "lagged"), 1)
@@ -26,6 +26,15 @@ from .models import (
 from django.utils.html import format_html
 from django.conf import settings
 
+from .pagination import CachedCountPaginator
+
+
+class CachedCountAdminMixin:
+    """Changelist for large tables: cached or estimated totals, no second full count"""
+
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
 
 @admin.register(PricingPlan)
 class PricingPlanAdmin(admin.ModelAdmin):
@@ -82,13 +91,6 @@ class SiteSettingAdmin(admin.ModelAdmin):
             )
     
     maintenance_mode_status.short_description = "Status"
-    
-    def save_model(self, request, obj, form, change):
-        """Clear cache when maintenance mode is changed"""
-        from django.core.cache import cache
-        super().save_model(request, obj, form, change)
-        # Clear maintenance mode cache to immediately apply changes
-        cache.delete('maintenance_mode')
 
 
 @admin.register(NewsletterSubscriber)
@@ -99,8 +101,9 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
 
 
 @admin.register(ActivityLog)
-class ActivityLogAdmin(admin.ModelAdmin):
+class ActivityLogAdmin(CachedCountAdminMixin, admin.ModelAdmin):
     list_display = ("user", "action", "project_logs", "created_at")
+    list_select_related = ("user", "project_logs")
     search_fields = ("user__username", "action", "details")
     list_filter = ("created_at",)
 
@@ -143,7 +146,7 @@ class TestimonialAdmin(admin.ModelAdmin):
 
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(CachedCountAdminMixin, admin.ModelAdmin):
     list_display = (
         "name",
         "email",
@@ -196,8 +199,9 @@ class BlogPostAdmin(admin.ModelAdmin):
 
 
 @admin.register(Lead)
-class LeadAdmin(admin.ModelAdmin):
+class LeadAdmin(CachedCountAdminMixin, admin.ModelAdmin):
     list_display = ("name", "company", "email", "status", "source", "assigned_to", "created_at")
+    list_select_related = ("assigned_to",)
     list_filter = ("status", "source", "assigned_to", "created_at")
     search_fields = ("name", "email", "company", "message")
     ordering = ("-created_at",)
@@ -229,7 +233,8 @@ class QuoteAdmin(admin.ModelAdmin):
     list_filter = ("status", "created_at", "created_by")
     search_fields = ("quote_number", "client_name", "client_email", "client_company")
     ordering = ("-created_at",)
-    readonly_fields = ("quote_number",)
+    # Totals are recomputed from the lines (core.quote_totals)
+    readonly_fields = ("quote_number", "subtotal", "tax_amount", "total_amount")
     inlines = [QuoteServiceInline]
     
     fieldsets = (
@@ -265,7 +270,7 @@ class WebsiteAnalyticsAdmin(admin.ModelAdmin):
 
 
 @admin.register(ConversionTracking)
-class ConversionTrackingAdmin(admin.ModelAdmin):
+class ConversionTrackingAdmin(CachedCountAdminMixin, admin.ModelAdmin):
     list_display = ("action", "source", "value", "lead", "timestamp")
     list_filter = ("action", "source", "timestamp")
     search_fields = ("source", "page_url")
@@ -4,7 +4,12 @@ from django.core.paginator import Paginator
 from django.db.models import Q
 from .models import BlogPost, BlogTag
 from django.views.generic import ListView, DetailView
-from core.models import SiteSetting
+from .caching import get_site_settings
+from .pagination import paginate_by_cursor
+from .query_budget import query_budget
+from .related_posts import get_related_posts
+from .search import search_blog_posts
+from .view_counter import get_popular_posts, record_view
 
 
 class BlogListView(ListView):
@@ -12,10 +17,11 @@ class BlogListView(ListView):
     template_name = "core/blog_list.html"
     context_object_name = "posts"
     paginate_by = 6
+    query_budget = 8
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        site_setting = SiteSetting.objects.first()
+        site_setting = get_site_settings()
         if site_setting:
           context.update({
               "site_name":site_setting.site_name
@@ -25,29 +31,30 @@ class BlogListView(ListView):
         print(context)
 
     def get_queryset(self):
-        queryset = BlogPost.objects.filter(status="published").prefetch_related("tags")
-
-        # Search functionality
-        search_query = self.request.GET.get("search")
-        if search_query:
-            queryset = queryset.filter(
-                Q(title__icontains=search_query)
-                | Q(content__icontains=search_query)
-                | Q(excerpt__icontains=search_query)
-            )
+        queryset = BlogPost.objects.filter(status="published").for_cards()
 
         # Tag filtering
         tag_slug = self.request.GET.get("tag")
         if tag_slug:
             queryset = queryset.filter(tags__slug=tag_slug)
 
+        # Search functionality (ranked by relevance)
+        search_query = self.request.GET.get("search")
+        if search_query:
+            return search_blog_posts(queryset, search_query)
+
         return queryset.order_by("-publish_date")
 
+    def paginate_queryset(self, queryset, page_size):
+        # Keyset pagination on the listing's ordering (publish date or search rank)
+        page = paginate_by_cursor(self.request, queryset, page_size)
+        return page.paginator, page, page.object_list, page.has_other_pages()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["featured_posts"] = BlogPost.objects.filter(
             status="published", is_featured=True
-        )[:3]
+        ).for_cards()[:3]
         context["all_tags"] = BlogTag.objects.all()
         context["search_query"] = self.request.GET.get("search", "")
         context["current_tag"] = self.request.GET.get("tag", "")
@@ -71,55 +78,46 @@ class BlogDetailView(DetailView):
     context_object_name = "post"
     slug_field = "slug"
     slug_url_kwarg = "slug"
+    query_budget = 10
 
     def get_queryset(self):
-        return BlogPost.objects.filter(status="published")
+        return BlogPost.objects.filter(status="published").for_cards()
+
+    def get_object(self, queryset=None):
+        post = super().get_object(queryset)
+        record_view(post)
+        return post
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Get related posts by tags
-        post = self.get_object()
-        related_posts = (
-            BlogPost.objects.filter(status="published", tags__in=post.tags.all())
-            .exclude(id=post.id)
-            .distinct()[:3]
-        )
-
-        context["related_posts"] = related_posts
+        # Related posts are precomputed by tag overlap
+        context["related_posts"] = get_related_posts(self.object)
         context["all_tags"] = BlogTag.objects.all()
         return context
 
 
+@query_budget(10)
 def blog_home(request):
     """Blog home page with featured posts and recent posts"""
     featured_posts = BlogPost.objects.filter(
         status="published", is_featured=True
-    ).order_by("-publish_date")[:3]
+    ).for_cards().order_by("-publish_date")[:3]
 
-    recent_posts = BlogPost.objects.filter(status="published").order_by(
+    recent_posts = BlogPost.objects.filter(status="published").for_cards().order_by(
         "-publish_date"
     )[:6]
 
     popular_tags = BlogTag.objects.all()[:8]
 
-    site_setting = SiteSetting.objects.all()
-    if site_setting:
-        for setting in site_setting:
-            site_name = setting.site_name
-            facebook = setting.facebook
-            twitter = setting.twitter
-            instagram = setting.instagram
-            linkedin = setting.linkedin
-            mail = setting.contact_email
-            tel = setting.contact_phone
-            address = setting.address
-            logo = setting.logo
-            about = setting.about
+    popular_posts = get_popular_posts()
+
+    setting = get_site_settings()
 
     context = {
         "featured_posts": featured_posts,
         "recent_posts": recent_posts,
         "popular_tags": popular_tags,
+        "popular_posts": popular_posts,
         "setting": setting,
     }
 
@@ -143,19 +141,7 @@ def blog_tags(request):
     total_posts = BlogPost.objects.filter(status="published").count()
     categories_count = all_tags.values("category").distinct().count()
 
-    site_setting = SiteSetting.objects.all()
-    if site_setting:
-        for setting in site_setting:
-            site_name = setting.site_name
-            facebook = setting.facebook
-            twitter = setting.twitter
-            instagram = setting.instagram
-            linkedin = setting.linkedin
-            mail = setting.contact_email
-            tel = setting.contact_phone
-            address = setting.address
-            logo = setting.logo
-            about = setting.about
+    setting = get_site_settings()
 
     context = {
         "all_tags": all_tags,
@@ -0,0 +1,282 @@
+"SQLite-backed cache shared by every worker process on the host"
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache backend that keeps entries in a local SQLite file in WAL mode.
+
+    All gunicorn workers open the same file, so they share one warm cache
+    and see each other's invalidations, without running an external service.
+    Hit/miss/eviction counters are buffered per process and folded into the
+    file every STATS_FLUSH_INTERVAL seconds; see get_stats().
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+    STATS_FLUSH_INTERVAL = 5  # seconds
+    STAT_NAMES = ("hits", "misses", "evictions")
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._pending_stats = dict.fromkeys(self.STAT_NAMES, 0)
+        self._last_stats_flush = time.monotonic()
+
+    # --- Connection handling ---
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        # Connections must not cross a fork (e.g. gunicorn --preload)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(
+                self._path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entry ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_stats ("
+                "name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _write(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- Cache API ---
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = (
+            self._connection()
+            .execute("SELECT value, expires FROM cache_entry WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None or self._has_expired(row[1]):
+            self._record("misses")
+            return default
+        self._record("hits")
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        key_map = {
+            self.make_and_validate_key(key, version=version): key for key in keys
+        }
+        if not key_map:
+            return {}
+        placeholders = ", ".join("?" * len(key_map))
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT key, value, expires FROM cache_entry "
+                f"WHERE key IN ({placeholders})",
+                list(key_map),
+            )
+            .fetchall()
+        )
+        found = {
+            key_map[key]: pickle.loads(value)
+            for key, value, expires in rows
+            if not self._has_expired(expires)
+        }
+        self._record("hits", len(found))
+        self._record("misses", len(key_map) - len(found))
+        return found
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = (
+            self._connection()
+            .execute("SELECT expires FROM cache_entry WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row is not None and not self._has_expired(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._base_set("set", key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._base_set("add", key, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as conn:
+            cursor = conn.execute(
+                "UPDATE cache_entry SET expires = ? WHERE key = ? "
+                "AND (expires IS NULL OR expires > ?)",
+                (self.get_backend_timeout(timeout), key, time.time()),
+            )
+        return cursor.rowcount > 0
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (
+                self.make_and_validate_key(key, version=version),
+                pickle.dumps(value, self.pickle_protocol),
+                expires,
+            )
+            for key, value in data.items()
+        ]
+        with self._write() as conn:
+            evicted = self._cull(conn)
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache_entry (key, value, expires) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+        self._record("evictions", evicted)
+        return []
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # BEGIN IMMEDIATE makes the read-modify-write atomic across processes
+        with self._write() as conn:
+            row = conn.execute(
+                "SELECT value, expires FROM cache_entry WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._has_expired(row[1]):
+                raise ValueError("Key '%s' not found." % key)
+            new_value = pickle.loads(row[0]) + delta
+            conn.execute(
+                "UPDATE cache_entry SET value = ? WHERE key = ?",
+                (pickle.dumps(new_value, self.pickle_protocol), key),
+            )
+        return new_value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as conn:
+            cursor = conn.execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not keys:
+            return
+        placeholders = ", ".join("?" * len(keys))
+        with self._write() as conn:
+            conn.execute(f"DELETE FROM cache_entry WHERE key IN ({placeholders})", keys)
+
+    def clear(self):
+        with self._write() as conn:
+            conn.execute("DELETE FROM cache_entry")
+
+    # --- Internals ---
+
+    def _base_set(self, mode, key, value, timeout):
+        expires = self.get_backend_timeout(timeout)
+        data = pickle.dumps(value, self.pickle_protocol)
+        with self._write() as conn:
+            evicted = self._cull(conn)
+            if mode == "add":
+                # Only overwrite an existing row if it has already expired
+                cursor = conn.execute(
+                    "INSERT INTO cache_entry (key, value, expires) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET "
+                    "value = excluded.value, expires = excluded.expires "
+                    "WHERE cache_entry.expires IS NOT NULL AND cache_entry.expires <= ?",
+                    (key, data, expires, time.time()),
+                )
+                stored = cursor.rowcount > 0
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entry (key, value, expires) "
+                    "VALUES (?, ?, ?)",
+                    (key, data, expires),
+                )
+                stored = True
+        self._record("evictions", evicted)
+        return stored
+
+    def _cull(self, conn):
+        """Drop expired rows, then a 1/CULL_FREQUENCY slice if still over MAX_ENTRIES"""
+        evicted = conn.execute(
+            "DELETE FROM cache_entry WHERE expires IS NOT NULL AND expires <= ?",
+            (time.time(),),
+        ).rowcount
+        count = conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0]
+        if count < self._max_entries:
+            return evicted
+        if self._cull_frequency == 0:
+            return evicted + conn.execute("DELETE FROM cache_entry").rowcount
+        # Evict the entries closest to expiry first; permanent ones last
+        evicted += conn.execute(
+            "DELETE FROM cache_entry WHERE key IN ("
+            "SELECT key FROM cache_entry ORDER BY expires IS NULL, expires LIMIT ?)",
+            (count // self._cull_frequency,),
+        ).rowcount
+        return evicted
+
+    @staticmethod
+    def _has_expired(expires):
+        return expires is not None and expires <= time.time()
+
+    # --- Statistics ---
+
+    def _record(self, name, count=1):
+        if not count:
+            return
+        with self._stats_lock:
+            self._pending_stats[name] += count
+            if time.monotonic() - self._last_stats_flush < self.STATS_FLUSH_INTERVAL:
+                return
+        self._flush_stats()
+
+    def _flush_stats(self):
+        with self._stats_lock:
+            pending = [(name, n) for name, n in self._pending_stats.items() if n]
+            self._pending_stats = dict.fromkeys(self.STAT_NAMES, 0)
+            self._last_stats_flush = time.monotonic()
+        if not pending:
+            return
+        with self._write() as conn:
+            conn.executemany(
+                "INSERT INTO cache_stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                pending,
+            )
+
+    def get_stats(self):
+        """Return hits, misses, evictions, hit_ratio and entries across all processes"""
+        self._flush_stats()
+        conn = self._connection()
+        stats = dict.fromkeys(self.STAT_NAMES, 0)
+        stats.update(conn.execute("SELECT name, value FROM cache_stats").fetchall())
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["entries"] = conn.execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0]
+        return stats
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._pending_stats = dict.fromkeys(self.STAT_NAMES, 0)
+        with self._write() as conn:
+            conn.execute("DELETE FROM cache_stats")
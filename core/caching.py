@@ -0,0 +1,212 @@
+import hashlib
+import re
+import threading
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+
+SITE_SETTINGS_CACHE_KEY = "site_settings"
+SITE_SETTINGS_TIMEOUT = 60 * 60  # Shared tier, seconds
+SITE_SETTINGS_LOCAL_TTL = 5  # Process-local tier, seconds
+
+# Sentinel so a cached ``None`` (no SiteSetting row yet) still counts as a hit
+_MISSING = object()
+
+_local_cache = {}
+_local_lock = threading.Lock()
+
+
+def get_site_settings():
+    """
+    Return the SiteSetting row (or None) through a two-tier cache.
+
+    The process-local tier answers most calls without touching the shared
+    cache at all; it is only trusted for SITE_SETTINGS_LOCAL_TTL seconds so
+    that invalidations issued by other workers are picked up quickly.
+    """
+    now = time.monotonic()
+    entry = _local_cache.get(SITE_SETTINGS_CACHE_KEY)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    site_setting = cache.get(SITE_SETTINGS_CACHE_KEY, _MISSING)
+    if site_setting is _MISSING:
+        from .models import SiteSetting
+
+        site_setting = SiteSetting.objects.first()
+        cache.set(SITE_SETTINGS_CACHE_KEY, site_setting, SITE_SETTINGS_TIMEOUT)
+
+    with _local_lock:
+        _local_cache[SITE_SETTINGS_CACHE_KEY] = (
+            site_setting,
+            now + SITE_SETTINGS_LOCAL_TTL,
+        )
+    return site_setting
+
+
+def invalidate_site_settings():
+    """Drop the cached SiteSetting from both tiers"""
+    cache.delete(SITE_SETTINGS_CACHE_KEY)
+    with _local_lock:
+        _local_cache.pop(SITE_SETTINGS_CACHE_KEY, None)
+
+
+# --- Model version counters ---
+
+MODEL_VERSION_TIMEOUT = None  # Counters never expire on their own
+
+
+def _model_version_key(model):
+    return f"model_version:{model._meta.label_lower}"
+
+
+def get_model_versions(models):
+    """Return the current version counter of each model, in one cache round-trip"""
+    keys = [_model_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, MODEL_VERSION_TIMEOUT)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model):
+    """Invalidate everything keyed on ``model`` by moving its counter forward; return the new value"""
+    key = _model_version_key(model)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Counter was evicted; restart from a value older entries cannot share
+        version = _initial_version()
+        cache.set(key, version, MODEL_VERSION_TIMEOUT)
+        return version
+
+
+def _initial_version():
+    return int(time.time() * 1000)
+
+
+def get_or_build_versioned(name, models, builder, timeout):
+    """
+    Return the cached result of ``builder()`` for the current versions of ``models``.
+
+    Any write to one of ``models`` changes the key, so the value is rebuilt on
+    the next call; ``timeout`` only bounds staleness from unversioned changes.
+    """
+    versions = ".".join(str(v) for v in get_model_versions(models))
+    key = f"versioned:{name}:{versions}"
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
+
+
+# --- Anonymous full-page cache ---
+
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+CSRF_INPUT_RE = re.compile(
+    rb'(<input type="hidden" name="csrfmiddlewaretoken" value=")[^"]*(">)'
+)
+
+
+def anonymous_page_cache(*models, timeout=PAGE_CACHE_TIMEOUT):
+    """
+    Cache the rendered page for anonymous GET requests.
+
+    The cache key embeds the version counter of every model in ``models``, so
+    saving or deleting any of them (see core.signals) makes the old entry
+    unreachable immediately instead of waiting for ``timeout``. CSRF tokens
+    in cached forms are swapped for a fresh one on every hit.
+    """
+
+    def decorator(view_func):
+        name = f"{view_func.__module__}.{view_func.__name__}"
+        _page_cached_views.add(name)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or request.user.is_authenticated:
+                return view_func(request, *args, **kwargs)
+
+            versions = ".".join(str(v) for v in get_model_versions(models))
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = f"page_cache:{name}:{path}:{versions}"
+
+            cached = cache.get(key)
+            if cached is not None:
+                _record_page_cache_event(name, "hits")
+                content, content_type = cached
+                token = get_token(request).encode()
+                response = HttpResponse(
+                    CSRF_INPUT_RE.sub(rb"\g<1>" + token + rb"\g<2>", content),
+                    content_type=content_type,
+                )
+                response["X-Page-Cache"] = "HIT"
+                return response
+
+            _record_page_cache_event(name, "misses")
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                if hasattr(response, "render") and callable(response.render):
+                    response.render()
+                cache.set(
+                    key, (response.content, response["Content-Type"]), timeout
+                )
+                response["X-Page-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+PAGE_CACHE_STATS_KEY = "page_cache_stats"
+
+# Views wrapped by anonymous_page_cache, filled in at import time
+_page_cached_views = set()
+
+
+def _record_page_cache_event(name, event):
+    key = f"{PAGE_CACHE_STATS_KEY}:{name}:{event}"
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_page_cache_stats():
+    """Return ``{view: {"hits", "misses", "hit_ratio"}}`` for every cached view"""
+    names = sorted(_page_cached_views)
+    counts = cache.get_many(
+        [f"{PAGE_CACHE_STATS_KEY}:{name}:{event}" for name in names for event in ("hits", "misses")]
+    )
+    stats = {}
+    for name in names:
+        hits = counts.get(f"{PAGE_CACHE_STATS_KEY}:{name}:hits", 0)
+        misses = counts.get(f"{PAGE_CACHE_STATS_KEY}:{name}:misses", 0)
+        total = hits + misses
+        stats[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 3) if total else 0.0,
+        }
+    return stats
+
+
+def reset_page_cache_stats():
+    """Zero the hit/miss counters of every cached view"""
+    cache.delete_many(
+        [
+            f"{PAGE_CACHE_STATS_KEY}:{name}:{event}"
+            for name in _page_cached_views
+            for event in ("hits", "misses")
+        ]
+    )
@@ -1,8 +1,8 @@
-from .models import SiteSetting
+from .caching import get_site_settings
 
 
 def site_settings(request):
-    site_setting = SiteSetting.objects.first()
+    site_setting = get_site_settings()
     if site_setting:
         return {
             "site_name": site_setting.site_name,
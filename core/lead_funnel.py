@@ -0,0 +1,64 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Lead, LeadFunnelCount
+
+
+def get_lead_funnel_stats():
+    """
+    Return per-status and per-source lead counts plus the conversion rate.
+
+    Reads the materialized LeadFunnelCount rows (at most one per status and
+    source pair), so the cost does not grow with the number of leads.
+    """
+    by_status = {status: 0 for status, _ in Lead.LEAD_STATUS}
+    by_source = {source: 0 for source, _ in Lead.LEAD_SOURCE}
+    for status, source, count in LeadFunnelCount.objects.values_list(
+        "status", "source", "count"
+    ):
+        by_status[status] = by_status.get(status, 0) + count
+        by_source[source] = by_source.get(source, 0) + count
+
+    total = sum(by_status.values())
+    conversion_rate = 0
+    if total > 0:
+        conversion_rate = round((by_status["closed_won"] / total) * 100, 1)
+
+    return {
+        "total": total,
+        "by_status": by_status,
+        "by_source": by_source,
+        "conversion_rate": conversion_rate,
+    }
+
+
+def adjust_lead_funnel(status, source, delta):
+    """Add ``delta`` to the (status, source) counter, creating the row if needed"""
+    updated = LeadFunnelCount.objects.filter(status=status, source=source).update(
+        count=F("count") + delta
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            LeadFunnelCount.objects.create(status=status, source=source, count=delta)
+    except IntegrityError:
+        # Another request created the row first
+        LeadFunnelCount.objects.filter(status=status, source=source).update(
+            count=F("count") + delta
+        )
+
+
+@transaction.atomic
+def rebuild_lead_funnel():
+    """Recompute every counter from a single grouped aggregate over Lead"""
+    rows = (
+        Lead.objects.order_by()
+        .values("status", "source")
+        .annotate(count=Count("id"))
+    )
+    LeadFunnelCount.objects.all().delete()
+    LeadFunnelCount.objects.bulk_create(
+        LeadFunnelCount(status=row["status"], source=row["source"], count=row["count"])
+        for row in rows
+    )
@@ -0,0 +1,204 @@
+import json
+import statistics
+import time
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import BlogPost
+from core.seeding import Seeder
+from projects.models import Project
+
+# (url name, needs a staff login)
+ROUTES = [
+    ("home", False),
+    ("core:blog_list", False),
+    ("core:blog_detail", False),
+    ("projects:list", False),
+    ("projects:detail", False),
+    ("services:list", False),
+    ("core:admin_dashboard", True),
+]
+
+# Rows per unit of --scale
+BASE_SIZES = {
+    "posts": 60,
+    "projects": 40,
+    "reviews": 100,
+    "leads": 500,
+    "activity_logs": 500,
+}
+
+FIXED_SIZES = {
+    "users": 20,
+    "tags": 20,
+    "services": 15,
+    "chat_messages": 0,
+}
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway database and benchmark the hot routes with the test client'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1,
+                            help='Dataset size multiplier (default: 1)')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Timed requests per route (default: 50)')
+        parser.add_argument('--warmup', type=int, default=3,
+                            help='Untimed requests per route before measuring (default: 3)')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed for the generated dataset')
+        parser.add_argument('--output', default='bench.json',
+                            help='Where to write the JSON results (default: bench.json)')
+        parser.add_argument('--baseline',
+                            help='Earlier results to compare against; regressions fail the command')
+        parser.add_argument('--threshold', type=float, default=20.0,
+                            help='Allowed p95 latency increase over the baseline, in percent')
+        parser.add_argument('--min-delta', type=float, default=2.0,
+                            help='Ignore p95 increases smaller than this many milliseconds')
+        parser.add_argument('--cold', action='store_true',
+                            help='Clear the cache before every request')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('--requests must be at least 2 to compute percentiles')
+
+        # Run against a fresh test database so the real data is never touched
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f'🌱 Seeding dataset (scale {options["scale"]})...')
+            targets = self.seed(options['scale'], options['seed'])
+            results = self.run_routes(targets, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'scale': options['scale'],
+                'requests': options['requests'],
+                'seed': options['seed'],
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'created_at': timezone.now().isoformat(),
+            },
+            'routes': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+        self.print_results(results)
+        self.stdout.write(self.style.SUCCESS(f'✅ Results written to {options["output"]}'))
+
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['threshold'], options['min_delta'])
+
+    # --- Dataset ---
+
+    def seed(self, scale, seed):
+        staff = User.objects.create_superuser('bench-admin', 'bench@example.com', 'bench')
+        seeder = Seeder(seed=seed, prefix='bench')
+        seeder.run(**{table: count * scale for table, count in BASE_SIZES.items()}, **FIXED_SIZES)
+        seeder.finalize()
+
+        return {
+            'core:blog_detail': {'slug': BlogPost.objects.filter(status='published').first().slug},
+            'projects:detail': {'slug': Project.objects.filter(status='completed').first().slug},
+            'staff': staff,
+        }
+
+    # --- Measurement ---
+
+    def run_routes(self, targets, options):
+        anonymous = Client()
+        staff_client = Client()
+        staff_client.force_login(targets['staff'])
+        cache.clear()
+
+        results = {}
+        for name, needs_staff in ROUTES:
+            url = reverse(name, kwargs=targets.get(name))
+            client = staff_client if needs_staff else anonymous
+            for _ in range(options['warmup']):
+                client.get(url)
+
+            timings, queries, sizes = [], [], []
+            status = None
+            for _ in range(options['requests']):
+                if options['cold']:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries.append(len(captured))
+                sizes.append(len(response.content))
+                status = response.status_code
+
+            percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+            results[name] = {
+                'url': url,
+                'status': status,
+                'p50_ms': round(percentiles[49], 2),
+                'p95_ms': round(percentiles[94], 2),
+                'p99_ms': round(percentiles[98], 2),
+                'mean_ms': round(statistics.fmean(timings), 2),
+                'queries': round(statistics.fmean(queries), 2),
+                'bytes': round(statistics.fmean(sizes)),
+            }
+        return results
+
+    def print_results(self, results):
+        self.stdout.write(self.style.HTTP_INFO(
+            f'\n{"route":<24}{"status":>7}{"p50":>9}{"p95":>9}{"p99":>9}{"queries":>9}{"bytes":>10}'
+        ))
+        for name, r in results.items():
+            self.stdout.write(
+                f'{name:<24}{r["status"]:>7}{r["p50_ms"]:>9.1f}{r["p95_ms"]:>9.1f}'
+                f'{r["p99_ms"]:>9.1f}{r["queries"]:>9.1f}{r["bytes"]:>10}'
+            )
+
+    def compare(self, results, baseline_path, threshold, min_delta):
+        try:
+            with open(baseline_path) as fh:
+                baseline = json.load(fh)['routes']
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Could not read baseline {baseline_path}: {exc}')
+
+        self.stdout.write(self.style.HTTP_INFO(f'\n📈 Compared with {baseline_path}:'))
+        regressions = []
+        for name, current in results.items():
+            before = baseline.get(name)
+            if before is None:
+                self.stdout.write(f'  {name}: new route, no baseline')
+                continue
+            change = (current['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+            line = (
+                f'  {name}: p95 {before["p95_ms"]:.1f} -> {current["p95_ms"]:.1f} ms ({change:+.0f}%), '
+                f'queries {before["queries"]:g} -> {current["queries"]:g}, '
+                f'bytes {before["bytes"]} -> {current["bytes"]}'
+            )
+            # A few milliseconds on a fast route is noise, however large in percent
+            slower = change > threshold and current['p95_ms'] - before['p95_ms'] > min_delta
+            if slower or current['queries'] > before['queries']:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f'Performance regressed on: {", ".join(regressions)}')
+        self.stdout.write(self.style.SUCCESS('✅ No regressions against the baseline'))
+
@@ -0,0 +1,50 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from core.caching import get_page_cache_stats, reset_page_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show cache backend statistics and page cache hit/miss ratios'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Zero the counters after printing them',
+        )
+
+    def handle(self, *args, **options):
+        backend = settings.CACHES['default']['BACKEND']
+        self.stdout.write(self.style.SUCCESS(f'🗄️ CACHE BACKEND: {backend}'))
+        if hasattr(cache, 'get_stats'):
+            stats = cache.get_stats()
+            self.stdout.write(f"  Entries: {stats['entries']}")
+            self.stdout.write(f"  Hits: {stats['hits']}")
+            self.stdout.write(f"  Misses: {stats['misses']}")
+            self.stdout.write(f"  Evictions: {stats['evictions']}")
+            self.stdout.write(f"  Hit ratio: {stats['hit_ratio']:.1%}")
+        else:
+            self.stdout.write('  This backend does not expose statistics')
+
+        # Importing the URLconf registers every cached view
+        import_module(settings.ROOT_URLCONF)
+
+        self.stdout.write(self.style.SUCCESS('📦 PAGE CACHE'))
+        stats = get_page_cache_stats()
+        if not stats:
+            self.stdout.write('  No cached views registered')
+        for name, counts in stats.items():
+            self.stdout.write(
+                f"  {name}: {counts['hits']} hits / {counts['misses']} misses "
+                f"({counts['hit_ratio']:.1%} hit ratio)"
+            )
+
+        if options['reset']:
+            reset_page_cache_stats()
+            if hasattr(cache, 'reset_stats'):
+                cache.reset_stats()
+            self.stdout.write(self.style.WARNING('Counters reset'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.view_counter import flush_post_views
+
+
+class Command(BaseCommand):
+    help = 'Write buffered blog post views to the database'
+
+    def handle(self, *args, **options):
+        written = flush_post_views()
+        self.stdout.write(self.style.SUCCESS(f'Flushed {written} post views'))
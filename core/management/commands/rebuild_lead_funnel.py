@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.lead_funnel import get_lead_funnel_stats, rebuild_lead_funnel
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized lead funnel counters from the Lead table'
+
+    def handle(self, *args, **options):
+        rebuild_lead_funnel()
+        stats = get_lead_funnel_stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Lead funnel rebuilt: {stats['total']} leads, "
+                f"{stats['conversion_rate']}% conversion rate"
+            )
+        )
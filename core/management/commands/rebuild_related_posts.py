@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.related_posts import rebuild_related_posts
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed related posts of every published post'
+
+    def handle(self, *args, **options):
+        count = rebuild_related_posts()
+        self.stdout.write(
+            self.style.SUCCESS(f'Related posts rebuilt for {count} published posts')
+        )
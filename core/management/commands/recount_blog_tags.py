@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.tag_counts import recompute_tag_post_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute BlogTag.post_count for every tag in one grouped query'
+
+    def handle(self, *args, **options):
+        corrected = recompute_tag_post_counts()
+        self.stdout.write(
+            self.style.SUCCESS(f'Recounted blog tags: {corrected} counts corrected')
+        )
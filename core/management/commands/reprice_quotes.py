@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.quote_totals import recompute_quote_totals, reprice_quote_lines
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored quote totals from their line items in a single pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', action='store_true',
+                            help='Also recompute each line total from quantity, price and discount')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            lines = reprice_quote_lines() if options['lines'] else 0
+            quotes = recompute_quote_totals()
+        message = f'Repriced quotes: {quotes} totals corrected'
+        if options['lines']:
+            message += f', {lines} line totals corrected'
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate a large, reproducible dataset for load testing'
+
+    COUNTS = [
+        # (option, default)
+        ('users', 100),
+        ('tags', 40),
+        ('posts', 2000),
+        ('services', 20),
+        ('reviews', 2000),
+        ('projects', 500),
+        ('leads', 100_000),
+        ('activity_logs', 100_000),
+        ('chat_messages', 100_000),
+    ]
+
+    def add_arguments(self, parser):
+        for name, default in self.COUNTS:
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int, default=default,
+                                help=f'Rows to generate (default: {default})')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed; the same seed and counts give the same data')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Rows per bulk_create transaction (default: 5000)')
+        parser.add_argument('--prefix', default='seed',
+                            help='Prefix for slugs, usernames and emails, to avoid clashing with existing rows')
+        parser.add_argument('--skip-related-posts', action='store_true',
+                            help='Do not rebuild related posts afterwards (slow for very large blogs)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'🌱 Seeding with seed {options["seed"]}...'))
+        started = time.perf_counter()
+        seeder = Seeder(
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            prefix=options['prefix'],
+            log=lambda message: self.stdout.write(f'  {message}'),
+        )
+        seeder.run(**{name: options[name] for name, _ in self.COUNTS})
+        seeder.finalize(related_posts=not options['skip_related_posts'])
+
+        total = sum(count for count, _ in seeder.timings.values() if count)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Created {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)'
+        ))
@@ -1,9 +1,20 @@
+import logging
+from contextlib import ExitStack
+
 from django.shortcuts import render
 from django.http import HttpResponse
 from django.urls import reverse
 from django.conf import settings
-from .models import SiteSetting
-from django.core.cache import cache
+from django.db import connections
+from .caching import get_site_settings
+from .query_budget import (
+    QueryBudgetExceeded,
+    QueryRecorder,
+    get_view_budget,
+    record_route,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class MaintenanceModeMiddleware:
@@ -59,22 +70,15 @@ class MaintenanceModeMiddleware:
     def is_maintenance_mode_enabled(self):
         """
         Check if maintenance mode is enabled from site settings.
-        Uses caching to avoid database hits on every request.
+        Uses the shared site settings cache to avoid database hits on every request.
         """
-        # Try to get from cache first
-        maintenance_mode = cache.get('maintenance_mode')
-        
-        if maintenance_mode is None:
-            try:
-                site_setting = SiteSetting.objects.first()
-                maintenance_mode = site_setting.maintenance_mode if site_setting else False
-                # Cache for 5 minutes
-                cache.set('maintenance_mode', maintenance_mode, 300)
-            except Exception:
-                # If there's any database error, assume maintenance mode is off
-                maintenance_mode = False
-                
-        return maintenance_mode
+        try:
+            site_setting = get_site_settings()
+        except Exception:
+            # If there's any database error, assume maintenance mode is off
+            return False
+
+        return site_setting.maintenance_mode if site_setting else False
 
     def render_maintenance_page(self, request):
         """
@@ -82,7 +86,7 @@ class MaintenanceModeMiddleware:
         """
         try:
             # Get site settings for branding
-            site_setting = SiteSetting.objects.first()
+            site_setting = get_site_settings()
             context = {
                 'site_name': site_setting.site_name if site_setting else 'WebBuilder',
                 'logo': site_setting.logo if site_setting else None,
@@ -99,3 +103,46 @@ class MaintenanceModeMiddleware:
             }
         
         return render(request, 'maintenance.html', context, status=503)
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the queries and DB time of every request per resolved URL name.
+
+    Views may declare a budget with core.query_budget.query_budget; when a
+    request exceeds it we raise QueryBudgetExceeded if QUERY_BUDGET_STRICT
+    is set (the test runner) and log a warning otherwise.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request._query_budget = None
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return response
+
+        route = match.view_name
+        budget = request._query_budget
+        over_budget = budget is not None and recorder.count > budget
+        record_route(route, recorder, over_budget)
+
+        if over_budget:
+            message = (
+                f"{route} ran {recorder.count} queries (budget {budget}); "
+                f"duplicates: {recorder.duplicates or 'none'}"
+            )
+            if getattr(settings, "QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = get_view_budget(view_func)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:03
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_lead_funnel(apps, schema_editor):
+    Lead = apps.get_model('core', 'Lead')
+    LeadFunnelCount = apps.get_model('core', 'LeadFunnelCount')
+    rows = Lead.objects.order_by().values('status', 'source').annotate(count=Count('id'))
+    LeadFunnelCount.objects.bulk_create(
+        LeadFunnelCount(status=row['status'], source=row['source'], count=row['count'])
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_sitesetting_maintenance_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadFunnelCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('new', 'New Lead'), ('contacted', 'Contacted'), ('qualified', 'Qualified'), ('proposal', 'Proposal Sent'), ('closed_won', 'Closed Won'), ('closed_lost', 'Closed Lost')], max_length=20)),
+                ('source', models.CharField(choices=[('website', 'Website'), ('referral', 'Referral'), ('social_media', 'Social Media'), ('google_ads', 'Google Ads'), ('email_campaign', 'Email Campaign'), ('phone_call', 'Phone Call'), ('other', 'Other')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['status', 'source'],
+                'unique_together': {('status', 'source')},
+            },
+        ),
+        migrations.RunPython(populate_lead_funnel, migrations.RunPython.noop),
+    ]
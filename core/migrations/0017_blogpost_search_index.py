@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_blogpost_fts "
+    "USING fts5(title, excerpt, content, tokenize='porter unicode61')",
+    "INSERT INTO core_blogpost_fts (rowid, title, excerpt, content) "
+    "SELECT id, title, excerpt, content FROM core_blogpost",
+]
+SQLITE_BACKWARD = ["DROP TABLE IF EXISTS core_blogpost_fts"]
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE core_blogpost ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(excerpt, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')) STORED",
+    "CREATE INDEX core_blogpost_search_vector_idx ON core_blogpost USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS core_blogpost_search_vector_idx",
+    "ALTER TABLE core_blogpost DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_leadfunnelcount'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run_for_vendor({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
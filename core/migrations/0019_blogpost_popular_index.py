@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_relatedpost'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['status', '-views'], name='core_blogpost_popular_idx'),
+        ),
+    ]
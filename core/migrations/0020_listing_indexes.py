@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_blogpost_popular_index'),
+        ('projects', '0011_listing_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['user', '-created_at'], name='core_activity_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['status', '-publish_date'], name='core_blogpost_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['-created_at'], name='core_lead_created_idx'),
+        ),
+    ]
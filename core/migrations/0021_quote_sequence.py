@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuoteSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(unique=True)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-year'],
+            },
+        ),
+    ]
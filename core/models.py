@@ -1,10 +1,10 @@
 from django.db import models
 from django.conf import settings
 from django.db import models
-from django.utils.text import slugify
 from django.contrib.auth.models import User
 from projects.models import Project
-from django.core.cache import cache
+
+from .slugs import save_with_unique_slug
 
 # Create your models here.
 
@@ -58,10 +58,6 @@ class SiteSetting(models.Model):
     def __str__(self):
         return self.site_name
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        cache.delete("site_settings") 
-
 
 class NewsletterSubscriber(models.Model):
     email = models.EmailField(unique=True)
@@ -84,6 +80,12 @@ class ActivityLog(models.Model):
     def __str__(self):
         return f"{self.user} - {self.project_logs} {self.action} at {self.created_at}"
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's activity history
+            models.Index(fields=["user", "-created_at"], name="core_activity_user_idx"),
+        ]
+
 
 class Announcement(models.Model):
     title = models.CharField(max_length=255)
@@ -112,7 +114,7 @@ class Page(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
+            return save_with_unique_slug(self, self.title, super().save, *args, **kwargs)
         super().save(*args, **kwargs)
 
 
@@ -253,7 +255,7 @@ class BlogTag(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            return save_with_unique_slug(self, self.name, super().save, *args, **kwargs)
         super().save(*args, **kwargs)
 
     def update_post_count(self):
@@ -268,6 +270,18 @@ class BlogTag(models.Model):
         ordering = ["category", "name"]
 
 
+class BlogPostQuerySet(models.QuerySet):
+    def for_cards(self):
+        """
+        Load everything a post card renders in a fixed number of queries:
+        the author and their TeamMember profile (for get_author_avatar) are
+        joined in, and tags are prefetched.
+        """
+        return self.select_related("author", "author__team_member").prefetch_related(
+            "tags"
+        )
+
+
 class BlogPost(models.Model):
     STATUS_CHOICES = [
         ("draft", "Draft"),
@@ -295,13 +309,15 @@ class BlogPost(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BlogPostQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
         # Calculate read time based on content (average 200 words per minute)
         if self.content:
             word_count = len(self.content.split())
             self.read_time = max(1, word_count // 200)
+        if not self.slug:
+            return save_with_unique_slug(self, self.title, super().save, *args, **kwargs)
         super().save(*args, **kwargs)
 
     def get_author_image(self):
@@ -329,6 +345,32 @@ class BlogPost(models.Model):
 
     class Meta:
         ordering = ["-publish_date", "-created_at"]
+        indexes = [
+            # Popular posts (see core.view_counter.get_popular_posts)
+            models.Index(fields=["status", "-views"], name="core_blogpost_popular_idx"),
+            # Keyset pagination of the blog listing
+            models.Index(fields=["status", "-publish_date"], name="core_blogpost_listing_idx"),
+        ]
+
+
+class RelatedPost(models.Model):
+    """Precomputed tag-overlap neighbour of a published post (see core.related_posts)"""
+
+    post = models.ForeignKey(
+        BlogPost, on_delete=models.CASCADE, related_name="related_entries"
+    )
+    related = models.ForeignKey(
+        BlogPost, on_delete=models.CASCADE, related_name="related_from"
+    )
+    score = models.FloatField()
+    position = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f"{self.post} -> {self.related} ({self.score:.2f})"
+
+    class Meta:
+        unique_together = ["post", "related"]
+        ordering = ["post", "position"]
 
 
 # --- Lead Management Models ---
@@ -378,6 +420,24 @@ class Lead(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at"], name="core_lead_created_idx"),
+        ]
+
+
+class LeadFunnelCount(models.Model):
+    """Materialized number of leads per (status, source), kept current by signals"""
+
+    status = models.CharField(max_length=20, choices=Lead.LEAD_STATUS)
+    source = models.CharField(max_length=20, choices=Lead.LEAD_SOURCE)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.status} / {self.source}: {self.count}"
+
+    class Meta:
+        unique_together = ["status", "source"]
+        ordering = ["status", "source"]
 
 
 # --- Quote Management Models ---
@@ -416,20 +476,9 @@ class Quote(models.Model):
     def save(self, *args, **kwargs):
         if not self.quote_number:
             # Generate quote number like Q2025001
-            from django.utils import timezone
-
-            year = timezone.now().year
-            last_quote = (
-                Quote.objects.filter(quote_number__startswith=f"Q{year}")
-                .order_by("-quote_number")
-                .first()
-            )
-            if last_quote:
-                last_num = int(last_quote.quote_number[-3:])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.quote_number = f"Q{year}{new_num:03d}"
+            from .quote_numbers import next_quote_number
+
+            self.quote_number = next_quote_number()
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -439,6 +488,19 @@ class Quote(models.Model):
         ordering = ["-created_at"]
 
 
+class QuoteSequence(models.Model):
+    """Last quote number handed out per year, incremented atomically (see core.quote_numbers)"""
+
+    year = models.PositiveIntegerField(unique=True)
+    last_number = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+    class Meta:
+        ordering = ["-year"]
+
+
 class QuoteService(models.Model):
     quote = models.ForeignKey(
         Quote, on_delete=models.CASCADE, related_name="quote_services"
@@ -452,9 +514,9 @@ class QuoteService(models.Model):
 
     def save(self, *args, **kwargs):
         # Calculate total price with discount
-        subtotal = self.quantity * self.unit_price
-        discount_amount = subtotal * (self.discount_percentage / 100)
-        self.total_price = subtotal - discount_amount
+        from .quote_totals import line_total
+
+        self.total_price = line_total(self.quantity, self.unit_price, self.discount_percentage)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -0,0 +1,271 @@
+"""
+Keyset (cursor) pagination.
+
+Paginator pages with OFFSET and COUNTs the whole result on every request,
+so page 500 of the activity log reads 500 pages' worth of rows. Cursor
+pagination instead remembers the sort key of the last row shown and asks
+for "the next per_page rows after it", which an index on the ordering
+answers in the same time on every page. The price is that there are no
+page numbers or totals, only previous/next links.
+
+Cursors are signed, opaque tokens; a missing, tampered or stale token
+simply shows the first page.
+
+Where numbered pages must stay (the Django admin), CachedCountPaginator
+keeps offset paging but stops re-counting the table on every page view.
+"""
+import hashlib
+import json
+
+from django.core import signing
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F, Q, QuerySet
+from django.utils.functional import cached_property
+
+from .caching import get_or_build_versioned
+
+CURSOR_PARAM = "cursor"
+_SIGNING_SALT = "core.pagination.cursor"
+
+COUNT_CACHE_TIMEOUT = 5 * 60  # bounds staleness from bulk updates, which send no signals
+ESTIMATE_THRESHOLD = 100_000  # rows; above this the planner's estimate is good enough
+
+
+class CursorPage:
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self)} items>"
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginate ``queryset`` by the keyset of ``ordering``.
+
+    ``ordering`` uses order_by() syntax ("-publish_date", "name", or an
+    annotation such as "search_rank") and defaults to the queryset's own
+    ordering; the primary key is appended as a tie breaker. NULLs always
+    sort last, on every database.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.model = queryset.model
+        ordering = ordering or queryset.query.order_by or self.model._meta.ordering
+        if not all(isinstance(name, str) for name in ordering):
+            raise ValueError("CursorPaginator needs field names to order by, not expressions")
+        self.keys = [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+        if "pk" not in {name for name, _ in self.keys}:
+            self.keys.append(("pk", self.keys[-1][1] if self.keys else False))
+
+    def get_page(self, cursor=None):
+        position = self._decode(cursor) if cursor else None
+        if position is None:
+            return self._page(self.queryset, forward=True, has_previous=False)
+        forward, values = position
+        queryset = self.queryset.filter(self._after(values, forward))
+        return self._page(queryset, forward, has_previous=True)
+
+    # --- Internals ---
+
+    def _page(self, queryset, forward, has_previous):
+        rows = list(queryset.order_by(*self._order_by(forward))[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if not forward:
+            rows.reverse()
+            # Going back, "more" means further back; we came from a later page
+            has_previous, has_next = has_more, True
+        else:
+            has_next = has_more
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=self._encode(rows[-1], True) if rows and has_next else None,
+            previous_cursor=self._encode(rows[0], False) if rows and has_previous else None,
+        )
+
+    def _order_by(self, forward):
+        # Walking backwards flips every direction, so NULLs come first
+        nulls = {"nulls_last": True} if forward else {"nulls_first": True}
+        return [
+            F(name).desc(**nulls) if descending == forward else F(name).asc(**nulls)
+            for name, descending in self.keys
+        ]
+
+    def _after(self, values, forward):
+        """Rows strictly past ``values`` in the requested direction"""
+        nothing = Q(pk__in=[])
+        condition = nothing
+        for (name, descending), value in reversed(list(zip(self.keys, values))):
+            if value is None:
+                # NULLs sort last: only NULLs follow a NULL, every non-NULL precedes it
+                step = Q(**{f"{name}__isnull": False}) if not forward else nothing
+                tie = Q(**{f"{name}__isnull": True})
+            else:
+                lookup = "lt" if descending == forward else "gt"
+                step = Q(**{f"{name}__{lookup}": value})
+                if forward and self._nullable(name):
+                    step |= Q(**{f"{name}__isnull": True})
+                tie = Q(**{name: value})
+            condition = step | (tie & condition)
+        return condition
+
+    def _nullable(self, name):
+        try:
+            return self.model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            return name != "pk"
+
+    def _field(self, name):
+        if name == "pk":
+            return self.model._meta.pk
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None  # annotation; kept as its JSON value
+
+    def _encode(self, obj, forward):
+        values = []
+        for name, _ in self.keys:
+            value = getattr(obj, name)
+            if hasattr(value, "isoformat"):
+                # Full precision: DjangoJSONEncoder would cut microseconds
+                value = value.isoformat()
+            elif value is not None and not isinstance(value, (int, float, str, bool)):
+                value = str(value)
+            values.append(value)
+        return signing.dumps({"f": forward, "v": values}, salt=_SIGNING_SALT, compress=True)
+
+    def _decode(self, cursor):
+        try:
+            payload = signing.loads(cursor, salt=_SIGNING_SALT)
+            values = payload["v"]
+            if len(values) != len(self.keys):
+                return None
+            values = [
+                value if value is None or field is None else field.to_python(value)
+                for value, field in zip(values, (self._field(name) for name, _ in self.keys))
+            ]
+            return bool(payload["f"]), values
+        except (signing.BadSignature, KeyError, TypeError, ValidationError):
+            return None
+
+
+def paginate_by_cursor(request, queryset, per_page, ordering=None):
+    """Return the CursorPage selected by the request's ``cursor`` parameter"""
+    paginator = CursorPaginator(queryset, per_page, ordering)
+    return paginator.get_page(request.GET.get(CURSOR_PARAM))
+
+
+# --- Offset pagination with cheap counts ---
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator that caches ``count`` per query fingerprint.
+
+    The cache key includes the model's version counter, which the signals
+    bump on every save and delete, so new or removed rows show up at once.
+    Once a table holds more than ``estimate_threshold`` rows the planner's
+    estimate is used instead, and ``count_is_estimate`` is set.
+    """
+
+    estimate_threshold = ESTIMATE_THRESHOLD
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        fingerprint = hashlib.md5(f"{sql}{params!r}".encode()).hexdigest()
+        model = queryset.model
+
+        def build():
+            estimate = estimate_count(queryset, self.estimate_threshold)
+            if estimate is not None:
+                return estimate, True
+            return queryset.count(), False
+
+        count, self.count_is_estimate = get_or_build_versioned(
+            f"paginator_count:{model._meta.label_lower}:{fingerprint}",
+            [model],
+            build,
+            COUNT_CACHE_TIMEOUT,
+        )
+        return count
+
+
+def estimate_count(queryset, threshold=ESTIMATE_THRESHOLD):
+    """
+    Return the planner's row estimate for ``queryset`` if its table holds at
+    least ``threshold`` rows, else None (meaning: count it exactly).
+
+    Table sizes come from sqlite_stat1 (written by ANALYZE) on SQLite and
+    pg_class.reltuples on PostgreSQL. Filtered querysets are estimated with
+    EXPLAIN on PostgreSQL; SQLite has no row estimate for them.
+    """
+    query = queryset.query
+    if query.is_sliced or query.distinct or query.combinator:
+        return None
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    try:
+        # Savepoint, so a failed lookup cannot break an outer transaction
+        with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+                rows = [int(stat.split()[0]) for (stat,) in cursor.fetchall()]
+                total = max(rows) if rows else None
+            elif connection.vendor == "postgresql":
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table])
+                row = cursor.fetchone()
+                # -1 means the table was never analyzed
+                total = row[0] if row and row[0] >= 0 else None
+            else:
+                return None
+            if total is None or total < threshold:
+                return None
+            if not query.has_filters():
+                return total
+            if connection.vendor != "postgresql":
+                return None
+            sql, params = query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+    except (DatabaseError, EmptyResultSet):
+        # e.g. no sqlite_stat1 table until the first ANALYZE
+        return None
@@ -6,6 +6,7 @@ from django.http import JsonResponse
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from .models import TeamMember, ActivityLog
+from .pagination import paginate_by_cursor
 from .forms import ProfileForm, TeamMemberForm
 from projects.models import Project, ProjectCollaborator
 from services.models import ServiceReview
@@ -110,10 +111,8 @@ def profile_activity(request):
         user=request.user
     ).order_by('-created_at')
     
-    # Pagination
-    paginator = Paginator(activities, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: deep pages cost the same as the first
+    page_obj = paginate_by_cursor(request, activities, 20)
     
     context = {
         'activities': page_obj,
@@ -0,0 +1,137 @@
+"""
+Per-route query accounting for QueryBudgetMiddleware.
+
+Every request is attributed to its resolved URL name (e.g. "core:home").
+For each route we keep totals plus a rolling window of the last
+ROLLING_WINDOW requests, so get_query_stats() reports recent behaviour
+rather than an all-time average. Views can declare an upper bound with
+@query_budget(n) (or a ``query_budget`` attribute on a class-based view);
+going over it raises QueryBudgetExceeded when QUERY_BUDGET_STRICT is on
+(the test runner) and logs a warning otherwise.
+"""
+import re
+import statistics
+import threading
+from collections import Counter, deque
+from time import perf_counter
+
+ROLLING_WINDOW = 200
+DUPLICATE_SAMPLE_SIZE = 5
+
+# Collapse the variable-length parts of a statement so that the same query
+# with different IN-lists still shares a fingerprint
+_IN_LIST_RE = re.compile(r"\bIN \((?:%s, )*%s\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries):
+    """Declare the most queries a view may run per request"""
+
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+
+    return decorator
+
+
+def get_view_budget(view_func):
+    """Budget declared on a view function or on a class-based view"""
+    budget = getattr(view_func, "query_budget", None)
+    if budget is None:
+        budget = getattr(getattr(view_func, "view_class", None), "query_budget", None)
+    return budget
+
+
+def fingerprint(sql):
+    return _WHITESPACE_RE.sub(" ", _IN_LIST_RE.sub("IN (...)", sql)).strip()
+
+
+class QueryRecorder:
+    """Connection execute wrapper that times and fingerprints each query"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """``{fingerprint: times}`` for statements run more than once"""
+        return {sql: n for sql, n in self.fingerprints.items() if n > 1}
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.total_queries = 0
+        self.total_time = 0.0
+        self.max_queries = 0
+        self.over_budget = 0
+        self.recent_queries = deque(maxlen=ROLLING_WINDOW)
+        self.recent_times = deque(maxlen=ROLLING_WINDOW)
+        self.duplicates = Counter()
+
+    def add(self, recorder, over_budget):
+        self.requests += 1
+        self.total_queries += recorder.count
+        self.total_time += recorder.duration
+        self.max_queries = max(self.max_queries, recorder.count)
+        self.over_budget += over_budget
+        self.recent_queries.append(recorder.count)
+        self.recent_times.append(recorder.duration)
+        # Count the repeats only: the first execution was needed anyway
+        self.duplicates.update({sql: n - 1 for sql, n in recorder.duplicates.items()})
+
+    def as_dict(self):
+        recent = list(self.recent_queries)
+        return {
+            "requests": self.requests,
+            "avg_queries": round(self.total_queries / self.requests, 2),
+            "max_queries": self.max_queries,
+            "recent_avg_queries": round(statistics.fmean(recent), 2),
+            "recent_p95_queries": _percentile(recent, 95),
+            "avg_db_ms": round(self.total_time / self.requests * 1000, 2),
+            "recent_avg_db_ms": round(statistics.fmean(self.recent_times) * 1000, 2),
+            "over_budget": self.over_budget,
+            "top_duplicates": self.duplicates.most_common(DUPLICATE_SAMPLE_SIZE),
+        }
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, round(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+_route_stats = {}
+_stats_lock = threading.Lock()
+
+
+def record_route(route, recorder, over_budget=False):
+    with _stats_lock:
+        _route_stats.setdefault(route, RouteStats()).add(recorder, over_budget)
+
+
+def get_query_stats():
+    """Return ``{url_name: stats}`` for this process, most queries first"""
+    with _stats_lock:
+        stats = {route: s.as_dict() for route, s in _route_stats.items()}
+    return dict(sorted(stats.items(), key=lambda item: -item[1]["recent_avg_queries"]))
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _route_stats.clear()
@@ -0,0 +1,94 @@
+"""
+Quote numbers: Q{year}{n:03d}, e.g. Q2025001, Q20251000.
+
+Each year has a QuoteSequence row holding the last number handed out.
+Allocating moves it forward with a single atomic statement, UPDATE ...
+RETURNING where the database supports it and a row lock otherwise, so
+concurrent saves never see the same value and no read query is needed.
+Numbers taken by a transaction that later rolls back are not reused.
+"""
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from .models import Quote, QuoteSequence
+
+
+def format_quote_number(year, number):
+    return f"Q{year}{number:03d}"
+
+
+def next_quote_number(year=None):
+    """Allocate and return the next quote number of ``year`` (default: this year)"""
+    return reserve_quote_numbers(1, year)[0]
+
+
+def reserve_quote_numbers(count, year=None):
+    """
+    Allocate ``count`` consecutive quote numbers at once and return them.
+
+    Meant for bulk imports: a whole block costs the same single statement as
+    one number, and the result can be assigned before bulk_create().
+    """
+    if count < 1:
+        return []
+    year = year or timezone.now().year
+    last = _advance(year, count)
+    if last is None:
+        _create_sequence(year)
+        last = _advance(year, count)
+    return [format_quote_number(year, n) for n in range(last - count + 1, last + 1)]
+
+
+def _advance(year, count):
+    """Add ``count`` to the year's sequence and return the new last number, or None if missing"""
+    using = router.db_for_write(QuoteSequence)
+    connection = connections[using]
+    if _supports_update_returning(connection):
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(QuoteSequence._meta.db_table)} "
+                f"SET {qn('last_number')} = {qn('last_number')} + %s "
+                f"WHERE {qn('year')} = %s RETURNING {qn('last_number')}",
+                [count, year],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    with transaction.atomic(using=using):
+        sequence = QuoteSequence.objects.using(using).select_for_update().filter(year=year).first()
+        if sequence is None:
+            return None
+        QuoteSequence.objects.using(using).filter(pk=sequence.pk).update(
+            last_number=F("last_number") + count
+        )
+        return sequence.last_number + count
+
+
+def _supports_update_returning(connection):
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def _create_sequence(year):
+    """Start the year's sequence after the highest number already issued"""
+    # Longest first: "Q20251000" sorts before "Q2025999" as a string
+    last_quote = (
+        Quote.objects.filter(quote_number__startswith=f"Q{year}")
+        .order_by(Length("quote_number").desc(), "-quote_number")
+        .values_list("quote_number", flat=True)
+        .first()
+    )
+    suffix = last_quote[len(f"Q{year}"):] if last_quote else ""
+    last_number = int(suffix) if suffix.isdigit() else 0
+    try:
+        with transaction.atomic():
+            QuoteSequence.objects.create(year=year, last_number=last_number)
+    except IntegrityError:
+        # Another request created it first
+        pass
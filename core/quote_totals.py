@@ -0,0 +1,98 @@
+"""
+Stored quote totals.
+
+Quote.subtotal, tax_amount and total_amount are derived from the quote's
+QuoteService lines. Signals queue the affected quotes and recompute them
+once the transaction commits, so an admin save with many inline lines
+costs a single grouped aggregate; readers just use the stored columns.
+"""
+import threading
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import Sum
+
+from .models import Quote, QuoteService
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+TOTAL_FIELDS = ["subtotal", "tax_amount", "total_amount"]
+
+_pending = threading.local()
+
+
+def money(value):
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def line_total(quantity, unit_price, discount_percentage):
+    """Price of one QuoteService line after its discount"""
+    subtotal = quantity * unit_price
+    return money(subtotal - subtotal * (discount_percentage or 0) / 100)
+
+
+def apply_totals(quote, subtotal):
+    """Set the quote's derived amounts from ``subtotal``; return True if any changed"""
+    subtotal = money(subtotal or ZERO)
+    tax_amount = money(subtotal * (quote.tax_rate or 0) / 100)
+    totals = (subtotal, tax_amount, subtotal + tax_amount)
+    if totals == (quote.subtotal, quote.tax_amount, quote.total_amount):
+        return False
+    quote.subtotal, quote.tax_amount, quote.total_amount = totals
+    return True
+
+
+def recompute_quote_totals(quote_ids=None, batch_size=500):
+    """
+    Recompute stored totals from the line items with one grouped aggregate.
+
+    ``quote_ids=None`` reprices every quote in a single pass. Only quotes
+    whose totals changed are written, via bulk_update. Returns that number.
+    """
+    quotes = Quote.objects.only("tax_rate", *TOTAL_FIELDS).order_by()
+    lines = QuoteService.objects.order_by()
+    if quote_ids is not None:
+        quote_ids = list(quote_ids)
+        quotes = quotes.filter(pk__in=quote_ids)
+        lines = lines.filter(quote_id__in=quote_ids)
+    subtotals = dict(
+        lines.values("quote_id").annotate(subtotal=Sum("total_price")).values_list("quote_id", "subtotal")
+    )
+
+    changed = [
+        quote
+        for quote in quotes.iterator(chunk_size=2000)
+        if apply_totals(quote, subtotals.get(quote.pk))
+    ]
+    Quote.objects.bulk_update(changed, TOTAL_FIELDS, batch_size=batch_size)
+    return len(changed)
+
+
+def reprice_quote_lines(batch_size=500):
+    """Recompute QuoteService.total_price for lines written without save(); return the number fixed"""
+    changed = []
+    fields = ("quantity", "unit_price", "discount_percentage", "total_price")
+    for line in QuoteService.objects.only(*fields).order_by().iterator(chunk_size=2000):
+        total = line_total(line.quantity, line.unit_price, line.discount_percentage)
+        if total != line.total_price:
+            line.total_price = total
+            changed.append(line)
+    QuoteService.objects.bulk_update(changed, ["total_price"], batch_size=batch_size)
+    return len(changed)
+
+
+def queue_quote_totals(quote_id):
+    """Remember ``quote_id`` for the next flush_quote_totals()"""
+    pending = getattr(_pending, "ids", None)
+    if pending is None:
+        pending = _pending.ids = set()
+    pending.add(quote_id)
+
+
+def flush_quote_totals():
+    """Recompute every queued quote at once (later calls find the queue empty)"""
+    pending = getattr(_pending, "ids", None)
+    if not pending:
+        return 0
+    _pending.ids = set()
+    # Quotes deleted in the meantime simply match nothing
+    return recompute_quote_totals(pending)
@@ -0,0 +1,141 @@
+"""
+Precomputed "related posts" for the blog.
+
+Each published post keeps its RELATED_POSTS_LIMIT best neighbours in the
+RelatedPost table, scored by the Jaccard similarity of their tag sets
+(shared tags / all tags of the pair). Signals call refresh_related_posts()
+when a post's tags or status change, so the detail view only has to read
+the table.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import BlogPost, RelatedPost
+
+RELATED_POSTS_LIMIT = 3
+REBUILD_BATCH_SIZE = 500
+
+PostTag = BlogPost.tags.through
+
+
+def get_related_posts(post):
+    """Return the precomputed neighbours of ``post``, best first, in one query"""
+    return (
+        BlogPost.objects.filter(related_from__post=post, status="published")
+        .for_cards()
+        .order_by("related_from__position")
+    )
+
+
+def _published_tag_sets(**filters):
+    """Return ``({post_id: {tag_id, ...}}, {post_id: publish_date})``"""
+    tag_sets = defaultdict(set)
+    publish_dates = {}
+    rows = PostTag.objects.filter(blogpost__status="published", **filters)
+    for post_id, tag_id, publish_date in rows.values_list(
+        "blogpost_id", "blogtag_id", "blogpost__publish_date"
+    ):
+        tag_sets[post_id].add(tag_id)
+        publish_dates[post_id] = publish_date
+    return tag_sets, publish_dates
+
+
+def _jaccard(a, b):
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared) if shared else 0.0
+
+
+def _compute(post_ids):
+    """Return ``{post_id: [(related_id, score), ...]}`` for the given posts"""
+    targets, _ = _published_tag_sets(blogpost_id__in=post_ids)
+    tag_ids = set().union(*targets.values()) if targets else set()
+    candidates, publish_dates = _published_tag_sets(
+        blogpost_id__in=PostTag.objects.filter(blogtag_id__in=tag_ids).values(
+            "blogpost_id"
+        )
+    )
+
+    results = {}
+    for post_id, tags in targets.items():
+        scored = [
+            (other_id, _jaccard(tags, other_tags))
+            for other_id, other_tags in candidates.items()
+            if other_id != post_id and tags & other_tags
+        ]
+        scored.sort(
+            key=lambda item: (-item[1], _date_key(publish_dates[item[0]]), -item[0])
+        )
+        results[post_id] = scored[:RELATED_POSTS_LIMIT]
+    return results, candidates
+
+
+def _date_key(value):
+    # Ties go to the most recently published post; undated posts last
+    return -value.timestamp() if value else float("inf")
+
+
+def _store(post_ids, results):
+    RelatedPost.objects.filter(post_id__in=post_ids).delete()
+    RelatedPost.objects.bulk_create(
+        RelatedPost(post_id=post_id, related_id=related_id, score=score, position=position)
+        for post_id, neighbours in results.items()
+        for position, (related_id, score) in enumerate(neighbours)
+    )
+
+
+@transaction.atomic
+def refresh_related_posts(post_ids):
+    """
+    Recompute neighbours after the tags or status of ``post_ids`` changed.
+
+    Besides the posts themselves this refreshes every post that currently
+    lists one of them, and every post sharing a tag with one of them whose
+    top list the changed post could now enter.
+    """
+    post_ids = set(post_ids)
+    affected = set(post_ids)
+    affected.update(
+        RelatedPost.objects.filter(related_id__in=post_ids).values_list(
+            "post_id", flat=True
+        )
+    )
+
+    results, sharers = _compute(post_ids)
+    changed_tags = {pid: tags for pid, tags in sharers.items() if pid in post_ids}
+    if changed_tags:
+        # Lowest score each sharer currently keeps; a full list can only be
+        # displaced by a newcomer scoring at least that much
+        thresholds = defaultdict(list)
+        for post_id, score in RelatedPost.objects.filter(
+            post_id__in=sharers.keys() - affected
+        ).values_list("post_id", "score"):
+            thresholds[post_id].append(score)
+        for sharer_id, sharer_tags in sharers.items():
+            if sharer_id in affected:
+                continue
+            scores = thresholds[sharer_id]
+            floor = min(scores) if len(scores) >= RELATED_POSTS_LIMIT else 0.0
+            for pid, tags in changed_tags.items():
+                score = _jaccard(sharer_tags, tags)
+                if pid != sharer_id and score and score >= floor:
+                    affected.add(sharer_id)
+                    break
+
+    extra = affected - post_ids
+    if extra:
+        results.update(_compute(extra)[0])
+    _store(affected, results)
+
+
+def rebuild_related_posts():
+    """Recompute the whole table, REBUILD_BATCH_SIZE posts at a time"""
+    RelatedPost.objects.all().delete()
+    post_ids = list(
+        BlogPost.objects.filter(status="published").values_list("pk", flat=True)
+    )
+    for start in range(0, len(post_ids), REBUILD_BATCH_SIZE):
+        batch = post_ids[start:start + REBUILD_BATCH_SIZE]
+        with transaction.atomic():
+            _store(batch, _compute(batch)[0])
+    return len(post_ids)
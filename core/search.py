@@ -0,0 +1,132 @@
+"""
+Full-text search over blog posts.
+
+The backend is picked from the database vendor: SQLite uses an FTS5 table
+kept in sync from BlogPost signals, PostgreSQL uses a generated tsvector
+column with a GIN index (both created by migration 0017). Any other
+database falls back to the old icontains scan.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "core_blogpost_fts"
+
+
+class BaseSearchBackend:
+    def search(self, queryset, query):
+        """Filter ``queryset`` to posts matching ``query``, best matches first"""
+        raise NotImplementedError
+
+    def index(self, post):
+        """Add or refresh ``post`` in the index"""
+
+    def remove(self, pk):
+        """Drop the post with primary key ``pk`` from the index"""
+
+    def rebuild(self):
+        """Reindex every post from scratch"""
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    # bm25() column weights for title, excerpt and content
+    WEIGHTS = (10.0, 5.0, 1.0)
+
+    def search(self, queryset, query):
+        match = self.to_match_expression(query)
+        if not match:
+            return queryset.none()
+        weights = ", ".join(str(w) for w in self.WEIGHTS)
+        # Join the FTS table once: the MATCH runs a single time and bm25()
+        # is read from the joined row (lower is a better match)
+        return (
+            queryset.extra(
+                tables=[FTS_TABLE],
+                where=[
+                    f"{FTS_TABLE}.rowid = core_blogpost.id",
+                    f"{FTS_TABLE} MATCH %s",
+                ],
+                params=[match],
+            )
+            .annotate(search_rank=RawSQL(f"bm25({FTS_TABLE}, {weights})", ()))
+            .order_by("search_rank", "-publish_date")
+        )
+
+    @staticmethod
+    def to_match_expression(query):
+        """Turn free text into an FTS5 query: every word, prefix-matched"""
+        words = re.findall(r"\w+", query)
+        return " ".join(f'"{word}"*' for word in words)
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, excerpt, content) "
+                "VALUES (%s, %s, %s, %s)",
+                [post.pk, post.title, post.excerpt, post.content],
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, excerpt, content) "
+                "SELECT id, title, excerpt, content FROM core_blogpost"
+            )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    # The generated column keeps itself current, so index/remove/rebuild
+    # are no-ops.
+    TSQUERY = "websearch_to_tsquery('english', %s)"
+
+    def search(self, queryset, query):
+        if not query.strip():
+            return queryset.none()
+        return (
+            queryset.filter(
+                pk__in=RawSQL(
+                    "SELECT id FROM core_blogpost "
+                    f"WHERE search_vector @@ {self.TSQUERY}",
+                    (query,),
+                )
+            )
+            .annotate(
+                search_rank=RawSQL(
+                    f"ts_rank_cd(core_blogpost.search_vector, {self.TSQUERY})",
+                    (query,),
+                )
+            )
+            .order_by("-search_rank", "-publish_date")
+        )
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query)
+            | Q(content__icontains=query)
+            | Q(excerpt__icontains=query)
+        ).order_by("-publish_date")
+
+
+BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend():
+    return BACKENDS.get(connection.vendor, IContainsSearchBackend)()
+
+
+def search_blog_posts(queryset, query):
+    """Return ``queryset`` narrowed to posts matching ``query``, ranked by relevance"""
+    return get_search_backend().search(queryset, query)
@@ -0,0 +1,432 @@
+"""
+Bulk, deterministic data generation for load and benchmark runs.
+
+Seeder writes rows with bulk_create in chunks of ``chunk_size``, one
+transaction per chunk, and keeps only the primary keys of the small
+"reference" tables (users, tags, technologies, services, projects) in
+memory, so generating a million chat messages costs no more memory than a
+thousand. Every table draws from its own RNG derived from ``seed``; the same
+seed and counts always produce the same data, and changing the count of one
+table does not reshuffle the others.
+
+bulk_create bypasses model signals, so finalize() rebuilds the derived
+tables (tag counts, lead funnel, search index, related posts) and bumps the
+page cache versions once seeding is done.
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from chat.models import ChatMessage, message_id
+from chat.rooms import topic_rooms, user_conversation_room
+from projects.models import Project, ProjectCollaborator, ProjectTechnology, Technology
+from services.models import Service, ServiceReview
+
+from .caching import bump_model_version
+from .lead_funnel import rebuild_lead_funnel
+from .models import ActivityLog, BlogPost, BlogTag, Lead, TeamMember
+from .related_posts import rebuild_related_posts
+from .search import get_search_backend
+from .tag_counts import recompute_tag_post_counts
+
+WORDS = (
+    "django python web design performance cache query template layout server "
+    "client project service content blog database index request response page "
+    "deploy render static media search user team portfolio pricing lead quote "
+    "mobile responsive hosting domain analytics conversion marketing brand"
+).split()
+
+TECHNOLOGIES = [
+    "Python", "Django", "JavaScript", "React", "Vue.js", "Tailwind CSS", "PostgreSQL",
+    "SQLite", "Redis", "Docker", "AWS", "Node.js", "TypeScript", "HTML5", "CSS3",
+]
+
+HISTORY_DAYS = 365
+
+
+@contextmanager
+def manual_timestamps(*models):
+    """Let bulk_create keep the generated created_at/updated_at values"""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Seeder:
+    def __init__(self, seed=42, chunk_size=5000, prefix="seed", log=None):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.user_ids = []
+        self.staff_ids = []
+        self.tag_ids = []
+        self.technology_ids = []
+        self.service_ids = []
+        self.project_ids = []
+        self.timings = {}
+
+    # --- Helpers ---
+
+    def rng(self, table):
+        return random.Random(f"{self.seed}:{table}")
+
+    def chunks(self, total):
+        for start in range(0, total, self.chunk_size):
+            yield start, min(start + self.chunk_size, total)
+
+    def past(self, rng, days=HISTORY_DAYS):
+        return self.now - timedelta(seconds=rng.randrange(days * 86400))
+
+    @staticmethod
+    def text(rng, low, high):
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+    def insert(self, table, total, build):
+        """
+        Create ``total`` rows of ``table`` in chunks. ``build(rng, start, stop)``
+        returns ``[(model, objs), ...]`` to insert, in dependency order, for
+        one chunk.
+        """
+        rng = self.rng(table)
+        started = time.perf_counter()
+        for start, stop in self.chunks(total):
+            with transaction.atomic():
+                for model, objs in build(rng, start, stop):
+                    with manual_timestamps(model):
+                        model.objects.bulk_create(objs, batch_size=self.chunk_size)
+        elapsed = time.perf_counter() - started
+        self.timings[table] = (total, elapsed)
+        self.log(f"{table}: {total} rows in {elapsed:.1f}s")
+
+    # --- Tables ---
+
+    def users(self, count, staff_ratio=0.1):
+        def build(rng, start, stop):
+            users = []
+            for i in range(start, stop):
+                joined = self.past(rng, HISTORY_DAYS * 2)
+                users.append(User(
+                    username=f"{self.prefix}-user-{i}",
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    email=f"{self.prefix}-user-{i}@example.com",
+                    password="!",  # unusable
+                    is_staff=rng.random() < staff_ratio,
+                    date_joined=joined,
+                ))
+            yield User, users
+            self.user_ids.extend(user.pk for user in users)
+            self.staff_ids.extend(user.pk for user in users if user.is_staff)
+            yield TeamMember, [
+                TeamMember(
+                    user_id=user.pk, name=user.get_full_name(), position="Developer",
+                    bio=self.text(rng, 20, 60), created_at=user.date_joined,
+                    updated_at=user.date_joined,
+                )
+                for user in users if user.is_staff
+            ]
+
+        self.insert("users", count, build)
+        if not self.staff_ids and self.user_ids:
+            # Posts and leads need at least one staff author
+            User.objects.filter(pk=self.user_ids[0]).update(is_staff=True)
+            self.staff_ids.append(self.user_ids[0])
+
+    def load_existing_users(self, limit=1000):
+        """Fall back to users already in the database when none were generated"""
+        if not self.user_ids:
+            self.user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True)[:limit])
+        if not self.staff_ids:
+            self.staff_ids = list(
+                User.objects.filter(is_staff=True).order_by("pk").values_list("pk", flat=True)[:limit]
+            )
+
+    def tags(self, count):
+        def build(rng, start, stop):
+            tags = [
+                BlogTag(
+                    name=f"{self.prefix.title()} Topic {i}", slug=f"{self.prefix}-topic-{i}",
+                    category=rng.choice(BlogTag.CATEGORY_CHOICES)[0],
+                )
+                for i in range(start, stop)
+            ]
+            yield BlogTag, tags
+            self.tag_ids.extend(tag.pk for tag in tags)
+
+        self.insert("tags", count, build)
+
+    def technologies(self):
+        Technology.objects.bulk_create(
+            [Technology(name=name, slug=slugify(name), icon="fas fa-code") for name in TECHNOLOGIES],
+            ignore_conflicts=True,
+        )
+        self.technology_ids = list(
+            Technology.objects.filter(name__in=TECHNOLOGIES).values_list("pk", flat=True)
+        )
+
+    def posts(self, count, tags_per_post=(1, 4)):
+        PostTag = BlogPost.tags.through
+
+        def build(rng, start, stop):
+            posts = []
+            for i in range(start, stop):
+                content = self.text(rng, 150, 1500)
+                created = self.past(rng)
+                status = "published" if rng.random() < 0.85 else rng.choice(["draft", "archived"])
+                posts.append(BlogPost(
+                    title=f"{self.text(rng, 3, 8).capitalize()} {i}",
+                    slug=f"{self.prefix}-post-{i}",
+                    content=content,
+                    excerpt=self.text(rng, 10, 30)[:300],
+                    author_id=rng.choice(self.staff_ids),
+                    status=status,
+                    is_featured=rng.random() < 0.05,
+                    publish_date=created if status == "published" else None,
+                    read_time=max(1, len(content.split()) // 200),
+                    views=int(rng.paretovariate(1.2) * 10),
+                    created_at=created,
+                    updated_at=created,
+                ))
+            yield BlogPost, posts
+            if self.tag_ids:
+                yield PostTag, [
+                    PostTag(blogpost_id=post.pk, blogtag_id=tag_id)
+                    for post in posts
+                    for tag_id in rng.sample(
+                        self.tag_ids, min(len(self.tag_ids), rng.randint(*tags_per_post))
+                    )
+                ]
+
+        self.insert("posts", count if self.staff_ids else 0, build)
+
+    def services(self, count):
+        def build(rng, start, stop):
+            services = [
+                Service(
+                    name=f"{self.prefix.title()} Service {i}",
+                    slug=f"{self.prefix}-service-{i}",
+                    category=rng.choice(Service.SERVICE_CATEGORY_CHOICES)[0],
+                    short_description=self.text(rng, 5, 12)[:255],
+                    description=self.text(rng, 40, 120),
+                    base_price=Decimal(rng.randrange(100, 10000)),
+                    display_order=i,
+                    created_at=self.now,
+                    updated_at=self.now,
+                )
+                for i in range(start, stop)
+            ]
+            yield Service, services
+            self.service_ids.extend(service.pk for service in services)
+
+        self.insert("services", count, build)
+
+    def reviews(self, count):
+        def build(rng, start, stop):
+            yield ServiceReview, [
+                ServiceReview(
+                    service_id=rng.choice(self.service_ids),
+                    user_id=rng.choice(self.user_ids),
+                    rating=rng.choices(range(1, 6), weights=(1, 1, 3, 8, 12))[0],
+                    comment=self.text(rng, 5, 40),
+                    created_at=self.past(rng),
+                )
+                for _ in range(start, stop)
+            ]
+
+        self.insert("reviews", count if self.service_ids and self.user_ids else 0, build)
+
+    def projects(self, count, technologies_per_project=(2, 5), collaborators_per_project=(0, 3)):
+        roles = [role for role, _ in ProjectCollaborator.ROLE_CHOICES]
+
+        def build(rng, start, stop):
+            projects = []
+            for i in range(start, stop):
+                created = self.past(rng, HISTORY_DAYS * 2)
+                status = rng.choice(Project.PROJECT_STATUS_CHOICES)[0]
+                projects.append(Project(
+                    title=f"{self.text(rng, 2, 5).title()} {i}",
+                    slug=f"{self.prefix}-project-{i}",
+                    client_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    client_email=f"{self.prefix}-client-{i}@example.com",
+                    organization_name=f"{rng.choice(LAST_NAMES)} {rng.choice(ORG_SUFFIXES)}",
+                    description=self.text(rng, 40, 200),
+                    project_type=rng.choice(Project.PROJECT_TYPE_CHOICES)[0],
+                    status=status,
+                    start_date=created.date(),
+                    completed_date=(created + timedelta(days=rng.randint(14, 120))).date()
+                    if status == "completed" else None,
+                    budget=Decimal(rng.randrange(500, 50000)),
+                    is_featured=rng.random() < 0.1,
+                    created_at=created,
+                    updated_at=created,
+                ))
+            yield Project, projects
+            self.project_ids.extend(project.pk for project in projects)
+            yield ProjectTechnology, [
+                ProjectTechnology(project_id=project.pk, technology_id=technology_id)
+                for project in projects
+                for technology_id in rng.sample(
+                    self.technology_ids,
+                    min(len(self.technology_ids), rng.randint(*technologies_per_project)),
+                )
+            ]
+            collaborators = []
+            for project in projects:
+                picked = rng.sample(
+                    self.staff_ids, min(len(self.staff_ids), rng.randint(*collaborators_per_project))
+                )
+                collaborators.extend(
+                    ProjectCollaborator(
+                        project_id=project.pk, user_id=user_id, role=rng.choice(roles),
+                        is_lead=position == 0, added_at=project.created_at,
+                    )
+                    for position, user_id in enumerate(picked)
+                )
+            yield ProjectCollaborator, collaborators
+
+        self.insert("projects", count, build)
+
+    def leads(self, count):
+        statuses = [status for status, _ in Lead.LEAD_STATUS]
+        sources = [source for source, _ in Lead.LEAD_SOURCE]
+
+        def build(rng, start, stop):
+            leads = []
+            for i in range(start, stop):
+                created = self.past(rng)
+                leads.append(Lead(
+                    name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    email=f"{self.prefix}-lead-{i}@example.com",
+                    company=f"{rng.choice(LAST_NAMES)} {rng.choice(ORG_SUFFIXES)}",
+                    budget=Decimal(rng.randrange(500, 50000)),
+                    source=rng.choice(sources),
+                    # Most leads never leave the top of the funnel
+                    status=rng.choices(statuses, weights=range(len(statuses), 0, -1))[0],
+                    assigned_to_id=rng.choice(self.staff_ids) if self.staff_ids and rng.random() < 0.5 else None,
+                    message=self.text(rng, 10, 60),
+                    created_at=created,
+                    updated_at=created,
+                ))
+            yield Lead, leads
+
+        self.insert("leads", count, build)
+
+    def activity_logs(self, count):
+        actions = ["Created project", "Updated project", "Uploaded file", "Left comment",
+                   "Changed status", "Added collaborator", "Sent invoice"]
+
+        def build(rng, start, stop):
+            yield ActivityLog, [
+                ActivityLog(
+                    user_id=rng.choice(self.staff_ids) if self.staff_ids else None,
+                    project_logs_id=rng.choice(self.project_ids) if self.project_ids else None,
+                    action=rng.choice(actions),
+                    details=self.text(rng, 5, 25),
+                    created_at=self.past(rng),
+                )
+                for _ in range(start, stop)
+            ]
+
+        self.insert("activity_logs", count, build)
+
+    def chat_messages(self, count, topic_share=0.2, staff_reply_share=0.4):
+        topics = sorted(topic_rooms())
+        usernames = dict(User.objects.filter(pk__in=self.user_ids).values_list("pk", "username"))
+        last_seq = 0
+
+        def build(rng, start, stop):
+            nonlocal last_seq
+            # Ordered in time, like a real conversation
+            span = HISTORY_DAYS * 86400 / max(count, 1)
+            first = self.now - timedelta(days=HISTORY_DAYS)
+            messages = []
+            for i in range(start, stop):
+                if topics and rng.random() < topic_share:
+                    room, sender = rng.choice(topics), rng.choice(self.user_ids)
+                else:
+                    # A visitor's conversation: the visitor or a staff member replying
+                    visitor = rng.choice(self.user_ids)
+                    room = user_conversation_room(visitor)
+                    replies = self.staff_ids and rng.random() < staff_reply_share
+                    sender = rng.choice(self.staff_ids) if replies else visitor
+                timestamp = first + timedelta(seconds=i * span)
+                # Ids as the consumer assigns them, from the (back-dated) time;
+                # tag 0 is the last the shared counter hands out (chat.models.worker_tag)
+                last_seq = max(message_id(int(timestamp.timestamp() * 1000), 0), last_seq + 0x400)
+                messages.append(ChatMessage(
+                    user_id=sender,
+                    username=usernames[sender],
+                    room=room,
+                    seq=last_seq,
+                    message=self.text(rng, 1, 30),
+                    timestamp=timestamp,
+                ))
+            yield ChatMessage, messages
+
+        self.insert("chat_messages", count if self.user_ids else 0, build)
+
+    # --- Orchestration ---
+
+    def run(self, users=100, tags=40, posts=2000, services=20, reviews=2000,
+            projects=500, leads=100_000, activity_logs=100_000, chat_messages=100_000):
+        self.users(users)
+        self.load_existing_users()
+        self.tags(tags)
+        self.technologies()
+        self.posts(posts)
+        self.services(services)
+        self.reviews(reviews)
+        self.projects(projects)
+        self.leads(leads)
+        self.activity_logs(activity_logs)
+        self.chat_messages(chat_messages)
+
+    def finalize(self, related_posts=True):
+        """Rebuild what the skipped signals would have maintained"""
+        started = time.perf_counter()
+        recompute_tag_post_counts()
+        rebuild_lead_funnel()
+        get_search_backend().rebuild()
+        if related_posts:
+            rebuild_related_posts()
+        # Fresh planner statistics (also feeds core.pagination.estimate_count)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        for model in (User, BlogPost, Project, ProjectTechnology, Service, ServiceReview, TeamMember):
+            bump_model_version(model)
+        elapsed = time.perf_counter() - started
+        self.timings["derived tables"] = (None, elapsed)
+        self.log(f"derived tables rebuilt in {elapsed:.1f}s")
+
+
+FIRST_NAMES = [
+    "Amina", "Ben", "Chen", "Dara", "Elena", "Farid", "Grace", "Hugo", "Ines", "Jonas",
+    "Kofi", "Lena", "Mateo", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sami", "Tara",
+]
+
+LAST_NAMES = [
+    "Adeyemi", "Baker", "Costa", "Dubois", "Evans", "Fischer", "Garcia", "Hansen",
+    "Ibrahim", "Jensen", "Kim", "Larsen", "Mensah", "Novak", "Okafor", "Patel",
+]
+
+ORG_SUFFIXES = ["Ltd", "Group", "Studio", "Clinic", "Academy", "Partners", "Labs", "Foundation"]
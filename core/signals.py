@@ -0,0 +1,319 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from projects.models import Project, ProjectTechnology, Technology
+from services.models import Service, ServiceRequest, ServiceReview
+
+from .caching import bump_model_version, invalidate_site_settings
+from .lead_funnel import adjust_lead_funnel
+from .models import (
+    FAQ,
+    ActivityLog,
+    Announcement,
+    BlogPost,
+    ContactMessage,
+    ConversionTracking,
+    Lead,
+    Quote,
+    QuoteService,
+    RelatedPost,
+    SiteSetting,
+    TeamMember,
+    Testimonial,
+)
+from .quote_totals import flush_quote_totals, queue_quote_totals
+from .related_posts import refresh_related_posts
+from .search import get_search_backend
+from .tag_counts import adjust_tag_post_counts
+from .tech_facets import facet_index
+
+
+@receiver(post_save, sender=SiteSetting)
+@receiver(post_delete, sender=SiteSetting)
+def site_setting_changed(sender, **kwargs):
+    """Invalidate cached site settings whenever the row changes"""
+    # After the commit, or a request reading the old row meanwhile would
+    # cache it again (see versioned_model_changed)
+    transaction.on_commit(invalidate_site_settings)
+
+
+# Models whose version counter keys the page cache, admin snapshot and
+# cached paginator counts
+VERSIONED_MODELS = [
+    Service,
+    Testimonial,
+    TeamMember,
+    Project,
+    FAQ,
+    BlogPost,
+    get_user_model(),
+    ContactMessage,
+    Announcement,
+    ServiceReview,
+    ServiceRequest,
+    # Rendered in base.html on every cached page
+    SiteSetting,
+    # Cached admin changelist counts (core.pagination.CachedCountPaginator)
+    ActivityLog,
+    Lead,
+    ConversionTracking,
+]
+
+
+def versioned_model_changed(sender, **kwargs):
+    """Bump the model's version counter so dependent cached pages go stale"""
+    # Wait for the commit so a concurrent request cannot cache old rows
+    # under the new version
+    transaction.on_commit(lambda: bump_model_version(sender))
+
+
+def blog_post_tags_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        transaction.on_commit(lambda: bump_model_version(BlogPost))
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(versioned_model_changed, sender=model)
+    post_delete.connect(versioned_model_changed, sender=model)
+m2m_changed.connect(blog_post_tags_changed, sender=BlogPost.tags.through)
+
+
+# --- Lead funnel counters ---
+
+
+@receiver(post_init, sender=Lead)
+def remember_lead_funnel_key(sender, instance, **kwargs):
+    """Keep the loaded (status, source) so saves can move the lead between counters"""
+    # Read __dict__ so deferred fields are not fetched one query per instance
+    instance._funnel_key = (
+        instance.__dict__.get("status"),
+        instance.__dict__.get("source"),
+    )
+
+
+@receiver(pre_save, sender=Lead)
+def load_lead_funnel_key(sender, instance, **kwargs):
+    if instance._state.adding or None not in instance._funnel_key:
+        return
+    instance._funnel_key = (
+        Lead.objects.filter(pk=instance.pk).values_list("status", "source").first()
+        or instance._funnel_key
+    )
+
+
+@receiver(post_save, sender=Lead)
+def lead_saved(sender, instance, created, **kwargs):
+    new_key = (instance.status, instance.source)
+    if created:
+        adjust_lead_funnel(*new_key, 1)
+    elif new_key != instance._funnel_key:
+        adjust_lead_funnel(*instance._funnel_key, -1)
+        adjust_lead_funnel(*new_key, 1)
+    instance._funnel_key = new_key
+
+
+@receiver(post_delete, sender=Lead)
+def lead_deleted(sender, instance, **kwargs):
+    adjust_lead_funnel(*instance._funnel_key, -1)
+
+
+# --- BlogTag.post_count ---
+
+
+@receiver(post_init, sender=BlogPost)
+def remember_blog_post_status(sender, instance, **kwargs):
+    instance._original_status = instance.__dict__.get("status")
+
+
+@receiver(pre_save, sender=BlogPost)
+def load_blog_post_status(sender, instance, **kwargs):
+    if instance._state.adding or instance._original_status is not None:
+        return
+    instance._original_status = (
+        BlogPost.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=BlogPost)
+def blog_post_status_changed(sender, instance, created, **kwargs):
+    """Update tag counts and related posts when a post is (un)published"""
+    was_published = not created and instance._original_status == "published"
+    is_published = instance.status == "published"
+    instance._original_status = instance.status
+    if created or was_published == is_published:
+        # Tags of a new post are attached later and handled by m2m_changed
+        return
+    tag_ids = instance.tags.values_list("pk", flat=True)
+    adjust_tag_post_counts(tag_ids, 1 if is_published else -1)
+    schedule_related_posts_refresh([instance.pk])
+
+
+@receiver(pre_delete, sender=BlogPost)
+def blog_post_deleted(sender, instance, **kwargs):
+    # Cascade deletes of the through rows do not send m2m_changed
+    if instance.status == "published":
+        adjust_tag_post_counts(instance.tags.values_list("pk", flat=True), -1)
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def blog_post_tags_counted(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # pk_set is not provided for clear(); remember what is about to go
+        if reverse:
+            instance._cleared_pks = list(
+                instance.posts.filter(status="published").values_list("pk", flat=True)
+            )
+        elif instance.status == "published":
+            instance._cleared_pks = list(instance.tags.values_list("pk", flat=True))
+        else:
+            instance._cleared_pks = []
+        return
+
+    if action == "post_clear":
+        pk_set, delta = instance._cleared_pks, -1
+    elif action in ("post_add", "post_remove"):
+        delta = 1 if action == "post_add" else -1
+    else:
+        return
+
+    if reverse:
+        # ``instance`` is a tag and ``pk_set`` holds post ids
+        published = pk_set
+        if action != "post_clear":
+            published = BlogPost.objects.filter(
+                pk__in=pk_set, status="published"
+            ).values_list("pk", flat=True)
+        adjust_tag_post_counts([instance.pk], delta * len(published))
+    elif action == "post_clear" or instance.status == "published":
+        adjust_tag_post_counts(pk_set, delta)
+
+
+# --- Blog search index ---
+
+
+@receiver(post_save, sender=BlogPost)
+def index_blog_post(sender, instance, **kwargs):
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=BlogPost)
+def unindex_blog_post(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+# --- Related posts ---
+
+
+def schedule_related_posts_refresh(post_ids):
+    post_ids = list(post_ids)
+    if post_ids:
+        transaction.on_commit(lambda: refresh_related_posts(post_ids))
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+def blog_post_tags_related(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        instance._cleared_post_pks = list(instance.posts.values_list("pk", flat=True))
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        schedule_related_posts_refresh([instance.pk])
+    elif action == "post_clear":
+        schedule_related_posts_refresh(instance._cleared_post_pks)
+    else:
+        schedule_related_posts_refresh(pk_set)
+
+
+@receiver(pre_delete, sender=BlogPost)
+def blog_post_related_deleted(sender, instance, **kwargs):
+    """Refill the lists the deleted post is about to drop out of"""
+    schedule_related_posts_refresh(
+        RelatedPost.objects.filter(related=instance).values_list("post_id", flat=True)
+    )
+
+
+# --- Portfolio technology facets ---
+
+
+@receiver(post_init, sender=ProjectTechnology)
+def remember_project_technology_link(sender, instance, **kwargs):
+    instance._facet_link = (
+        instance.__dict__.get("project_id"),
+        instance.__dict__.get("technology_id"),
+    )
+
+
+@receiver(post_save, sender=ProjectTechnology)
+def project_technology_saved(sender, instance, created, **kwargs):
+    old_link = instance._facet_link
+    new_link = (instance.project_id, instance.technology_id)
+    instance._facet_link = new_link
+    if not created and old_link == new_link:
+        return
+
+    def change(index):
+        if not created and None not in old_link:
+            index.unlink(*old_link)
+        index.link(*new_link)
+
+    facet_index.apply(change)
+
+
+@receiver(post_delete, sender=ProjectTechnology)
+def project_technology_deleted(sender, instance, **kwargs):
+    link = (instance.project_id, instance.technology_id)
+    facet_index.apply(lambda index: index.unlink(*link))
+
+
+@receiver(post_save, sender=Project)
+def project_facets_changed(sender, instance, **kwargs):
+    pk, created_at, featured = instance.pk, instance.created_at, instance.is_featured
+    facet_index.apply(lambda index: index.set_project(pk, created_at, featured))
+
+
+@receiver(post_delete, sender=Project)
+def project_facets_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    facet_index.apply(lambda index: index.remove_project(pk))
+
+
+@receiver(post_save, sender=Technology)
+def technology_facet_changed(sender, instance, **kwargs):
+    facet_index.apply(lambda index: index.set_technology(instance))
+
+
+@receiver(post_delete, sender=Technology)
+def technology_facet_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    facet_index.apply(lambda index: index.remove_technology(pk))
+
+
+# --- Quote totals ---
+
+
+def schedule_quote_totals(quote_id):
+    queue_quote_totals(quote_id)
+    # Every line of an admin save lands in one recompute after the commit
+    transaction.on_commit(flush_quote_totals)
+
+
+@receiver(post_save, sender=QuoteService)
+@receiver(post_delete, sender=QuoteService)
+def quote_line_changed(sender, instance, **kwargs):
+    schedule_quote_totals(instance.quote_id)
+
+
+@receiver(post_save, sender=Quote)
+def quote_saved(sender, instance, created, **kwargs):
+    # A changed tax rate, or totals typed in by hand
+    if not created:
+        schedule_quote_totals(instance.pk)
@@ -0,0 +1,91 @@
+"""
+Unique slug allocation.
+
+allocate_slugs() reads every existing slug that could collide with the
+requested ones in a single prefix query, then hands out "base", "base-1",
+"base-2", ... in memory. Two concurrent saves can still pick the same slug;
+the unique constraint catches that and save_with_unique_slug() allocates
+again.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+SLUG_ATTEMPTS = 5
+SUFFIX_RESERVE = 6  # room left for "-NNNNN" when a title fills the field
+PREFIX_QUERY_CHUNK = 100  # bases per prefix query when allocating in bulk
+
+
+def _base_slug(model, source, field):
+    max_length = model._meta.get_field(field).max_length or 50
+    base = slugify(source or "")[: max_length - SUFFIX_RESERVE].strip("-")
+    return base or model._meta.model_name
+
+
+def allocate_slugs(model, sources, field="slug", exclude_pk=None):
+    """
+    Return one free slug per item of ``sources``, in order.
+
+    Slugs are unique among themselves and against the table (ignoring the
+    row ``exclude_pk``), with one query per PREFIX_QUERY_CHUNK distinct bases.
+    """
+    bases = [_base_slug(model, source, field) for source in sources]
+    distinct = list(dict.fromkeys(bases))
+    taken = set()
+    queryset = model._default_manager.all()
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    for start in range(0, len(distinct), PREFIX_QUERY_CHUNK):
+        chunk = distinct[start : start + PREFIX_QUERY_CHUNK]
+        prefixes = reduce(or_, (Q(**{f"{field}__startswith": base}) for base in chunk))
+        taken.update(queryset.filter(prefixes).values_list(field, flat=True))
+
+    # Next free suffix per base, starting above the highest one in use
+    next_suffix = {}
+    for base in distinct:
+        pattern = re.compile(rf"{re.escape(base)}(?:-(\d+))?")
+        suffixes = [
+            int(match.group(1) or 0)
+            for match in map(pattern.fullmatch, taken)
+            if match
+        ]
+        next_suffix[base] = max(suffixes) + 1 if suffixes else 0
+
+    slugs = []
+    for base in bases:
+        suffix = next_suffix[base]
+        next_suffix[base] += 1
+        slugs.append(f"{base}-{suffix}" if suffix else base)
+    return slugs
+
+
+def save_with_unique_slug(instance, source, save, *args, field="slug", **kwargs):
+    """
+    Give ``instance`` a free slug derived from ``source`` and ``save()`` it.
+
+    ``save`` is the model's parent save (``super().save``). If a concurrent
+    save claims the same slug first, the insert fails on the unique
+    constraint and a new slug is allocated, up to SLUG_ATTEMPTS times.
+    """
+    model = type(instance)
+    using = kwargs.get("using") or router.db_for_write(model, instance=instance)
+    for attempt in range(SLUG_ATTEMPTS):
+        (slug,) = allocate_slugs(model, [source], field, exclude_pk=instance.pk)
+        setattr(instance, field, slug)
+        try:
+            # Savepoint, so a collision does not break the caller's transaction
+            with transaction.atomic(using=using):
+                return save(*args, **kwargs)
+        except IntegrityError:
+            collided = (
+                model._default_manager.using(using)
+                .filter(**{field: slug})
+                .exclude(pk=instance.pk)
+                .exists()
+            )
+            if not collided or attempt == SLUG_ATTEMPTS - 1:
+                raise
@@ -0,0 +1,35 @@
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from .models import BlogTag
+
+
+def adjust_tag_post_counts(tag_ids, delta):
+    """Add ``delta`` to post_count of every tag in ``tag_ids`` with one UPDATE"""
+    tag_ids = list(tag_ids)
+    if not tag_ids or not delta:
+        return
+    BlogTag.objects.filter(pk__in=tag_ids).update(
+        post_count=Greatest(F("post_count") + delta, 0)
+    )
+
+
+def recompute_tag_post_counts():
+    """
+    Recount published posts for every tag with one grouped query.
+
+    Only tags whose stored count drifted are written, via bulk_update.
+    Returns the number of tags that were corrected.
+    """
+    tags = list(
+        BlogTag.objects.annotate(
+            published_count=Count("posts", filter=Q(posts__status="published"))
+        )
+    )
+    stale = []
+    for tag in tags:
+        if tag.post_count != tag.published_count:
+            tag.post_count = tag.published_count
+            stale.append(tag)
+    BlogTag.objects.bulk_update(stale, ["post_count"], batch_size=500)
+    return len(stale)
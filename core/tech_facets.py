@@ -0,0 +1,210 @@
+"""
+In-memory technology facets for the portfolio.
+
+Each process keeps a TechnologyFacetIndex: the featured projects in display
+order and, per active technology, the set of those projects using it. The
+portfolio filters (AND / OR over any number of technologies) and the count
+shown next to every facet are then plain set operations instead of a join
+per request.
+
+Signals keep the index current incrementally (see core.signals). Other
+processes notice a change through the ProjectTechnology version counter
+and rebuild on their next request; MAX_AGE bounds staleness from bulk
+writes, which send no signals.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from projects.models import Project, ProjectTechnology, Technology
+
+from .caching import bump_model_version, get_model_versions
+
+MAX_AGE = 10 * 60  # seconds
+
+MATCH_ALL = "and"
+MATCH_ANY = "or"
+
+
+@dataclass
+class Facet:
+    technology: Technology
+    count: int
+    selected: bool
+    # Slugs to filter by when this facet is clicked
+    toggle: list = field(default_factory=list)
+
+
+@dataclass
+class FacetResult:
+    project_ids: list
+    facets: list
+    selected: list
+    mode: str
+
+
+class TechnologyFacetIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._built_at = 0.0
+        self._order = []  # featured project ids, newest first
+        self._created = {}  # featured project id -> created_at
+        self._projects = {}  # technology id -> {project id, ...} (featured only)
+        self._links = {}  # project id -> {technology id, ...} (every project)
+        self._technologies = {}  # technology id -> active Technology, display order
+
+    # --- Queries ---
+
+    def query(self, slugs=(), mode=MATCH_ALL):
+        """
+        Return the featured projects matching ``slugs`` and the facet counts.
+
+        With MATCH_ALL a project must use every selected technology and a
+        facet's count is how many current results also use it. With
+        MATCH_ANY one selected technology is enough and a facet's count is
+        how many featured projects use it.
+        """
+        self.ensure_current()
+        with self._lock:
+            by_slug = {tech.slug: tech_id for tech_id, tech in self._technologies.items()}
+            selected = [slug for slug in dict.fromkeys(slugs) if slug in by_slug]
+            sets = [self._projects.get(by_slug[slug], set()) for slug in selected]
+            if not sets:
+                matches = set(self._created)
+            elif mode == MATCH_ANY:
+                matches = set().union(*sets)
+            else:
+                matches = set.intersection(*sets)
+
+            facets = []
+            for tech_id, tech in self._technologies.items():
+                projects = self._projects.get(tech_id, set())
+                count = len(projects) if mode == MATCH_ANY else len(projects & matches)
+                is_selected = tech.slug in selected
+                toggle = [s for s in selected if s != tech.slug] if is_selected else selected + [tech.slug]
+                facets.append(Facet(tech, count, is_selected, toggle))
+            project_ids = [pk for pk in self._order if pk in matches]
+        return FacetResult(project_ids, facets, selected, mode)
+
+    def technologies_for(self, project_ids):
+        """Return ``{project_id: [Technology, ...]}`` from memory"""
+        with self._lock:
+            return {
+                pk: [
+                    self._technologies[tech_id]
+                    for tech_id in self._technologies
+                    if tech_id in self._links.get(pk, ())
+                ]
+                for pk in project_ids
+            }
+
+    # --- Maintenance ---
+
+    def ensure_current(self):
+        (version,) = get_model_versions([ProjectTechnology])
+        if version != self._version or time.monotonic() - self._built_at > MAX_AGE:
+            self.rebuild(version)
+
+    def rebuild(self, version=None):
+        """Reload everything: one query per table, no joins"""
+        if version is None:
+            (version,) = get_model_versions([ProjectTechnology])
+        featured = list(
+            Project.objects.filter(is_featured=True)
+            .order_by("-created_at", "-pk")
+            .values_list("pk", "created_at")
+        )
+        technologies = Technology.objects.filter(is_active=True).order_by(
+            "category", "display_order", "name"
+        )
+        links = {}
+        for project_id, tech_id in ProjectTechnology.objects.values_list("project_id", "technology_id"):
+            links.setdefault(project_id, set()).add(tech_id)
+
+        with self._lock:
+            self._order = [pk for pk, _ in featured]
+            self._created = dict(featured)
+            self._technologies = {tech.pk: tech for tech in technologies}
+            self._links = links
+            self._projects = {}
+            for pk in self._order:
+                for tech_id in links.get(pk, ()):
+                    self._projects.setdefault(tech_id, set()).add(pk)
+            self._version = version
+            self._built_at = time.monotonic()
+
+    def link(self, project_id, tech_id):
+        with self._lock:
+            self._links.setdefault(project_id, set()).add(tech_id)
+            if project_id in self._created:
+                self._projects.setdefault(tech_id, set()).add(project_id)
+
+    def unlink(self, project_id, tech_id):
+        with self._lock:
+            self._links.get(project_id, set()).discard(tech_id)
+            self._projects.get(tech_id, set()).discard(project_id)
+
+    def set_project(self, project_id, created_at, featured):
+        with self._lock:
+            self._created.pop(project_id, None)
+            for projects in self._projects.values():
+                projects.discard(project_id)
+            if featured:
+                self._created[project_id] = created_at
+                for tech_id in self._links.get(project_id, ()):
+                    self._projects.setdefault(tech_id, set()).add(project_id)
+            self._order = sorted(
+                self._created, key=lambda pk: (self._created[pk], pk), reverse=True
+            )
+
+    def remove_project(self, project_id):
+        self.set_project(project_id, None, featured=False)
+        with self._lock:
+            self._links.pop(project_id, None)
+
+    def set_technology(self, technology):
+        with self._lock:
+            self._technologies.pop(technology.pk, None)
+            if technology.is_active:
+                self._technologies[technology.pk] = technology
+                self._technologies = dict(
+                    sorted(
+                        self._technologies.items(),
+                        key=lambda item: (item[1].category, item[1].display_order, item[1].name),
+                    )
+                )
+
+    def remove_technology(self, tech_id):
+        with self._lock:
+            self._technologies.pop(tech_id, None)
+            self._projects.pop(tech_id, None)
+            for tech_ids in self._links.values():
+                tech_ids.discard(tech_id)
+
+    def apply(self, change):
+        """
+        Apply ``change(index)`` after the transaction commits.
+
+        The shared counter is bumped so other processes rebuild. This
+        process keeps its updated copy only if nobody else bumped the
+        counter since it was built; otherwise it too rebuilds on next use.
+        """
+
+        def commit():
+            with self._lock:
+                change(self)
+                current = self._version
+            version = bump_model_version(ProjectTechnology)
+            with self._lock:
+                if current is not None and version == current + 1:
+                    self._version = version
+                else:
+                    self._version = None
+
+        transaction.on_commit(commit)
+
+
+facet_index = TechnologyFacetIndex()
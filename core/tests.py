@@ -1,3 +1,1059 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, QuerySet
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import ResolverMatch, reverse
+from django.utils import timezone
+
+from chat.models import ChatMessage
+from chat.rooms import can_join
+from projects.models import Project, ProjectTechnology, Technology
+from services.models import Service, ServiceReview
+
+from .cache_backends import SQLiteCache
+from .caching import get_site_settings, invalidate_site_settings
+from .lead_funnel import get_lead_funnel_stats, rebuild_lead_funnel
+from .middleware import QueryBudgetMiddleware
+from .models import (
+    ActivityLog,
+    Announcement,
+    BlogPost,
+    BlogTag,
+    ContactMessage,
+    Lead,
+    LeadFunnelCount,
+    Quote,
+    QuoteService,
+    RelatedPost,
+    SiteSetting,
+    TeamMember,
+)
+from .pagination import CachedCountPaginator, CursorPaginator, estimate_count
+from .query_budget import (
+    QueryBudgetExceeded,
+    get_query_stats,
+    query_budget,
+    reset_query_stats,
+)
+from .quote_numbers import next_quote_number, reserve_quote_numbers
+from .related_posts import RELATED_POSTS_LIMIT, get_related_posts, rebuild_related_posts
+from .search import search_blog_posts
+from .seeding import Seeder
+from .slugs import allocate_slugs
+from .tech_facets import MATCH_ANY, facet_index
+from .views import get_admin_base_context
+from . import view_counter
+
+
+class BlogPostForCardsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        tags = [BlogTag.objects.create(name=f"Tag {i}") for i in range(3)]
+        for i in range(6):
+            author = User.objects.create_user(f"author{i}", first_name="Card", last_name=f"Writer{i}")
+            if i % 2:
+                TeamMember.objects.create(
+                    user=author, name=f"Writer {i}", position="Writer", bio="Bio",
+                    image=f"team/writer{i}.jpg",
+                )
+            post = BlogPost.objects.create(
+                title=f"Post {i}",
+                content="Lorem ipsum",
+                excerpt="Excerpt",
+                author=author,
+                status="published",
+                is_featured=i < 3,
+                publish_date=timezone.now(),
+            )
+            post.tags.set(tags[: i % 3 + 1])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_render_in_two_queries(self):
+        # One query for posts, authors and team members, one for the tags
+        with self.assertNumQueries(2):
+            for post in BlogPost.objects.filter(status="published").for_cards():
+                post.get_author_avatar()
+                post.get_author_image()
+                list(post.tags.all())
+
+    def test_avatar_falls_back_to_initials(self):
+        post = BlogPost.objects.for_cards().get(title="Post 0")
+        with self.assertNumQueries(0):
+            self.assertIsNone(post.get_author_image())
+            self.assertEqual(post.get_author_avatar(), "CW")
+
+    def test_blog_home_query_count(self):
+        # Independent of the number of cards on the page
+        with self.assertNumQueries(7):
+            response = self.client.get(reverse("core:blog_home"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_blog_list_query_count(self):
+        # No COUNT: the listing is cursor paginated
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("core:blog_list"))
+        self.assertEqual(response.status_code, 200)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_site_setting_change_reaches_cached_home_page(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            setting = SiteSetting.objects.create(site_name="Old Name Studio")
+        first = self.client.get(reverse("home"))
+        self.assertEqual(first["X-Page-Cache"], "MISS")
+        self.assertEqual(self.client.get(reverse("home"))["X-Page-Cache"], "HIT")
+        self.assertContains(first, "Old Name Studio")
+
+        setting.site_name = "New Name Studio"
+        with self.captureOnCommitCallbacks(execute=True):
+            setting.save()
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertContains(response, "New Name Studio")
+        self.assertNotContains(response, "Old Name Studio")
+
+
+class SiteSettingsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_site_settings()
+
+    def test_invalidated_after_the_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            setting = SiteSetting.objects.create(site_name="Old Name Studio")
+        committed = SiteSetting.objects.get(pk=setting.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                setting.site_name = "New Name Studio"
+                setting.save()
+                # Another worker misses the cache and reads the committed row
+                with mock.patch.object(SiteSetting.objects, "first", return_value=committed):
+                    self.assertEqual(get_site_settings().site_name, "Old Name Studio")
+
+        self.assertEqual(get_site_settings().site_name, "New Name Studio")
+
+
+@skipUnless(connection.vendor == "sqlite", "FTS5 backend")
+class BlogSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user("searcher")
+        filler = "Notes on building websites for small businesses."
+
+        def post(title, excerpt=filler, content=filler):
+            return BlogPost.objects.create(
+                title=title, excerpt=excerpt, content=content, author=cls.author,
+                status="published", publish_date=timezone.now(),
+            )
+
+        cls.in_content = post("Shipping faster", content=f"{filler} We use Django here.")
+        cls.in_title = post("Django deployment")
+        cls.in_excerpt = post("Release notes", excerpt=f"{filler} Django upgrade.")
+        cls.unrelated = post("Optimizing images")
+
+    def search(self, query):
+        return list(search_blog_posts(BlogPost.objects.all(), query))
+
+    def test_title_matches_rank_above_excerpt_and_content(self):
+        self.assertEqual(self.search("django"), [self.in_title, self.in_excerpt, self.in_content])
+
+    def test_words_are_prefix_matched(self):
+        self.assertEqual(self.search("optim"), [self.unrelated])
+        self.assertEqual(self.search("djan depl"), [self.in_title])
+
+    def test_empty_or_punctuation_only_queries_match_nothing(self):
+        for query in ("", "   ", "!!! ???", '"*"'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [])
+
+    def test_single_query_with_one_match(self):
+        # The FTS table is joined once, not consulted per candidate row
+        with CaptureQueriesContext(connection) as captured:
+            self.search("django")
+        self.assertEqual(len(captured), 1)
+        self.assertEqual(captured[0]["sql"].count("MATCH"), 1)
+
+    def test_index_follows_save_and_delete(self):
+        self.in_title.title = "Flask deployment"
+        self.in_title.save()
+        self.assertEqual(self.search("flask"), [self.in_title])
+        self.assertNotIn(self.in_title, self.search("django"))
+
+        self.in_excerpt.delete()
+        self.assertEqual(self.search("django"), [self.in_content])
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    def setUp(self):
+        reset_query_stats()
+
+    def run_view(self, view, name="test:view"):
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            request.resolver_match = ResolverMatch(view, (), {}, url_name=name)
+            return view(request)
+
+        middleware = QueryBudgetMiddleware(get_response)
+        return middleware(RequestFactory().get("/"))
+
+    def test_records_queries_and_duplicates_per_route(self):
+        def view(request):
+            for _ in range(3):
+                list(BlogTag.objects.filter(slug="x"))
+            return HttpResponse()
+
+        self.run_view(view)
+        self.run_view(view)
+        stats = get_query_stats()["test:view"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["max_queries"], 3)
+        self.assertEqual(stats["top_duplicates"][0][1], 4)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_exceeding_budget_raises_when_strict(self):
+        @query_budget(1)
+        def view(request):
+            BlogTag.objects.count()
+            BlogTag.objects.count()
+            return HttpResponse()
+
+        with self.assertRaises(QueryBudgetExceeded):
+            self.run_view(view)
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_exceeding_budget_logs_otherwise(self):
+        @query_budget(0)
+        def view(request):
+            BlogTag.objects.count()
+            return HttpResponse()
+
+        with self.assertLogs("core.middleware", "WARNING"):
+            self.run_view(view)
+        self.assertEqual(get_query_stats()["test:view"]["over_budget"], 1)
+
+    def test_suite_runs_strict(self):
+        # Turned on by core.test_runner, not by settings.py
+        self.assertTrue(settings.QUERY_BUDGET_STRICT)
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user("writer")
+        now = timezone.now()
+        # Ties on publish_date and undated drafts exercise the pk tie breaker and NULL handling
+        for i in range(11):
+            BlogPost.objects.create(
+                title=f"Post {i}", slug=f"post-{i}", content="x", excerpt="x", author=author,
+                publish_date=None if i % 4 == 0 else now - timezone.timedelta(days=i // 2),
+            )
+        cls.expected = list(
+            BlogPost.objects.order_by(F("publish_date").desc(nulls_last=True), "-pk")
+        )
+
+    def walk(self, paginator, cursor=None, forward=True):
+        pages = []
+        page = paginator.get_page(cursor)
+        while True:
+            pages.append(list(page))
+            cursor = page.next_cursor if forward else page.previous_cursor
+            if cursor is None:
+                return pages
+            page = paginator.get_page(cursor)
+
+    def test_forward_walk_visits_every_row_once(self):
+        paginator = CursorPaginator(BlogPost.objects.all(), 3, ["-publish_date"])
+        pages = self.walk(paginator)
+        self.assertEqual([len(p) for p in pages], [3, 3, 3, 2])
+        self.assertEqual([post for page in pages for post in page], self.expected)
+
+    def test_backward_walk_returns_the_same_pages(self):
+        paginator = CursorPaginator(BlogPost.objects.all(), 3, ["-publish_date"])
+        forward = self.walk(paginator)
+        last = paginator.get_page(paginator.get_page(paginator.get_page(
+            paginator.get_page().next_cursor).next_cursor).next_cursor)
+        backward = self.walk(paginator, last.previous_cursor, forward=False)
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_bad_cursor_falls_back_to_first_page(self):
+        paginator = CursorPaginator(BlogPost.objects.all(), 3, ["-publish_date"])
+        page = paginator.get_page("not-a-cursor")
+        self.assertEqual(list(page), self.expected[:3])
+        self.assertFalse(page.has_previous())
+
+    def test_defaults_to_queryset_ordering(self):
+        user = User.objects.get(username="writer")
+        ActivityLog.objects.bulk_create(ActivityLog(user=user, action=f"a{i}") for i in range(5))
+        queryset = ActivityLog.objects.order_by("-created_at")
+        pages = self.walk(CursorPaginator(queryset, 2))
+        self.assertEqual([log for page in pages for log in page], list(queryset.order_by("-created_at", "-pk")))
+
+
+class CachedCountPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Lead.objects.bulk_create(Lead(name=f"Lead {i}", email=f"l{i}@example.com") for i in range(30))
+
+    def test_count_is_cached_per_filter(self):
+        queryset = Lead.objects.filter(status="new")
+        self.assertEqual(CachedCountPaginator(queryset, 10).count, 30)
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedCountPaginator(queryset, 10).count, 30)
+        self.assertEqual(CachedCountPaginator(Lead.objects.filter(status="won"), 10).count, 0)
+
+    def test_saving_a_row_invalidates_the_count(self):
+        queryset = Lead.objects.all()
+        self.assertEqual(CachedCountPaginator(queryset, 10).count, 30)
+        with self.captureOnCommitCallbacks(execute=True):
+            Lead.objects.create(name="New", email="new@example.com")
+        self.assertEqual(CachedCountPaginator(queryset, 10).count, 31)
+
+    def test_large_tables_use_the_planner_estimate(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("sqlite_stat1 only")
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.assertIsNone(estimate_count(Lead.objects.all()))
+        self.assertEqual(estimate_count(Lead.objects.all(), threshold=10), 30)
+        # SQLite cannot estimate a filtered query
+        self.assertIsNone(estimate_count(Lead.objects.filter(status="new"), threshold=10))
+
+        paginator = CachedCountPaginator(Lead.objects.all(), 10)
+        paginator.estimate_threshold = 10
+        self.assertEqual(paginator.count, 30)
+        self.assertTrue(paginator.count_is_estimate)
+
+
+class TechnologyFacetIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tech = {
+            slug: Technology.objects.create(name=slug.title(), slug=slug, icon="fa-code")
+            for slug in ("django", "react", "postgres")
+        }
+        self.projects = {}
+        for name, featured, techs in [
+            ("one", True, ["django", "react"]),
+            ("two", True, ["django", "postgres"]),
+            ("three", True, ["react"]),
+            ("hidden", False, ["django"]),
+        ]:
+            project = Project.objects.create(
+                title=name, client_name="C", client_email="c@example.com",
+                organization_name="Org", description="d", is_featured=featured,
+            )
+            for slug in techs:
+                ProjectTechnology.objects.create(project=project, technology=self.tech[slug])
+            self.projects[name] = project
+        facet_index.rebuild()
+
+    def ids(self, *names):
+        return {self.projects[name].pk for name in names}
+
+    def counts(self, result):
+        return {facet.technology.slug: facet.count for facet in result.facets}
+
+    def test_match_all(self):
+        with self.assertNumQueries(0):
+            result = facet_index.query(["django", "react", "unknown"])
+        self.assertEqual(set(result.project_ids), self.ids("one"))
+        self.assertEqual(result.selected, ["django", "react"])
+        self.assertEqual(self.counts(result), {"django": 1, "react": 1, "postgres": 0})
+
+    def test_match_any(self):
+        result = facet_index.query(["react", "postgres"], MATCH_ANY)
+        self.assertEqual(set(result.project_ids), self.ids("one", "two", "three"))
+        # Unfeatured projects are never counted
+        self.assertEqual(self.counts(result), {"django": 2, "react": 2, "postgres": 1})
+        react = next(f for f in result.facets if f.technology.slug == "react")
+        self.assertEqual(react.toggle, ["postgres"])
+
+    def test_changes_are_applied_incrementally(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectTechnology.objects.create(project=self.projects["three"], technology=self.tech["postgres"])
+            ProjectTechnology.objects.filter(project=self.projects["two"]).delete()
+            self.projects["hidden"].is_featured = True
+            self.projects["hidden"].save()
+        with self.assertNumQueries(0):
+            self.assertEqual(set(facet_index.query(["postgres"]).project_ids), self.ids("three"))
+            self.assertEqual(set(facet_index.query(["django"]).project_ids), self.ids("one", "hidden"))
+
+    def test_portfolio_view(self):
+        response = self.client.get(reverse("core:portfolio_list"), {"tech": ["django", "react"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.pk for p in response.context["projects"]], [self.projects["one"].pk])
+        self.assertEqual(
+            [t.slug for t in response.context["projects"][0].facet_technologies], ["django", "react"]
+        )
+
+
+class SlugAllocatorTests(TestCase):
+    def make_project(self, title, **kwargs):
+        return Project.objects.create(
+            title=title, client_name="C", client_email="c@example.com",
+            organization_name="Org", description="d", **kwargs,
+        )
+
+    def test_one_query_for_a_batch(self):
+        BlogTag.objects.create(name="Python")
+        BlogTag.objects.create(name="Python tips", slug="python-3")
+        with self.assertNumQueries(1):
+            slugs = allocate_slugs(BlogTag, ["Python", "python", "Go", "", "Pythonic"])
+        self.assertEqual(slugs, ["python-4", "python-5", "go", "blogtag", "pythonic"])
+
+    def test_save_picks_the_next_suffix(self):
+        slugs = [self.make_project("Clinic Site").slug for _ in range(3)]
+        self.assertEqual(slugs, ["clinic-site", "clinic-site-1", "clinic-site-2"])
+        self.assertEqual(Technology.objects.create(name="Vue.js", icon="x").slug, "vuejs")
+        self.assertEqual(Technology.objects.create(name="Vue js", icon="x").slug, "vue-js")
+
+    def test_retries_when_a_concurrent_save_took_the_slug(self):
+        self.make_project("Race")
+        with mock.patch("core.slugs.allocate_slugs", side_effect=[["race"], ["race-1"]]):
+            project = self.make_project("Race")
+        self.assertEqual(project.slug, "race-1")
+
+    def test_generate_project_slugs_command(self):
+        self.make_project("Shop")
+        for _ in range(2):
+            self.make_project("Shop", slug="placeholder-%s" % Project.objects.count())
+        Project.objects.exclude(slug="shop").update(slug=None)
+        call_command("generate_project_slugs", stdout=StringIO())
+        self.assertEqual(
+            sorted(Project.objects.values_list("slug", flat=True)), ["shop", "shop-1", "shop-2"]
+        )
+
+
+class QuoteNumberTests(TestCase):
+    def make_quote(self, **kwargs):
+        return Quote.objects.create(
+            client_name="C", client_email="c@example.com", valid_until=timezone.now().date(), **kwargs
+        )
+
+    def test_numbers_increase_without_reading_quotes(self):
+        year = timezone.now().year
+        self.assertEqual(self.make_quote().quote_number, f"Q{year}001")
+        with self.assertNumQueries(1):
+            self.assertEqual(next_quote_number(), f"Q{year}002")
+        self.assertEqual(self.make_quote().quote_number, f"Q{year}003")
+
+    def test_sequence_continues_past_999(self):
+        self.make_quote(quote_number="Q2030999")
+        self.make_quote(quote_number="Q2030998")
+        self.assertEqual(next_quote_number(2030), "Q20301000")
+        self.assertEqual(next_quote_number(2030), "Q20301001")
+
+    def test_block_reservation(self):
+        self.assertEqual(
+            reserve_quote_numbers(3, 2031), ["Q2031001", "Q2031002", "Q2031003"]
+        )
+        self.assertEqual(next_quote_number(2031), "Q2031004")
+        self.assertEqual(reserve_quote_numbers(0, 2031), [])
+
+
+class QuoteTotalsTests(TestCase):
+    def setUp(self):
+        self.service = Service.objects.create(
+            name="Site", category="web_design", short_description="s", description="d", base_price=100
+        )
+        self.quote = Quote.objects.create(
+            client_name="C", client_email="c@example.com",
+            valid_until=timezone.now().date(), tax_rate=Decimal("7.50"),
+        )
+
+    def add_line(self, quantity, unit_price, discount=0):
+        return QuoteService.objects.create(
+            quote=self.quote, service=self.service, quantity=quantity,
+            unit_price=Decimal(unit_price), discount_percentage=Decimal(discount),
+        )
+
+    def assertTotals(self, subtotal, tax, total):
+        self.quote.refresh_from_db()
+        self.assertEqual(
+            (self.quote.subtotal, self.quote.tax_amount, self.quote.total_amount),
+            (Decimal(subtotal), Decimal(tax), Decimal(total)),
+        )
+
+    def test_lines_roll_up_once_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.add_line(2, "100.00")
+            line = self.add_line(1, "33.33", discount=10)
+        self.assertEqual(line.total_price, Decimal("30.00"))
+        # One grouped aggregate, one read of the quote, one update
+        with self.assertNumQueries(3):
+            for callback in callbacks:
+                callback()
+        self.assertTotals("230.00", "17.25", "247.25")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            line.delete()
+        self.assertTotals("200.00", "15.00", "215.00")
+
+    def test_tax_rate_change_updates_totals(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_line(1, "80.00")
+            self.quote.tax_rate = Decimal("0")
+            self.quote.save()
+        self.assertTotals("80.00", "0.00", "80.00")
+
+    def test_reprice_command(self):
+        self.add_line(3, "10.00", discount=50)
+        QuoteService.objects.update(total_price=0)
+        Quote.objects.update(subtotal=1, tax_amount=1, total_amount=1)
+        out = StringIO()
+        call_command("reprice_quotes", "--lines", stdout=out)
+        self.assertIn("1 totals corrected, 1 line totals corrected", out.getvalue())
+        self.assertTotals("15.00", "1.13", "16.13")
+
+
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user("viewed")
+        cls.posts = [
+            BlogPost.objects.create(
+                title=f"Viewed {i}", content="Body", author=author,
+                status="published", publish_date=timezone.now(), views=10,
+            )
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        view_counter._buffer.clear()
+        # Push only when asked to
+        patcher = mock.patch.multiple(view_counter, PUSH_INTERVAL=3600, PUSH_THRESHOLD=10**6)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def views(self):
+        return dict(BlogPost.objects.values_list("pk", "views"))
+
+    def test_views_are_buffered_then_pushed(self):
+        first, second = self.posts[:2]
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                view_counter.record_view(first)
+            view_counter.record_view(second)
+        self.assertIsNone(cache.get(view_counter.COUNTER_KEY.format(first.pk)))
+
+        view_counter.push_buffered_views()
+        self.assertEqual(cache.get(view_counter.COUNTER_KEY.format(first.pk)), 3)
+        self.assertEqual(cache.get(view_counter.COUNTER_KEY.format(second.pk)), 1)
+        self.assertEqual(self.views()[first.pk], 10)
+
+    def test_flush_adds_exactly_the_pending_views(self):
+        first, second = self.posts[:2]
+        for _ in range(4):
+            view_counter.record_view(first)
+        view_counter.push_buffered_views()
+        view_counter.record_view(first)
+        view_counter.record_view(second)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(view_counter.flush_post_views(), 6)
+        # Only the viewed posts are touched: no scan of every post
+        self.assertFalse([q for q in captured if q["sql"].startswith("SELECT")])
+        views = self.views()
+        self.assertEqual((views[first.pk], views[second.pk]), (15, 11))
+        self.assertEqual([views[p.pk] for p in self.posts[2:]], [10, 10, 10])
+
+        # Nothing pending: a second flush writes nothing
+        self.assertEqual(view_counter.flush_post_views(), 0)
+        self.assertEqual(self.views()[first.pk], 15)
+
+    def test_views_recorded_during_a_flush_are_kept(self):
+        post = self.posts[0]
+        for _ in range(2):
+            view_counter.record_view(post)
+        key = view_counter.COUNTER_KEY.format(post.pk)
+        update = QuerySet.update
+
+        def update_while_viewed(queryset, **kwargs):
+            # Another worker pushes views between the read and the decrement
+            cache.incr(key, 3)
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, "update", update_while_viewed):
+            self.assertEqual(view_counter.flush_post_views(), 2)
+        self.assertEqual(cache.get(key), 3)
+        self.assertEqual(self.views()[post.pk], 12)
+
+        # Their dirty key is not written yet; the post's next push flushes them
+        view_counter.record_view(post)
+        self.assertEqual(view_counter.flush_post_views(), 4)
+        self.assertEqual(self.views()[post.pk], 16)
+
+    def test_flush_runs_off_the_request(self):
+        with mock.patch.object(view_counter, "PUSH_THRESHOLD", 1), \
+                mock.patch.object(view_counter, "start_background_flush") as start, \
+                mock.patch.object(view_counter, "flush_post_views") as flush:
+            view_counter.record_view(self.posts[0])
+            view_counter.record_view(self.posts[0])
+        # Once per FLUSH_INTERVAL, and never inline
+        start.assert_called_once_with()
+        flush.assert_not_called()
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, "cache.sqlite3")
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {"TIMEOUT": 300, "OPTIONS": options})
+
+    def test_get_set_add(self):
+        self.assertIsNone(self.cache.get("missing"))
+        self.assertEqual(self.cache.get("missing", "default"), "default")
+        self.cache.set("key", {"a": [1, 2]})
+        self.assertEqual(self.cache.get("key"), {"a": [1, 2]})
+        self.assertFalse(self.cache.add("key", "other"))
+        self.assertEqual(self.cache.get("key"), {"a": [1, 2]})
+        self.assertTrue(self.cache.add("new", "value"))
+        self.assertEqual(self.cache.get_many(["key", "new", "missing"]), {"key": {"a": [1, 2]}, "new": "value"})
+        self.assertTrue(self.cache.has_key("new"))
+
+    def test_incr_and_decr(self):
+        self.cache.set("counter", 5)
+        self.assertEqual(self.cache.incr("counter"), 6)
+        self.assertEqual(self.cache.incr("counter", 10), 16)
+        self.assertEqual(self.cache.decr("counter", 4), 12)
+        self.assertEqual(self.cache.get("counter"), 12)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+    def test_expiry(self):
+        self.cache.set("short", "value", 0.05)
+        self.cache.set("forever", "value", None)
+        self.assertEqual(self.cache.get("short"), "value")
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("short"))
+        self.assertFalse(self.cache.has_key("short"))
+        with self.assertRaises(ValueError):
+            self.cache.incr("short")
+        # An expired key can be added again
+        self.assertTrue(self.cache.add("short", "again"))
+        self.assertEqual(self.cache.get("forever"), "value")
+
+    def test_culling_at_max_entries(self):
+        cache = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        for i in range(10):
+            cache.set(f"key{i}", i, 100 + i)
+        cache.set("permanent", "kept", None)
+        # Half the entries went, those closest to expiry first
+        self.assertEqual(cache.get_stats()["entries"], 6)
+        self.assertEqual(cache.get_many([f"key{i}" for i in range(10)]), {f"key{i}": i for i in range(5, 10)})
+        self.assertEqual(cache.get("permanent"), "kept")
+
+    def test_delete_many_and_clear(self):
+        self.cache.set_many({"a": 1, "b": 2, "c": 3})
+        self.assertTrue(self.cache.delete("a"))
+        self.assertFalse(self.cache.delete("a"))
+        self.cache.delete_many(["b", "missing"])
+        self.assertEqual(self.cache.get_many(["a", "b", "c"]), {"c": 3})
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("c"))
+
+    def test_connections_share_the_file(self):
+        # Like two worker processes opening the same location
+        other = self.make_cache()
+        self.cache.set("shared", "from first")
+        self.assertEqual(other.get("shared"), "from first")
+        other.set("count", 1)
+        self.cache.incr("count", 2)
+        self.assertEqual(other.get("count"), 3)
+        other.delete("shared")
+        self.assertIsNone(self.cache.get("shared"))
+
+
+class TagPostCountTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user("tagger")
+        self.tags = [BlogTag.objects.create(name=f"Counted {i}") for i in range(3)]
+
+        def post(title, status):
+            return BlogPost.objects.create(
+                title=title, content="Body", author=author, status=status,
+                publish_date=timezone.now(),
+            )
+
+        self.published = [post(f"Live {i}", "published") for i in range(3)]
+        self.draft = post("Draft", "draft")
+
+    def assertCountsMatch(self, expected):
+        stored = dict(BlogTag.objects.values_list("name", "post_count"))
+        live = dict(
+            BlogTag.objects.annotate(
+                live=Count("posts", filter=Q(posts__status="published"))
+            ).values_list("name", "live")
+        )
+        self.assertEqual(stored, live)
+        self.assertEqual([stored[tag.name] for tag in self.tags], expected)
+
+    def test_add_remove_clear_from_the_post_side(self):
+        first, second = self.published[:2]
+        first.tags.add(*self.tags)
+        second.tags.add(self.tags[0])
+        self.draft.tags.add(self.tags[0], self.tags[1])
+        self.assertCountsMatch([2, 1, 1])
+
+        first.tags.remove(self.tags[1])
+        self.draft.tags.remove(self.tags[0])
+        self.assertCountsMatch([2, 0, 1])
+
+        first.tags.clear()
+        self.draft.tags.clear()
+        self.assertCountsMatch([1, 0, 0])
+
+    def test_add_remove_clear_from_the_tag_side(self):
+        tag = self.tags[0]
+        tag.posts.add(*self.published, self.draft)
+        self.tags[1].posts.add(self.published[0])
+        self.assertCountsMatch([3, 1, 0])
+
+        tag.posts.remove(self.published[0], self.draft)
+        self.assertCountsMatch([2, 1, 0])
+
+        tag.posts.clear()
+        self.assertCountsMatch([0, 1, 0])
+
+    def test_publish_and_unpublish(self):
+        self.draft.tags.add(self.tags[0])
+        self.published[0].tags.add(self.tags[0], self.tags[2])
+        self.assertCountsMatch([1, 0, 1])
+
+        self.draft.status = "published"
+        self.draft.save()
+        self.assertCountsMatch([2, 0, 1])
+
+        # A fresh instance, status not loaded from this object
+        post = BlogPost.objects.get(pk=self.published[0].pk)
+        post.status = "draft"
+        post.save()
+        self.assertCountsMatch([1, 0, 0])
+
+        # Saving without a status change leaves the counts alone
+        post.title = "Still a draft"
+        post.save()
+        self.assertCountsMatch([1, 0, 0])
+
+    def test_deleting_posts(self):
+        for post in (*self.published, self.draft):
+            post.tags.add(self.tags[0], self.tags[1])
+        self.assertCountsMatch([3, 3, 0])
+
+        self.published[0].delete()
+        self.draft.delete()
+        self.assertCountsMatch([2, 2, 0])
+
+
+class RelatedPostsTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user("relater")
+        self.tags = {name: BlogTag.objects.create(name=name) for name in "abcd"}
+        self.now = timezone.now()
+
+    def post(self, title, tags, days_ago=0, status="published"):
+        """Create a post and tag it, running the refresh the signals schedule"""
+        with self.captureOnCommitCallbacks(execute=True):
+            post = BlogPost.objects.create(
+                title=title, content="Body", author=self.author, status=status,
+                publish_date=self.now - timedelta(days=days_ago),
+            )
+            post.tags.add(*(self.tags[name] for name in tags))
+        return post
+
+    def neighbours(self, post):
+        return [related.title for related in get_related_posts(post)]
+
+    def assertMatchesRebuild(self):
+        """The incrementally maintained table equals a full recompute"""
+        def rows():
+            return set(RelatedPost.objects.values_list("post_id", "related_id", "position"))
+
+        incremental = rows()
+        rebuild_related_posts()
+        self.assertEqual(incremental, rows())
+
+    def test_ranked_by_jaccard_similarity(self):
+        target = self.post("Target", "ab")
+        self.post("Same", "ab")  # 2/2
+        self.post("Superset", "abc")  # 2/3
+        self.post("One shared", "a")  # 1/2
+        self.post("Weak", "acd")  # 1/4, beyond the limit
+        self.post("Unrelated", "cd")
+
+        self.assertEqual(self.neighbours(target), ["Same", "Superset", "One shared"])
+        self.assertEqual(RELATED_POSTS_LIMIT, 3)
+        scores = RelatedPost.objects.filter(post=target).order_by("position")
+        self.assertEqual(
+            [round(score, 3) for score in scores.values_list("score", flat=True)],
+            [1.0, 0.667, 0.5],
+        )
+        self.assertMatchesRebuild()
+
+    def test_ties_go_to_the_newest_then_the_highest_id(self):
+        target = self.post("Target", "a")
+        self.post("Old", "a", days_ago=5)
+        self.post("Older", "a", days_ago=9)
+        self.post("Older, later id", "a", days_ago=9)
+        self.post("Newest", "a", days_ago=1)
+
+        self.assertEqual(self.neighbours(target), ["Newest", "Old", "Older, later id"])
+        self.assertMatchesRebuild()
+
+    def test_refreshed_when_tags_change(self):
+        target = self.post("Target", "ab")
+        other = self.post("Other", "cd")
+        self.post("Partial", "a")
+        self.assertEqual(self.neighbours(target), ["Partial"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.tags.add(self.tags["a"], self.tags["b"])
+        self.assertEqual(self.neighbours(target), ["Partial", "Other"])
+        self.assertEqual(self.neighbours(other), ["Target", "Partial"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.tags.remove(self.tags["c"], self.tags["d"])
+        self.assertEqual(self.neighbours(target), ["Other", "Partial"])
+
+        # From the tag's side of the relation
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tags["a"].posts.clear()
+        self.assertEqual(self.neighbours(target), ["Other"])
+        self.assertEqual(self.neighbours(other), ["Target"])
+        self.assertMatchesRebuild()
+
+    def test_unpublished_posts_are_left_out(self):
+        target = self.post("Target", "ab")
+        self.post("Draft", "ab", status="draft")
+        live = self.post("Live", "a")
+        self.assertEqual(self.neighbours(target), ["Live"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            live.status = "draft"
+            live.save()
+        self.assertEqual(self.neighbours(target), [])
+        self.assertFalse(RelatedPost.objects.filter(post=live).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            live.status = "published"
+            live.save()
+        self.assertEqual(self.neighbours(target), ["Live"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            live.delete()
+        self.assertEqual(self.neighbours(target), [])
+        self.assertMatchesRebuild()
+
+
+class LeadFunnelTests(TestCase):
+    def lead(self, status="new", source="website"):
+        return Lead.objects.create(
+            name="Lead", email="lead@example.com", status=status, source=source
+        )
+
+    def assertFunnelMatches(self):
+        """The materialized counters equal a live aggregate over Lead"""
+        stored = {
+            (status, source): count
+            for status, source, count in LeadFunnelCount.objects.values_list(
+                "status", "source", "count"
+            )
+            if count
+        }
+        live = {
+            (row["status"], row["source"]): row["n"]
+            for row in Lead.objects.order_by().values("status", "source").annotate(n=Count("id"))
+        }
+        self.assertEqual(stored, live)
+
+        stats = get_lead_funnel_stats()
+        self.assertEqual(stats["total"], Lead.objects.count())
+        for status, _ in Lead.LEAD_STATUS:
+            self.assertEqual(stats["by_status"][status], Lead.objects.filter(status=status).count())
+        for source, _ in Lead.LEAD_SOURCE:
+            self.assertEqual(stats["by_source"][source], Lead.objects.filter(source=source).count())
+
+    def test_create(self):
+        self.lead()
+        self.lead()
+        self.lead("qualified", "referral")
+        self.assertFunnelMatches()
+        self.assertEqual(get_lead_funnel_stats()["by_status"]["new"], 2)
+
+    def test_status_and_source_changes(self):
+        first, second = self.lead(), self.lead()
+        first.status = "qualified"
+        first.save()
+        second.source = "google_ads"
+        second.status = "closed_won"
+        second.save()
+        self.assertFunnelMatches()
+        self.assertEqual(get_lead_funnel_stats()["conversion_rate"], 50.0)
+
+        # Saving again without a change moves nothing
+        second.notes = "Signed"
+        second.save()
+        self.assertFunnelMatches()
+
+    def test_status_change_on_a_deferred_instance(self):
+        lead = self.lead()
+        deferred = Lead.objects.only("name").get(pk=lead.pk)
+        deferred.status = "contacted"
+        deferred.save()
+        self.assertFunnelMatches()
+
+    def test_delete(self):
+        keep, drop = self.lead(), self.lead("proposal", "social_media")
+        drop.delete()
+        Lead.objects.filter(pk=keep.pk).get().delete()
+        self.assertFunnelMatches()
+        self.assertEqual(get_lead_funnel_stats()["total"], 0)
+
+    def test_rebuild_after_a_bulk_update(self):
+        self.lead()
+        self.lead("contacted")
+        # Queryset updates send no signals
+        Lead.objects.update(status="closed_lost")
+        rebuild_lead_funnel()
+        self.assertFunnelMatches()
+
+
+class SeederTests(TestCase):
+    SIZES = {
+        "users": 6, "tags": 5, "posts": 12, "services": 3, "reviews": 10,
+        "projects": 4, "leads": 15, "activity_logs": 10, "chat_messages": 8,
+    }
+
+    class Rollback(Exception):
+        pass
+
+    def seed(self, seed=7, **sizes):
+        """Seed an empty database, snapshot it by natural keys and roll it back"""
+        try:
+            with transaction.atomic():
+                with mock.patch("core.seeding.timezone.now", return_value=self.now):
+                    seeder = Seeder(seed=seed, chunk_size=4, prefix="det")
+                seeder.run(**{**self.SIZES, **sizes})
+                seeder.finalize(related_posts=True)
+                snapshot = self.snapshot()
+                raise self.Rollback
+        except self.Rollback:
+            return snapshot
+
+    def snapshot(self):
+        def rows(queryset, *fields):
+            return sorted(queryset.values_list(*fields), key=repr)
+
+        return {
+            "users": rows(User.objects, "username", "first_name", "is_staff", "date_joined"),
+            "posts": rows(
+                BlogPost.objects, "slug", "title", "content", "status", "author__username",
+                "publish_date", "views", "is_featured",
+            ),
+            "post_tags": rows(BlogPost.tags.through.objects, "blogpost__slug", "blogtag__slug"),
+            "tags": rows(BlogTag.objects, "slug", "category", "post_count"),
+            "reviews": rows(ServiceReview.objects, "service__slug", "user__username", "rating", "comment"),
+            "projects": rows(Project.objects, "slug", "title", "status", "budget", "created_at"),
+            "technologies": rows(ProjectTechnology.objects, "project__slug", "technology__name"),
+            "leads": rows(
+                Lead.objects, "email", "name", "status", "source", "budget",
+                "assigned_to__username", "created_at",
+            ),
+            "activity": rows(ActivityLog.objects, "user__username", "project_logs__slug", "action", "details"),
+            "chat": rows(
+                ChatMessage.objects, "user__username", "username", "room", "seq", "message", "timestamp",
+            ),
+            "related": rows(RelatedPost.objects, "post__slug", "related__slug", "position"),
+        }
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_same_seed_and_counts_give_the_same_rows(self):
+        first = self.seed()
+        self.assertEqual(len(first["posts"]), self.SIZES["posts"])
+        self.assertEqual(len(first["chat"]), self.SIZES["chat_messages"])
+        self.assertEqual(first, self.seed())
+
+    def test_chat_messages_fill_rooms_in_time_order(self):
+        with mock.patch("core.seeding.timezone.now", return_value=self.now):
+            seeder = Seeder(seed=7, prefix="det")
+        seeder.run(**self.SIZES)
+        messages = list(ChatMessage.objects.order_by("timestamp").select_related("user"))
+        self.assertTrue(all(m.room and m.username == m.user.username for m in messages))
+        self.assertTrue(all(can_join(User(is_staff=False), m.room) for m in messages))
+        self.assertGreater(len({m.room for m in messages}), 1)
+        # Ids follow the back-dated timestamps, like ids assigned on receipt
+        seqs = [m.seq for m in messages]
+        self.assertEqual(seqs, sorted(set(seqs)))
+        self.assertEqual(seqs[0] >> 10, int(messages[0].timestamp.timestamp() * 1000))
+
+    def test_another_seed_gives_other_rows(self):
+        self.assertNotEqual(self.seed()["posts"], self.seed(seed=8)["posts"])
+
+    def test_changing_one_count_leaves_the_other_tables_alone(self):
+        first = self.seed()
+        second = self.seed(leads=30)
+        self.assertEqual(len(second["leads"]), 30)
+        self.assertLessEqual(set(first["leads"]), set(second["leads"]))
+        for table in ("users", "posts", "post_tags", "projects", "reviews", "activity"):
+            self.assertEqual(first[table], second[table], table)
+
+
+class AdminSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def message(self, status="new"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ContactMessage.objects.create(
+                name="Visitor", email="visitor@example.com", subject="Hi",
+                message="Hello", status=status,
+            )
+
+    def test_snapshot_is_cached_until_a_versioned_model_changes(self):
+        self.message()
+        self.assertEqual(get_admin_base_context()["message_count"], 1)
+        with self.assertNumQueries(0):
+            context = get_admin_base_context()
+        self.assertEqual(context["message_count"], 1)
+
+        self.message()
+        with self.captureOnCommitCallbacks(execute=True):
+            announcement = Announcement.objects.create(title="Launch", message="Soon")
+        context = get_admin_base_context()
+        self.assertEqual(context["message_count"], 2)
+        self.assertEqual(context["announcements_count"], 1)
+        self.assertEqual(context["latest_announcement"], announcement)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            announcement.delete()
+        self.assertEqual(get_admin_base_context()["announcements_count"], 0)
+
+    def test_callers_get_a_copy(self):
+        get_admin_base_context()["message_count"] = 99
+        self.assertEqual(get_admin_base_context()["message_count"], 0)
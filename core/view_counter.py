@@ -0,0 +1,174 @@
+"""
+Buffered view counting for BlogPost.views.
+
+Views are first counted in a per-process buffer, pushed to the shared cache
+every PUSH_INTERVAL seconds, and folded into the database by
+flush_post_views() with one UPDATE per FLUSH_BATCH_SIZE posts.
+
+Each push also stores the ids it touched under a numbered "dirty" key, so
+a flush reads only the counters of posts viewed since the last one, not
+one per post in the blog. Whichever process first notices that
+FLUSH_INTERVAL has passed starts the flush in a background thread, off the
+request; the flush_post_views management command can be scheduled as well.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import BlogPost
+
+logger = logging.getLogger(__name__)
+
+PUSH_INTERVAL = 2  # seconds between process buffer -> cache pushes
+PUSH_THRESHOLD = 100  # buffered views that force an early push
+FLUSH_INTERVAL = 60  # seconds between cache -> database flushes
+FLUSH_BATCH_SIZE = 500
+
+COUNTER_KEY = "post_views:{}"
+FLUSH_LOCK_KEY = "post_views:flush_lock"
+# Push n stores the ids it touched under DIRTY_KEY.format(n)
+DIRTY_SEQ_KEY = "post_views:dirty_seq"
+DIRTY_KEY = "post_views:dirty:{}"
+# Last push folded into the database, and a push found missing last time
+FLUSHED_SEQ_KEY = "post_views:flushed_seq"
+MISSING_SEQ_KEY = "post_views:missing_seq"
+
+_buffer = Counter()
+_buffer_lock = threading.Lock()
+_last_push = time.monotonic()
+
+
+def record_view(post):
+    """Count one view of ``post`` without touching the database"""
+    global _last_push
+    with _buffer_lock:
+        _buffer[post.pk] += 1
+        due = (
+            sum(_buffer.values()) >= PUSH_THRESHOLD
+            or time.monotonic() - _last_push >= PUSH_INTERVAL
+        )
+    if due:
+        push_buffered_views()
+        # Only one worker per interval gets the lock and flushes
+        if cache.add(FLUSH_LOCK_KEY, True, FLUSH_INTERVAL):
+            start_background_flush()
+
+
+def start_background_flush():
+    threading.Thread(target=_flush_in_thread, name="flush-post-views", daemon=True).start()
+
+
+def _flush_in_thread():
+    try:
+        flush_post_views()
+    except Exception:
+        # The counters stay in the cache for the next flush
+        logger.exception("Could not flush post views")
+    finally:
+        connections.close_all()
+
+
+def push_buffered_views():
+    """Move this process's buffered views into the shared cache counters"""
+    global _last_push
+    with _buffer_lock:
+        pending = dict(_buffer)
+        _buffer.clear()
+        _last_push = time.monotonic()
+    if not pending:
+        return
+    for post_id, count in pending.items():
+        key = COUNTER_KEY.format(post_id)
+        if cache.add(key, count, None):
+            continue
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            cache.set(key, count, None)
+    # Counters first, then the dirty key: a flush that sees the key sees the views
+    cache.add(DIRTY_SEQ_KEY, 0, None)
+    seq = cache.incr(DIRTY_SEQ_KEY)
+    cache.set(DIRTY_KEY.format(seq), list(pending), None)
+
+
+def _dirty_post_ids():
+    """
+    Ids of posts pushed since the last flush, and the range of pushes they
+    came from. A push whose key is not written yet (its process is between
+    the two cache calls) stops the range there, once; if it is still missing
+    on the next flush it is skipped and its views wait for the post's next
+    push.
+    """
+    flushed = cache.get(FLUSHED_SEQ_KEY, 0)
+    latest = cache.get(DIRTY_SEQ_KEY, 0)
+    if latest < flushed:
+        # The push counter was evicted and started over
+        flushed = 0
+    seqs = range(flushed + 1, latest + 1)
+    found = cache.get_many([DIRTY_KEY.format(seq) for seq in seqs])
+    post_ids = set()
+    for seq in seqs:
+        ids = found.get(DIRTY_KEY.format(seq))
+        if ids is None:
+            if cache.get(MISSING_SEQ_KEY) != seq:
+                cache.set(MISSING_SEQ_KEY, seq, None)
+                return post_ids, range(seqs.start, seq)
+            continue
+        post_ids.update(ids)
+    return post_ids, seqs
+
+
+def flush_post_views():
+    """
+    Fold the pending cache counters of recently viewed posts into BlogPost.views.
+
+    Each batch is a single ``UPDATE ... SET views = views + CASE ...``; the
+    cache counters are then decremented by exactly what was written, so
+    views recorded during the flush are kept for the next one. Returns the
+    number of views written.
+    """
+    push_buffered_views()
+    post_ids, pushes = _dirty_post_ids()
+    post_ids = sorted(post_ids)
+    written = 0
+    for start in range(0, len(post_ids), FLUSH_BATCH_SIZE):
+        keys = [COUNTER_KEY.format(pk) for pk in post_ids[start:start + FLUSH_BATCH_SIZE]]
+        pending = {
+            int(key.rsplit(":", 1)[1]): count
+            for key, count in cache.get_many(keys).items()
+            if count
+        }
+        if not pending:
+            continue
+        with transaction.atomic():
+            BlogPost.objects.filter(pk__in=pending).update(
+                views=F("views")
+                + Case(
+                    *[When(pk=pk, then=Value(count)) for pk, count in pending.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+        for pk, count in pending.items():
+            try:
+                cache.decr(COUNTER_KEY.format(pk), count)
+            except ValueError:
+                # Counter was evicted meanwhile; nothing left to subtract from
+                pass
+        written += sum(pending.values())
+    if pushes:
+        cache.set(FLUSHED_SEQ_KEY, pushes[-1], None)
+        cache.delete_many([DIRTY_KEY.format(seq) for seq in pushes])
+    return written
+
+
+def get_popular_posts(limit=5):
+    """Published posts with the most flushed views"""
+    return BlogPost.objects.filter(status="published").order_by(
+        "-views", "-publish_date"
+    )[:limit]
@@ -17,8 +17,11 @@ from .models import (
     WebsiteAnalytics,
     NewsletterSubscriber,
     ActivityLog,
+    Announcement,
     SiteSetting,
 )
+from .caching import anonymous_page_cache, get_or_build_versioned, get_site_settings
+from .query_budget import query_budget
 from .forms import (
     ContactForm,
     NewsletterForm,
@@ -31,11 +34,12 @@ from django.conf import settings
 import os
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import login as auth_login, authenticate
-from django.contrib.auth import logout
+from django.contrib.auth import get_user_model, logout
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.views.decorators.http import require_POST
-from services.models import Service, ServiceReview
+from django.db.models import Count, Q
+from services.models import Service, ServiceRequest, ServiceReview
 from projects.models import Project, ProjectCollaborator
 from django.contrib.admin.views.decorators import staff_member_required
 from django.http import JsonResponse
@@ -82,38 +86,67 @@ def activity_logs(request):
     return render(request, "admin/sections/activity_logs.html", context)
 
 
+ADMIN_SNAPSHOT_TIMEOUT = 60  # seconds
+
+
 def get_admin_base_context():
     """Get base context for admin dashboard and its sections"""
-    from django.contrib.auth import get_user_model
-    from projects.models import Project
-    from services.models import Service, ServiceRequest, ServiceReview
-    from core.models import ContactMessage, Announcement, TeamMember, Testimonial
+    models = [
+        get_user_model(),
+        Project,
+        Service,
+        ContactMessage,
+        Announcement,
+        TeamMember,
+        Testimonial,
+        ServiceReview,
+        ServiceRequest,
+    ]
+    # Copy so callers can update() the context without touching the cache
+    return dict(
+        get_or_build_versioned(
+            "admin_base_context", models, _build_admin_snapshot, ADMIN_SNAPSHOT_TIMEOUT
+        )
+    )
 
+
+def _build_admin_snapshot():
+    """Compute the admin dashboard counters with one aggregate per table"""
     User = get_user_model()
 
+    service_stats = Service.objects.aggregate(
+        total=Count("id"), active=Count("id", filter=Q(is_active=True))
+    )
+
     return {
-        "user_count": User.objects.count(),
-        "project_count": Project.objects.count(),
-        "service_count": Service.objects.count(),
-        "message_count": ContactMessage.objects.filter(status="new").count(),
-        "announcements_count": Announcement.objects.filter(is_active=True).count(),
-        "recent_projects": Project.objects.all().order_by("-created_at")[:5],
-        "recent_services": Service.objects.all().order_by("-created_at")[:5],
-        "recent_messages": ContactMessage.objects.filter(status="new").order_by(
-            "-created_at"
-        )[:5],
-        "team_members": TeamMember.objects.filter(is_active=True).order_by(
-            "display_order"
-        )[:8],
-        "testimonials": Testimonial.objects.filter(is_featured=True, is_active=True)[
-            :3
-        ],
+        "user_count": User.objects.aggregate(total=Count("id"))["total"],
+        "project_count": Project.objects.aggregate(total=Count("id"))["total"],
+        "service_count": service_stats["total"],
+        "message_count": ContactMessage.objects.aggregate(
+            new=Count("id", filter=Q(status="new"))
+        )["new"],
+        "announcements_count": Announcement.objects.aggregate(
+            active=Count("id", filter=Q(is_active=True))
+        )["active"],
+        "recent_projects": list(Project.objects.all().order_by("-created_at")[:5]),
+        "recent_services": list(Service.objects.all().order_by("-created_at")[:5]),
+        "recent_messages": list(
+            ContactMessage.objects.filter(status="new").order_by("-created_at")[:5]
+        ),
+        "team_members": list(
+            TeamMember.objects.filter(is_active=True).order_by("display_order")[:8]
+        ),
+        "testimonials": list(
+            Testimonial.objects.filter(is_featured=True, is_active=True)[:3]
+        ),
         "latest_announcement": Announcement.objects.filter(is_active=True)
         .order_by("-created_at")
         .first(),
-        "total_reviews": ServiceReview.objects.count(),
-        "active_services": Service.objects.filter(is_active=True).count(),
-        "pending_requests": ServiceRequest.objects.filter(status="pending").count(),
+        "total_reviews": ServiceReview.objects.aggregate(total=Count("id"))["total"],
+        "active_services": service_stats["active"],
+        "pending_requests": ServiceRequest.objects.aggregate(
+            pending=Count("id", filter=Q(status="pending"))
+        )["pending"],
     }
 
 
@@ -131,36 +164,26 @@ def contact_messages(request):
 
 @staff_member_required
 def leads(request):
-    from django.core.paginator import Paginator
-    from django.db.models import Count, Q
+    from .lead_funnel import get_lead_funnel_stats
+    from .pagination import paginate_by_cursor
 
     # Get all leads
     leads_list = Lead.objects.all().order_by("-created_at")
 
-    # Calculate statistics
-    total_leads = Lead.objects.count()
-    new_leads = Lead.objects.filter(status="new").count()
-    qualified_leads = Lead.objects.filter(status="qualified").count()
-    closed_won_leads = Lead.objects.filter(status="closed_won").count()
+    # Statistics come from the materialized funnel counters
+    funnel = get_lead_funnel_stats()
 
-    # Calculate conversion rate
-    conversion_rate = 0
-    if total_leads > 0:
-        conversion_rate = round((closed_won_leads / total_leads) * 100, 1)
-
-    # Pagination
-    paginator = Paginator(leads_list, 25)  # Show 25 leads per page
-    page_number = request.GET.get("page")
-    leads = paginator.get_page(page_number)
+    # Keyset pagination: 25 leads per page, same cost at any depth
+    leads = paginate_by_cursor(request, leads_list, 25)
 
     context = get_admin_base_context()
     context.update(
         {
             "leads": leads,
-            "total_leads": total_leads,
-            "new_leads": new_leads,
-            "qualified_leads": qualified_leads,
-            "conversion_rate": conversion_rate,
+            "total_leads": funnel["total"],
+            "new_leads": funnel["by_status"]["new"],
+            "qualified_leads": funnel["by_status"]["qualified"],
+            "conversion_rate": funnel["conversion_rate"],
         }
     )
     return render(request, "admin/sections/leads.html", context)
@@ -223,6 +246,7 @@ from django.contrib.auth.decorators import user_passes_test
 
 
 # Admin dashboard view
+@query_budget(20)
 @user_passes_test(lambda u: u.is_staff or u.is_superuser)
 def admin_dashboard(request):
     context = get_admin_base_context()
@@ -241,25 +265,15 @@ def pricing(request):
     plans = PricingPlan.objects.filter(is_active=True).order_by(
         "display_order", "price"
     )
-    site_setting = SiteSetting.objects.all()
-
-    if site_setting:
-        for setting in site_setting:
-            site_name = setting.site_name
-            facebook = setting.facebook
-            twitter = setting.twitter
-            instagram = setting.instagram
-            linkedin = setting.linkedin
-            mail = setting.contact_email
-            tel = setting.contact_phone
-            address = setting.address
-            logo = setting.logo
+    setting = get_site_settings()
 
     context = {"plans": plans, "setting": setting}
     return render(request, "core/pricing.html", context)
 
 
 # Create your views here.
+@query_budget(12)
+@anonymous_page_cache(Service, Testimonial, TeamMember, Project, FAQ, BlogPost, SiteSetting)
 def home(request):
     """View for the homepage"""
     # Get featured services
@@ -277,7 +291,7 @@ def home(request):
     faqs = FAQ.objects.filter(is_active=True)[:6]
 
     # Get recent blog post
-    recent_posts = BlogPost.objects.filter(status="published").order_by(
+    recent_posts = BlogPost.objects.filter(status="published").for_cards().order_by(
         "-publish_date"
     )[:6]
 
@@ -352,10 +366,7 @@ def quick_inquiry(request):
             inquiry.save()
             
             # Get site settings for contact information
-            try:
-                site_settings = SiteSetting.objects.first()
-            except SiteSetting.DoesNotExist:
-                site_settings = None
+            site_settings = get_site_settings()
             
             return render(request, "core/quick_inquiry_success.html", {
                 'inquiry': inquiry,
@@ -609,9 +620,9 @@ def blog_home(request):
     """Blog home page with featured posts and recent posts"""
     featured_posts = BlogPost.objects.filter(
         status="published", is_featured=True
-    ).order_by("-publish_date")[:3]
+    ).for_cards().order_by("-publish_date")[:3]
 
-    recent_posts = BlogPost.objects.filter(status="published").order_by(
+    recent_posts = BlogPost.objects.filter(status="published").for_cards().order_by(
         "-publish_date"
     )[:6]
 
@@ -628,18 +639,16 @@ def blog_home(request):
 
 def blog_list(request):
     """Blog list with pagination and filtering"""
-    posts = BlogPost.objects.filter(status="published").order_by("-publish_date")
+    posts = BlogPost.objects.filter(status="published").for_cards().order_by(
+        "-publish_date"
+    )
 
-    # Search functionality
+    # Search functionality (ranked by relevance)
     search_query = request.GET.get("search")
     if search_query:
-        from django.db.models import Q
+        from .search import search_blog_posts
 
-        posts = posts.filter(
-            Q(title__icontains=search_query)
-            | Q(content__icontains=search_query)
-            | Q(excerpt__icontains=search_query)
-        )
+        posts = search_blog_posts(posts, search_query)
 
     # Tag filtering
     tag_slug = request.GET.get("tag")
@@ -648,20 +657,18 @@ def blog_list(request):
         selected_tag = get_object_or_404(BlogTag, slug=tag_slug)
         posts = posts.filter(tags=selected_tag)
 
-    # Pagination
-    from django.core.paginator import Paginator
+    # Keyset pagination on the listing's ordering (publish date or search rank)
+    from .pagination import paginate_by_cursor
 
-    paginator = Paginator(posts, 6)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_by_cursor(request, posts, 6)
 
     context = {
         "page_obj": page_obj,
         "posts": page_obj,
         "is_paginated": page_obj.has_other_pages(),
-        "featured_posts": BlogPost.objects.filter(status="published", is_featured=True)[
-            :3
-        ],
+        "featured_posts": BlogPost.objects.filter(
+            status="published", is_featured=True
+        ).for_cards()[:3],
         "all_tags": BlogTag.objects.all(),
         "tags": BlogTag.objects.all(),  # For backward compatibility
         "selected_tag": selected_tag,
@@ -674,19 +681,24 @@ def blog_list(request):
 
 def blog_detail(request, slug):
     """Blog post detail view"""
-    post = get_object_or_404(BlogPost, slug=slug, status="published")
-
-    # Get related posts by tags
-    related_posts = (
-        BlogPost.objects.filter(status="published", tags__in=post.tags.all())
-        .exclude(id=post.id)
-        .distinct()[:3]
+    post = get_object_or_404(
+        BlogPost.objects.for_cards(), slug=slug, status="published"
     )
 
+    from .view_counter import record_view
+
+    record_view(post)
+
+    # Related posts are precomputed by tag overlap
+    from .related_posts import get_related_posts
+
+    related_posts = get_related_posts(post)
+
     # Get recent posts for sidebar
     recent_posts = (
         BlogPost.objects.filter(status="published")
         .exclude(id=post.id)
+        .for_cards()
         .order_by("-publish_date")[:5]
     )
 
@@ -701,27 +713,27 @@ def blog_detail(request, slug):
 
 # Portfolio Views with Technologies
 def portfolio_list(request):
-    """Enhanced portfolio list with technology filtering"""
-    projects = Project.objects.filter(is_featured=True).order_by("-created_at")
-
-    # Technology filtering
-    tech_slug = request.GET.get("tech")
-    if tech_slug:
-        from projects.models import Technology
-
-        projects = projects.filter(technologies__technology__slug=tech_slug)
+    """Featured projects filtered by technology (?tech=a&tech=b&match=or)"""
+    from .tech_facets import MATCH_ALL, MATCH_ANY, facet_index
 
-    # Get all technologies for filter
-    from projects.models import Technology
+    mode = MATCH_ANY if request.GET.get("match") == MATCH_ANY else MATCH_ALL
+    result = facet_index.query(request.GET.getlist("tech"), mode)
 
-    all_technologies = Technology.objects.filter(is_active=True).order_by(
-        "category", "name"
+    # Matching is done in memory; loading the projects is a single pk lookup
+    projects = list(
+        Project.objects.filter(pk__in=result.project_ids).order_by("-created_at", "-pk")
     )
+    technologies = facet_index.technologies_for(result.project_ids)
+    for project in projects:
+        project.facet_technologies = technologies.get(project.pk, [])
 
     context = {
         "projects": projects,
-        "all_technologies": all_technologies,
-        "current_tech": tech_slug or "",
+        "facets": result.facets,
+        "selected_techs": result.selected,
+        "match": mode,
+        "all_technologies": [facet.technology for facet in result.facets],
+        "current_tech": result.selected[0] if result.selected else "",
     }
 
     return render(request, "projects/portfolio_list.html", context)
@@ -1,5 +1,7 @@
-from django.core.management.base import BaseCommand
-from django.utils.text import slugify
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from core.caching import bump_model_version
+from core.slugs import SLUG_ATTEMPTS, allocate_slugs
 from projects.models import Project
 
 
@@ -7,27 +9,33 @@ class Command(BaseCommand):
     help = 'Generate slugs for existing projects'
 
     def handle(self, *args, **options):
-        projects_without_slugs = Project.objects.filter(slug__isnull=True)
-        
-        updated_count = 0
+        projects_without_slugs = list(Project.objects.filter(slug__isnull=True).only('pk', 'title'))
+        if not projects_without_slugs:
+            self.stdout.write(self.style.SUCCESS('All projects already have slugs.'))
+            return
+
+        # One prefix query for the whole batch, then a single bulk_update;
+        # a concurrent save taking one of the slugs makes us allocate again
+        for attempt in range(SLUG_ATTEMPTS):
+            slugs = allocate_slugs(Project, [project.title for project in projects_without_slugs])
+            for project, slug in zip(projects_without_slugs, slugs):
+                project.slug = slug
+            try:
+                with transaction.atomic():
+                    Project.objects.bulk_update(projects_without_slugs, ['slug'], batch_size=500)
+                break
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise CommandError('Could not allocate unique slugs, please try again')
+
+        # bulk_update sends no signals; invalidate the cached project pages
+        bump_model_version(Project)
+
         for project in projects_without_slugs:
-            base_slug = slugify(project.title)
-            slug = base_slug
-            counter = 1
-            
-            # Ensure unique slug
-            while Project.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            
-            project.slug = slug
-            project.save()
-            updated_count += 1
-            
             self.stdout.write(
-                self.style.SUCCESS(f'Generated slug "{slug}" for project: {project.title}')
+                self.style.SUCCESS(f'Generated slug "{project.slug}" for project: {project.title}')
             )
-        
+
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully generated slugs for {updated_count} projects!')
+            self.style.SUCCESS(f'Successfully generated slugs for {len(projects_without_slugs)} projects!')
         )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_project_slug'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['status', '-completed_date'], name='projects_completed_idx'),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from django.conf import settings
-from django.utils.text import slugify
+from core.slugs import save_with_unique_slug
 from django.urls import reverse
 
 
@@ -83,13 +83,7 @@ class Project(models.Model):
     def save(self, *args, **kwargs):
         """Auto-generate slug from title if not provided"""
         if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while Project.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            return save_with_unique_slug(self, self.title, super().save, *args, **kwargs)
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -119,6 +113,10 @@ class Project(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset pagination of the portfolio
+            models.Index(fields=["status", "-completed_date"], name="projects_completed_idx"),
+        ]
 
 
 # --- Additional Professional Models ---
@@ -226,8 +224,7 @@ class Technology(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.slug:
-            from django.utils.text import slugify
-            self.slug = slugify(self.name)
+            return save_with_unique_slug(self, self.name, super().save, *args, **kwargs)
         super().save(*args, **kwargs)
     
     def __str__(self):
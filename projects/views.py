@@ -1,9 +1,10 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
 from django.contrib import messages
 from .models import Project
 from core.models import ActivityLog
-from core.models import SiteSetting
+from core.caching import get_site_settings
+from core.pagination import paginate_by_cursor
+from core.query_budget import query_budget
 
 
 # Create your views here.
@@ -14,10 +15,8 @@ def project_list(request):
         "-completed_date"
     )
 
-    # Pagination
-    paginator = Paginator(completed_projects, 8)  # 8 projects per page
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination, 8 projects per page
+    page_obj = paginate_by_cursor(request, completed_projects, 8)
 
     # Group projects by type (optional, can be removed if not needed)
     project_types = {}
@@ -27,19 +26,7 @@ def project_list(request):
             project_types[project_type] = []
         project_types[project_type].append(project)
 
-    site_setting = SiteSetting.objects.all()
-
-    if site_setting:
-        for setting in site_setting:
-            site_name = setting.site_name
-            facebook = setting.facebook
-            twitter = setting.twitter
-            instagram = setting.instagram
-            linkedin = setting.linkedin
-            mail = setting.contact_email
-            tel = setting.contact_phone
-            address = setting.address
-            logo = setting.logo
+    setting = get_site_settings()
 
     context = {
         "projects": page_obj,
@@ -51,6 +38,7 @@ def project_list(request):
     return render(request, "projects/project_list.html", context)
 
 
+@query_budget(10)
 def project_detail(request, slug):
     """View for displaying project details using slug"""
     try:
@@ -76,19 +64,7 @@ def project_detail(request, slug):
         project_type=project.project_type
     ).exclude(id=project.id)[:3]
 
-    site_setting = SiteSetting.objects.all()
-
-    if site_setting:
-        for setting in site_setting:
-            site_name = setting.site_name
-            facebook = setting.facebook
-            twitter = setting.twitter
-            instagram = setting.instagram
-            linkedin = setting.linkedin
-            mail = setting.contact_email
-            tel = setting.contact_phone
-            address = setting.address
-            logo = setting.logo
+    setting = get_site_settings()
 
     context = {
         "project": project,
@@ -54,7 +54,8 @@ class ServiceRequest(models.Model):
     def __str__(self):
         return f"Request for {self.service.name} by {self.name}"
 from django.db import models
-from django.utils.text import slugify
+
+from core.slugs import save_with_unique_slug
 
 # Create your models here.
 class Service(models.Model):
@@ -103,7 +104,7 @@ class Service(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            return save_with_unique_slug(self, self.name, super().save, *args, **kwargs)
         super().save(*args, **kwargs)
 
     class Meta:
@@ -135,7 +136,7 @@ class ServicePackage(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            return save_with_unique_slug(self, self.name, super().save, *args, **kwargs)
         super().save(*args, **kwargs)
 
     class Meta:
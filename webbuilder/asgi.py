@@ -12,15 +12,20 @@ import os
 from channels.routing import ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
 from channels.auth import AuthMiddlewareStack
-import chat.routing
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webbuilder.settings')
+django_asgi_app = get_asgi_application()
+
+import chat.routing
+from chat.persistence import lifespan
 
 application = ProtocolTypeRouter({
-	"http": get_asgi_application(),
+	"http": django_asgi_app,
 	"websocket": AuthMiddlewareStack(
 		URLRouter(
 			chat.routing.websocket_urlpatterns
 		)
 	),
+	# Flushes queued chat messages on servers that send lifespan events
+	"lifespan": lifespan,
 })
@@ -81,6 +81,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "core.middleware.MaintenanceModeMiddleware",  # Add maintenance mode middleware
+    "core.middleware.QueryBudgetMiddleware",  # Per-route query stats and budgets
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -102,23 +103,83 @@ TEMPLATES = [
     },
 ]
 
-# CACHES = {
-#   "default":{
-#     "BACKEND":"django.core.cache.backends.locmen.LocMemCache",
-#     "LOCATION":"unique-site-settings"
-#   }
-# }
+# Cache
+# Production runs several gunicorn workers, so the cache must live outside
+# any single process: a SQLite file in WAL mode shared by every worker.
+if ENVIRONMENT == 'production':
+    CACHES = {
+        "default": {
+            "BACKEND": "core.cache_backends.SQLiteCache",
+            "LOCATION": os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, 'cache.sqlite3')),
+            "TIMEOUT": 300,
+            "OPTIONS": {
+                "MAX_ENTRIES": 10000,
+                "CULL_FREQUENCY": 4,
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "webbuilder-dev",
+        }
+    }
+
+# Query budgets (core.middleware.QueryBudgetMiddleware): exceeding a view's
+# declared budget raises when strict, and only logs a warning otherwise.
+# The test runner turns strict mode on; other runners can set the variable.
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', '').lower() in ('1', 'true', 'yes')
+TEST_RUNNER = 'core.test_runner.QueryBudgetTestRunner'
 
 # Channels/ASGI
 ASGI_APPLICATION = "webbuilder.asgi.application"
 WSGI_APPLICATION = "webbuilder.wsgi.application"
 
-# Channels layer config (in-memory for dev)
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
-    },
-}
+# Channels layer config: like the cache, production shares one SQLite file
+# (chat.layers) so a message reaches sockets held by every worker.
+if ENVIRONMENT == 'production':
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "chat.layers.SQLiteChannelLayer",
+            "CONFIG": {
+                "location": os.environ.get('CHANNEL_LAYER_LOCATION', os.path.join(BASE_DIR, 'channels.sqlite3')),
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        },
+    }
+
+# Chat messages are stored in batches (chat.persistence): a flush happens
+# once this many are waiting or this many milliseconds after the first one
+CHAT_WRITE_BATCH_SIZE = 50
+CHAT_WRITE_INTERVAL_MS = 250
+CHAT_WRITE_MAX_PENDING = 5000
+
+# Chat rooms anyone may join besides their own conversation (chat.rooms)
+CHAT_TOPIC_ROOMS = ['general']
+
+# Recent messages kept in memory per room for reconnecting clients
+# (chat.history), the most a reconnect is sent, how long a room's buffer
+# outlives its last socket, and how far before its cursor a reconnect is
+# served, for messages from workers whose clocks run behind
+CHAT_HISTORY_SIZE = 100
+CHAT_HISTORY_BACKFILL_LIMIT = 500
+CHAT_HISTORY_IDLE_SECONDS = 300
+CHAT_HISTORY_SKEW_MS = 2000
+
+# Outbound chat frames per socket (chat.outbox): queued messages go out
+# together at most every tick; a client with this many messages queued or
+# not yet acknowledged is told to resync, and is disconnected if it has not
+# caught up after this many seconds. Backpressure comes from the client's
+# acks, not from the socket: daphne never makes a send wait.
+CHAT_OUTBOX_TICK_MS = 50
+CHAT_OUTBOX_HIGH_WATER = 500
+CHAT_SLOW_CONSUMER_SECONDS = 10
 
 
 # Database